@@ -13,6 +13,7 @@ class ConfigSchema(BaseModel):
     api_key: Optional[str] = Field(None, description="Optional API key for external services")
     default_domain: str = Field("general", description="Default domain for agent creation")
     max_components: int = Field(50, description="Maximum number of components per agent", ge=1, le=100)
+    tenant_id: Optional[str] = Field(None, description="Tenant or workspace key - agents are stored, listed and locked per tenant")
 
 @smithery.server(config_schema=ConfigSchema)
 def create_server():
@@ -29,29 +30,42 @@ def create_server():
     if src_dir not in sys.path:
         sys.path.insert(0, src_dir)
     
+    # Logi idą przez kolejkę na stderr (lub AGENT_LOG_FILE) - stdout należy do protokołu MCP
+    import logging
+    from utils.logging_config import configure_logging
+    configure_logging()
+    logger = logging.getLogger("ai_agent_generator.server")
+    
     try:
-        from tools.enhanced_agent_manager import EnhancedAgentManager
-        from tools.component_manager import ComponentManager  
-        from tools.workflow_manager import WorkflowManager
-        from tools.deployer import AgentDeployer
+        from tools.app_context import create_app_context
+        from tools.sharded_store import set_current_tenant
         
-        agent_manager = EnhancedAgentManager()
-        component_manager = ComponentManager()
-        workflow_manager = WorkflowManager()
-        deployer = AgentDeployer()
+        # Jeden katalog, magazyn, SmartContext, analizator i deployer dla wszystkich narzędzi
+        app_context = create_app_context()
+        agent_manager = app_context.agent_manager
+        component_manager = app_context.component_manager
+        workflow_manager = app_context.workflow_manager
+        deployer = app_context.deployer
         
-        print("🤖 Inicjalizacja Enhanced Agent Manager z AI...")
-        print("📊 Background Intelligence: AKTYWNA")
+        logger.info("Enhanced Agent Manager initialized", extra={"store": type(app_context.store).__name__})
     except ImportError as e:
-        print(f"⚠️ Warning: Could not import advanced managers: {e}")
-        print("🔄 Using basic functionality...")
+        logger.warning("Could not import advanced managers, using basic functionality: %s", e)
         
         # Fallback to basic functionality
+        def set_current_tenant(tenant):
+            pass
+        
+        app_context = None
         agent_manager = None
         component_manager = None
         workflow_manager = None
         deployer = None
     
+    def _use_tenant(ctx: Optional[Context]):
+        """Shard magazynu dla bieżącego wywołania - każde żądanie MCP działa we własnym zadaniu"""
+        config = ctx.session_config if ctx else None
+        set_current_tenant(getattr(config, "tenant_id", None))
+
     # Register resources using the decorator approach
     @server.resource("components://catalog", 
                     name="Katalog Komponentów",
@@ -93,6 +107,9 @@ def create_server():
             # Get smart context from agent manager
             if agent_manager and hasattr(agent_manager, 'smart_context'):
                 context_data = await agent_manager.smart_context.get_intelligence_insights()
+                context_data["learning_worker"] = agent_manager.learning_worker.get_metrics()
+                context_data["blueprint_cache"] = agent_manager.get_blueprint_cache_stats()
+                context_data["agent_store"] = agent_manager.store.get_stats()
             else:
                 context_data = {
                     "learned_patterns": [],
@@ -105,15 +122,70 @@ def create_server():
         except Exception as e:
             return json.dumps({"error": str(e), "status": "error"}, indent=2)
 
+    # Ciężkie części agenta jako zasoby - odpowiedź create_agent(response_mode="summary") podaje ich URI.
+    # Shard wynika z konfiguracji sesji wywołującego, tak jak w narzędziach - agent innego tenanta to "not found".
+    async def _agent_part(agent_id: str, field: Optional[str], ctx: Optional[Context]) -> str:
+        if not agent_manager:
+            return json.dumps({"error": "Agent management not available in basic mode", "status": "basic"})
+        _use_tenant(ctx)
+        try:
+            result = await agent_manager.get_agent(agent_id, [field] if field else None)
+        except Exception as e:
+            return json.dumps({"success": False, "error": str(e)}, ensure_ascii=False)
+        if not result.get("success"):
+            return json.dumps(result, ensure_ascii=False)
+        data = result["agent"].get(field) if field else result["agent"]
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    @server.resource("agent://{agent_id}",
+                    name="Agent",
+                    description="Pełny dokument agenta",
+                    mime_type="application/json")
+    async def get_agent_resource(agent_id: str, ctx: Context = None) -> str:
+        return await _agent_part(agent_id, None, ctx)
+
+    @server.resource("agent://{agent_id}/components",
+                    name="Komponenty agenta",
+                    description="Skonfigurowane komponenty agenta",
+                    mime_type="application/json")
+    async def get_agent_components_resource(agent_id: str, ctx: Context = None) -> str:
+        return await _agent_part(agent_id, "components", ctx)
+
+    @server.resource("agent://{agent_id}/workflow",
+                    name="Workflow agenta",
+                    description="Węzły, połączenia i obsługa błędów workflow agenta",
+                    mime_type="application/json")
+    async def get_agent_workflow_resource(agent_id: str, ctx: Context = None) -> str:
+        return await _agent_part(agent_id, "workflow", ctx)
+
+    @server.resource("agent://{agent_id}/chat-interface",
+                    name="Interfejs chatu agenta",
+                    description="Plik HTML interfejsu chatu",
+                    mime_type="text/html")
+    async def get_agent_chat_interface_resource(agent_id: str, ctx: Context = None) -> str:
+        _use_tenant(ctx)
+        try:
+            html = await deployer.get_chat_interface_html(agent_id) if deployer else None
+        except Exception:
+            html = None
+        return html if html is not None else f"<!-- Agent {agent_id} not found -->"
+
     @server.tool()
     async def create_agent(
         name: str,
         description: str,
         domain: str = "general", 
         complexity: str = "medium",
+        use_cache: bool = True,
+        response_mode: str = "full",
         ctx: Context = None
     ) -> str:
-        """🤖 ENHANCED: Tworzy inteligentnego agenta AI z automatyczną analizą NLP, wykrywaniem wymagań i generowaniem interfejsu chatu"""
+        """🤖 ENHANCED: Tworzy inteligentnego agenta AI z automatyczną analizą NLP, wykrywaniem wymagań i generowaniem interfejsu chatu
+        
+        use_cache: powtórzona specyfikacja jest klonowana z zapamiętanego szkieletu (False wymusza pełną analizę)
+        response_mode: "full" (cały wynik), "summary" (id, wyniki i URI zasobów agent://...) lub "ids_only"
+        """
+        _use_tenant(ctx)
         try:
             # Get session configuration
             config = ctx.session_config if ctx else None
@@ -123,8 +195,13 @@ def create_server():
                     name=name,
                     description=description, 
                     domain=domain,
-                    complexity=complexity
+                    complexity=complexity,
+                    use_blueprint_cache=use_cache,
+                    response_mode=response_mode
                 )
+                if response_mode != "full":
+                    # Zwięzłe tryby - bez wcięć i komunikatów
+                    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
                 
                 # Add success message with specific guidance based on result
                 if result.get("success") and result.get("chat_interface", {}).get("generated"):
@@ -165,11 +242,215 @@ def create_server():
             }, indent=2, ensure_ascii=False)
 
     @server.tool()
-    async def get_agent(agent_id: str, ctx: Context = None) -> str:
-        """📊 ENHANCED: Pobiera szczegóły agenta z intelligence metrics i background insights"""
+    async def create_agents(
+        specs: List[Dict[str, Any]],
+        concurrency: int = 8,
+        generate_chat_interface: bool = False,
+        ctx: Context = None
+    ) -> str:
+        """🏭 Tworzy wielu agentów w jednym wywołaniu (do 1000)
+        
+        specs: lista {"name", "description", "domain"?, "complexity"?}
+        concurrency: liczba agentów tworzonych równolegle
+        Wynik każdego agenta jest wysyłany jako powiadomienie o postępie, odpowiedź zawiera zwięzłe podsumowanie.
+        """
+        _use_tenant(ctx)
+        try:
+            if not agent_manager:
+                return json.dumps({
+                    "success": False,
+                    "error": "Agent management not available in basic mode",
+                    "basic_mode": True
+                }, indent=2, ensure_ascii=False)
+            
+            async def report(entry, done, total):
+                if ctx:
+                    await ctx.report_progress(done, total)
+                    await ctx.info(json.dumps(entry, ensure_ascii=False))
+            
+            result = await agent_manager.create_agents(
+                specs,
+                concurrency=concurrency,
+                generate_chat_interface=generate_chat_interface,
+                on_result=report
+            )
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def get_workflow_templates(
+        domain: str = "all",
+        complexity: str = "all",
+        ctx: Context = None
+    ) -> str:
+        """📚 Lista gotowych szablonów agentów (customer_support_basic, lead_qualifier, data_analyst, ...)"""
+        try:
+            if workflow_manager:
+                result = await workflow_manager.get_workflow_templates(domain, complexity)
+            else:
+                result = {
+                    "success": False,
+                    "error": "Workflow templates not available in basic mode",
+                    "basic_mode": True
+                }
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def create_agent_from_template(
+        template_id: str,
+        overrides: Optional[Dict[str, Any]] = None,
+        generate_chat_interface: bool = False,
+        ctx: Context = None
+    ) -> str:
+        """⚡ Tworzy agenta bezpośrednio z szablonu - bez analizy opisu i doboru komponentów
+        
+        overrides: name, description, domain, complexity, component_config ({component_id: {...}})
+        """
+        _use_tenant(ctx)
+        try:
+            if agent_manager:
+                result = await agent_manager.create_agent_from_template(
+                    template_id, overrides, generate_chat_interface
+                )
+            else:
+                result = {
+                    "success": False,
+                    "error": "Agent management not available in basic mode",
+                    "basic_mode": True
+                }
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def get_agent(
+        agent_id: str,
+        include: Optional[List[str]] = None,
+        version: Optional[int] = None,
+        if_none_match: Optional[str] = None,
+        ctx: Context = None
+    ) -> str:
+        """📊 ENHANCED: Pobiera szczegóły agenta z intelligence metrics i background insights
+        
+        include: opcjonalna lista pól agenta, np. ["metrics", "workflow.nodes"]
+        version: numer rewizji z list_agent_revisions (domyślnie bieżąca)
+        if_none_match: version_tag z poprzedniej odpowiedzi - bez zmian zwraca tylko {"not_modified": true}
+        """
+        _use_tenant(ctx)
+        try:
+            if agent_manager:
+                result = await agent_manager.get_agent(agent_id, include, version, if_none_match)
+            else:
+                result = {
+                    "success": False,
+                    "error": "Agent management not available in basic mode",
+                    "basic_mode": True
+                }
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def list_agent_revisions(agent_id: str, ctx: Context = None) -> str:
+        """🕘 Lista rewizji agenta (numer, zdarzenie, czas, liczba komponentów)"""
+        _use_tenant(ctx)
+        try:
+            if agent_manager:
+                result = await agent_manager.list_agent_revisions(agent_id)
+            else:
+                result = {
+                    "success": False,
+                    "error": "Agent management not available in basic mode",
+                    "basic_mode": True
+                }
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def diff_agents(
+        agent_a: str,
+        agent_b: Optional[str] = None,
+        version_a: Optional[int] = None,
+        version_b: Optional[int] = None,
+        ctx: Context = None
+    ) -> str:
+        """🧾 Różnice między dwoma agentami lub rewizjami: komponenty, węzły, połączenia i klucze konfiguracji
+        
+        Bez agent_b porównuje rewizje agent_a: version_a (domyślnie poprzednia) z version_b (domyślnie bieżąca).
+        """
+        _use_tenant(ctx)
+        try:
+            if agent_manager:
+                result = await agent_manager.diff_agents(agent_a, agent_b, version_a, version_b)
+            else:
+                result = {
+                    "success": False,
+                    "error": "Agent management not available in basic mode",
+                    "basic_mode": True
+                }
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def search_agents(
+        query: str,
+        domain: str = "all",
+        limit: int = 10,
+        ctx: Context = None
+    ) -> str:
+        """🔎 Wyszukuje agentów po nazwie, opisie, domenie i komponentach (wyniki z polem score)"""
+        _use_tenant(ctx)
+        try:
+            if agent_manager:
+                result = await agent_manager.search_agents(query, domain, limit)
+            else:
+                result = {
+                    "success": False,
+                    "error": "Agent management not available in basic mode",
+                    "basic_mode": True
+                }
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e)
+            }, indent=2, ensure_ascii=False)
+
+    @server.tool()
+    async def find_similar_agents(
+        agent_id: str,
+        limit: int = 10,
+        min_similarity: float = 0.3,
+        ctx: Context = None
+    ) -> str:
+        """🧬 Agenci podobni do danego (podobieństwo Jaccarda 0-1, wyszukiwanie przez MinHash)"""
+        _use_tenant(ctx)
         try:
             if agent_manager:
-                result = await agent_manager.get_agent(agent_id)
+                result = await agent_manager.find_similar_agents(agent_id, limit, min_similarity)
             else:
                 result = {
                     "success": False,
@@ -188,12 +469,21 @@ def create_server():
         domain: str = "all",
         status: str = "all", 
         sort_by: str = "created",
+        page_size: int = 50,
+        cursor: Optional[str] = None,
+        include: Optional[List[str]] = None,
         ctx: Context = None
     ) -> str:
-        """📋 ENHANCED: Lista agentów z inteligentnymi filtrami i sortowaniem według intelligence score"""
+        """📋 ENHANCED: Lista agentów z inteligentnymi filtrami i sortowaniem
+        
+        sort_by: created (najnowsze), intelligence, readiness lub name
+        page_size/cursor: stronicowanie - przekaż next_cursor, aby pobrać kolejną stronę
+        include: opcjonalna lista pól skrótu, np. ["name", "intelligence_score"]
+        """
+        _use_tenant(ctx)
         try:
             if agent_manager:
-                result = await agent_manager.list_agents(domain, status, sort_by)
+                result = await agent_manager.list_agents(domain, status, sort_by, page_size, cursor, include)
             else:
                 result = {
                     "success": True,
@@ -214,12 +504,17 @@ def create_server():
         agent_id: str,
         test_input: Dict[str, Any],
         test_scenario: str = "standard_test",
+        if_match: Optional[str] = None,
         ctx: Context = None
     ) -> str:
-        """🧪 ENHANCED: Testuje agenta z zaawansowaną analizą wydajności i uczeniem się z wyników"""
+        """🧪 ENHANCED: Testuje agenta z zaawansowaną analizą wydajności i uczeniem się z wyników
+        
+        if_match: version_tag agenta - przy zmianie w międzyczasie zwraca konflikt zamiast nadpisać
+        """
+        _use_tenant(ctx)
         try:
             if agent_manager:
-                result = await agent_manager.test_agent(agent_id, test_input, test_scenario)
+                result = await agent_manager.test_agent(agent_id, test_input, test_scenario, if_match)
             else:
                 result = {
                     "success": False,
@@ -275,13 +570,18 @@ def create_server():
         agent_id: str,
         component_id: str,
         configuration: Optional[Dict[str, Any]] = None,
+        if_match: Optional[str] = None,
         ctx: Context = None
     ) -> str:
-        """⚡ ENHANCED: Dodaje komponent do agenta z inteligentną auto-konfiguracją i walidacją kompatybilności"""
+        """⚡ ENHANCED: Dodaje komponent do agenta z inteligentną auto-konfiguracją i walidacją kompatybilności
+        
+        if_match: version_tag agenta - przy zmianie w międzyczasie zwraca konflikt zamiast nadpisać
+        """
+        _use_tenant(ctx)
         try:
             if agent_manager:
                 result = await agent_manager.add_component_to_agent(
-                    agent_id, component_id, configuration
+                    agent_id, component_id, configuration, if_match
                 )
             else:
                 result = {
@@ -306,6 +606,7 @@ def create_server():
         ctx: Context = None
     ) -> str:
         """💬 Generuje responsywny interfejs czatu HTML5 z zaawansowanymi funkcjami"""
+        _use_tenant(ctx)
         try:
             if deployer:
                 result = await deployer.generate_chat_interface(agent_id, theme)
@@ -329,6 +630,7 @@ def create_server():
         ctx: Context = None
     ) -> str:
         """🚀 Wdraża agenta do środowiska produkcyjnego"""
+        _use_tenant(ctx)
         try:
             if deployer:
                 result = await deployer.deploy_agent(agent_id, environment)
@@ -346,8 +648,13 @@ def create_server():
             }, indent=2, ensure_ascii=False)
 
     @server.tool()
-    async def delete_agent(agent_id: str, confirm: bool = False, ctx: Context = None) -> str:
-        """🗑️ ENHANCED: Bezpieczne usuwanie agenta z weryfikacją i backup"""
+    async def delete_agent(agent_id: str, confirm: bool = False, if_match: Optional[str] = None,
+                           ctx: Context = None) -> str:
+        """🗑️ ENHANCED: Bezpieczne usuwanie agenta z weryfikacją i backup
+        
+        if_match: version_tag agenta - usuwa tylko niezmienioną wersję
+        """
+        _use_tenant(ctx)
         try:
             if not confirm:
                 return json.dumps({
@@ -357,7 +664,7 @@ def create_server():
                 }, indent=2, ensure_ascii=False)
             
             if agent_manager:
-                result = await agent_manager.delete_agent(agent_id)
+                result = await agent_manager.delete_agent(agent_id, if_match)
             else:
                 result = {
                     "success": False,
@@ -371,5 +678,5 @@ def create_server():
                 "error": str(e)
             }, indent=2, ensure_ascii=False)
 
-    print("✅ FastMCP Server created with all tools and resources!")
+    logger.info("FastMCP server created with all tools and resources")
     return server
\ No newline at end of file
@@ -429,9 +429,8 @@ class MCPAgentCreatorServer:
         }
         
         # Dodaj do agenta
-        if "components" not in agent:
-            agent["components"] = []
-        agent["components"].append(new_component)
+        from .tools import agent_counters
+        agent_counters.append_component(agent, new_component)
         agent["updated_at"] = datetime.now().isoformat()
         
         # Przelicz intelligence score
@@ -501,24 +500,9 @@ class MCPAgentCreatorServer:
         return config
     
     async def _recalculate_intelligence_score(self, agent: Dict) -> int:
-        """Przelicza intelligence score agenta"""
-        base_score = 50
-        
-        # Punkty za liczbę komponentów
-        component_count = len(agent.get("components", []))
-        base_score += min(30, component_count * 3)
-        
-        # Punkty za auto-configured components 
-        auto_configured = len([c for c in agent.get("components", []) if c.get("auto_configured")])
-        base_score += auto_configured * 2
-        
-        # Punkty za AI analysis
-        ai_analysis = agent.get("ai_analysis", {})
-        if ai_analysis:
-            base_score += 10
-            base_score += len(ai_analysis.get("implicit_requirements", [])) * 3
-        
-        return min(100, base_score)
+        """Przelicza intelligence score agenta - w O(1) z liczników agenta"""
+        from .tools import agent_counters
+        return agent_counters.intelligence_score(agent_counters.get_counters(agent))
     
     async def _delete_agent_wrapper(self, agent_id: str) -> Dict[str, Any]:
         """Enhanced usuwanie agenta"""
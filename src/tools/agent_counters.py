@@ -0,0 +1,85 @@
+"""Agent counters maintained on mutation and the scores derived from them
+
+Liczniki (komponenty, auto-konfiguracja, węzły LLM, error handlery...) są
+zapisywane w ``agent["metrics"]["counters"]`` przy tworzeniu agenta i
+aktualizowane przyrostowo przy każdej zmianie. Intelligence i readiness score
+wynikają z liczników w O(1), bez ponownego przeglądania list komponentów.
+``check_counters`` porównuje liczniki z pełnym przeliczeniem (testy, debug).
+"""
+
+from typing import Dict, Any
+
+COUNTER_FIELDS = ("component_count", "auto_configured_count", "llm_node_count", "error_handler_count",
+                  "connection_count", "implicit_requirement_count", "ai_enhanced")
+
+
+def is_llm_type(type_id: str) -> bool:
+    """Ta sama reguła co przy auto-konfiguracji komponentów LLM"""
+    return "llm" in type_id or "pollinations" in type_id
+
+
+def compute_counters(agent: Dict[str, Any]) -> Dict[str, int]:
+    """Pełne przeliczenie liczników z dokumentu agenta"""
+    components = agent.get("components", [])
+    workflow = agent.get("workflow", {})
+    ai_analysis = agent.get("ai_analysis", {})
+    return {
+        "component_count": len(components),
+        "auto_configured_count": sum(1 for c in components if c.get("auto_configured")),
+        "llm_node_count": sum(1 for n in workflow.get("nodes", []) if is_llm_type(str(n.get("type", "")))),
+        "error_handler_count": len(workflow.get("error_handling", [])),
+        "connection_count": len(workflow.get("connections", [])),
+        "implicit_requirement_count": len(ai_analysis.get("implicit_requirements", [])),
+        "ai_enhanced": int(bool(ai_analysis))
+    }
+
+
+def get_counters(agent: Dict[str, Any]) -> Dict[str, int]:
+    """Liczniki zapisane w agencie; dla agentów sprzed liczników - przeliczone i zapisane"""
+    metrics = agent.setdefault("metrics", {})
+    counters = metrics.get("counters")
+    if counters is None:
+        counters = metrics["counters"] = compute_counters(agent)
+    return counters
+
+
+def append_component(agent: Dict[str, Any], component: Dict[str, Any]):
+    """Dopisuje komponent do agenta i aktualizuje liczniki"""
+    counters = get_counters(agent)
+    agent.setdefault("components", []).append(component)
+    counters["component_count"] += 1
+    if component.get("auto_configured"):
+        counters["auto_configured_count"] += 1
+
+
+def intelligence_score(counters: Dict[str, int]) -> int:
+    """Intelligence score po zmianie komponentów"""
+    score = 50
+    score += min(30, counters["component_count"] * 3)
+    score += counters["auto_configured_count"] * 2
+    if counters["ai_enhanced"]:
+        score += 10
+        score += counters["implicit_requirement_count"] * 3
+    return min(100, score)
+
+
+def readiness_score(counters: Dict[str, int]) -> int:
+    """Wskaźnik gotowości do wdrożenia"""
+    score = 30
+    score += min(40, counters["component_count"] * 5)
+    score += counters["auto_configured_count"] * 3
+    if counters["error_handler_count"]:
+        score += 10
+    if counters["connection_count"]:
+        score += 10
+    return min(100, score)
+
+
+def check_counters(agent: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Rozbieżności między zapisanymi licznikami a pełnym przeliczeniem ({} gdy zgodne)"""
+    stored = agent.get("metrics", {}).get("counters")
+    if stored is None:
+        return {}
+    actual = compute_counters(agent)
+    return {field: {"stored": stored.get(field), "actual": actual[field]}
+            for field in COUNTER_FIELDS if stored.get(field) != actual[field]}
@@ -0,0 +1,191 @@
+"""Structural diff between two agents or two revisions of one agent
+
+Zamiast porównywać całe dokumenty, diff dopasowuje części agenta:
+
+* komponenty po ``component_id`` (kolejne wystąpienia tego samego id w kolejności),
+* węzły workflow po typie i pozycji, a pozostałe węzły tego samego typu w kolejności
+  (przesunięty węzeł to zmiana pozycji, nie usunięcie i dodanie),
+* połączenia i obsługę błędów po etykietach węzłów (``typ#n``), więc porównanie
+  dwóch różnych agentów nie zależy od losowych id węzłów,
+* konfiguracje klucz po kluczu (``flatten_dictionary``).
+
+Każde poddrzewo jest najpierw porównywane skrótem - niezmienione komponenty i węzły
+są pomijane bez schodzenia w głąb, więc koszt jest liniowy w rozmiarze agentów,
+a wynik zawiera tylko zmiany.
+"""
+
+import hashlib
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.helpers import flatten_dictionary
+
+# Pola pomijane w porównaniu: identyfikatory i znaczniki czasu (także added_at komponentów) różnią się zawsze
+IGNORED_FIELDS = frozenset({"id", "created_at", "updated_at", "added_at"})
+AGENT_FIELDS = ("name", "description", "domain", "complexity", "status")
+AGENT_SECTIONS = ("configuration", "metrics", "ai_analysis")
+WORKFLOW_PARTS = ("nodes", "connections", "error_handling")
+
+
+def subtree_hash(value: Any) -> bytes:
+    """Skrót poddrzewa niezależny od kolejności kluczy"""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+def _strip(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in item.items() if k not in IGNORED_FIELDS}
+
+
+def diff_values(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Zmiany klucz po kluczu (ścieżki z kropkami): added, removed, changed; None gdy brak zmian"""
+    old_flat = flatten_dictionary(old or {})
+    new_flat = flatten_dictionary(new or {})
+    patch = {
+        "added": {k: v for k, v in new_flat.items() if k not in old_flat},
+        "removed": {k: v for k, v in old_flat.items() if k not in new_flat},
+        "changed": {k: {"from": old_flat[k], "to": v} for k, v in new_flat.items()
+                    if k in old_flat and old_flat[k] != v}
+    }
+    patch = {kind: entries for kind, entries in patch.items() if entries}
+    return patch or None
+
+
+def _pair_items(old: List[Dict[str, Any]], new: List[Dict[str, Any]], keys) -> Tuple[list, list, list]:
+    """Dopasowuje elementy kolejnymi funkcjami klucza; zwraca (pary, usunięte, dodane)"""
+    pairs = []
+    old_left, new_left = list(old), list(new)
+    for key_fn in keys:
+        by_key: Dict[Any, List[Dict[str, Any]]] = {}
+        for item in old_left:
+            by_key.setdefault(key_fn(item), []).append(item)
+        unmatched_new = []
+        for item in new_left:
+            candidates = by_key.get(key_fn(item))
+            if candidates:
+                pairs.append((candidates.pop(0), item))
+            else:
+                unmatched_new.append(item)
+        old_left = [item for items in by_key.values() for item in items]
+        new_left = unmatched_new
+    return pairs, old_left, new_left
+
+
+def _diff_items(old: List[Dict[str, Any]], new: List[Dict[str, Any]], keys,
+                identity) -> Optional[Dict[str, Any]]:
+    """added (pełne elementy), removed (tożsamość) i changed (zmiany kluczy) dla listy elementów"""
+    pairs, removed, added = _pair_items(old, new, keys)
+    changed = []
+    for before, after in pairs:
+        before, after = _strip(before), _strip(after)
+        if subtree_hash(before) == subtree_hash(after):
+            continue
+        changed.append({**identity(before), "changes": diff_values(before, after)})
+    patch = {
+        "added": [_strip(item) for item in added],
+        "removed": [identity(_strip(item)) for item in removed],
+        "changed": changed
+    }
+    patch = {kind: entries for kind, entries in patch.items() if entries}
+    return patch or None
+
+
+def _node_labels(nodes: List[Dict[str, Any]]) -> Dict[Any, str]:
+    """id węzła -> etykieta "typ#n" (n-ty węzeł danego typu według pozycji)"""
+    labels, seen = {}, {}
+    for node in sorted(nodes, key=lambda n: (n.get("position") is None, n.get("position") or 0)):
+        node_type = node.get("type")
+        seen[node_type] = seen.get(node_type, 0) + 1
+        labels[node.get("id")] = f"{node_type}#{seen[node_type]}"
+    return labels
+
+
+def _edge_set(connections: List[Dict[str, Any]], labels: Dict[Any, str]) -> Dict[tuple, Dict[str, Any]]:
+    edges = {}
+    for connection in connections:
+        edge = {"from": labels.get(connection.get("from_node"), connection.get("from_node")),
+                "to": labels.get(connection.get("to_node"), connection.get("to_node")),
+                "type": connection.get("type")}
+        edges[(edge["from"], edge["to"], edge["type"])] = edge
+    return edges
+
+
+def _relabel_handlers(handlers: List[Dict[str, Any]], labels: Dict[Any, str]) -> List[Dict[str, Any]]:
+    return [{**handler, "node_id": labels.get(handler.get("node_id"), handler.get("node_id"))}
+            for handler in handlers]
+
+
+def _diff_workflow(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    patch: Dict[str, Any] = {}
+    fields = diff_values({k: v for k, v in _strip(old).items() if k not in WORKFLOW_PARTS},
+                         {k: v for k, v in _strip(new).items() if k not in WORKFLOW_PARTS})
+    if fields:
+        patch["fields"] = fields
+
+    old_nodes, new_nodes = old.get("nodes", []), new.get("nodes", [])
+    nodes = _diff_items(old_nodes, new_nodes,
+                        keys=(lambda n: (n.get("type"), n.get("position")), lambda n: n.get("type")),
+                        identity=lambda n: {"type": n.get("type"), "position": n.get("position")})
+    if nodes:
+        patch["nodes"] = nodes
+
+    old_labels, new_labels = _node_labels(old_nodes), _node_labels(new_nodes)
+    old_edges = _edge_set(old.get("connections", []), old_labels)
+    new_edges = _edge_set(new.get("connections", []), new_labels)
+    edges = {"added": [edge for key, edge in new_edges.items() if key not in old_edges],
+             "removed": [edge for key, edge in old_edges.items() if key not in new_edges]}
+    edges = {kind: entries for kind, entries in edges.items() if entries}
+    if edges:
+        patch["connections"] = edges
+
+    handlers = _diff_items(_relabel_handlers(old.get("error_handling", []), old_labels),
+                           _relabel_handlers(new.get("error_handling", []), new_labels),
+                           keys=(lambda h: (h.get("type"), h.get("node_id")),),
+                           identity=lambda h: {"type": h.get("type"), "node": h.get("node_id")})
+    if handlers:
+        patch["error_handling"] = handlers
+    return patch or None
+
+
+def diff_agents(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Minimalna łatka między dwoma dokumentami agentów (old -> new)"""
+    patch: Dict[str, Any] = {}
+    fields = {field: {"from": old.get(field), "to": new.get(field)}
+              for field in AGENT_FIELDS if old.get(field) != new.get(field)}
+    if fields:
+        patch["fields"] = fields
+
+    for section in AGENT_SECTIONS:
+        if subtree_hash(old.get(section)) != subtree_hash(new.get(section)):
+            changes = diff_values(old.get(section), new.get(section))
+            if changes:
+                patch[section] = changes
+
+    old_components, new_components = old.get("components", []), new.get("components", [])
+    components = _diff_items(old_components, new_components,
+                             keys=(lambda c: c.get("component_id"),),
+                             identity=lambda c: {"component_id": c.get("component_id"),
+                                                 "position": c.get("position")})
+    if components:
+        patch["components"] = components
+
+    old_workflow, new_workflow = old.get("workflow") or {}, new.get("workflow") or {}
+    if subtree_hash(_strip(old_workflow)) != subtree_hash(_strip(new_workflow)):
+        workflow = _diff_workflow(old_workflow, new_workflow)
+        if workflow:
+            patch["workflow"] = workflow
+
+    nodes = patch.get("workflow", {}).get("nodes", {})
+    edges = patch.get("workflow", {}).get("connections", {})
+    patch["stats"] = {
+        "components_added": len(components.get("added", [])) if components else 0,
+        "components_removed": len(components.get("removed", [])) if components else 0,
+        "components_changed": len(components.get("changed", [])) if components else 0,
+        "nodes_added": len(nodes.get("added", [])),
+        "nodes_removed": len(nodes.get("removed", [])),
+        "nodes_changed": len(nodes.get("changed", [])),
+        "connections_added": len(edges.get("added", [])),
+        "connections_removed": len(edges.get("removed", []))
+    }
+    patch["identical"] = len(patch) == 1
+    return patch
@@ -0,0 +1,176 @@
+"""Secondary indexes and pre-sorted views over agent summaries"""
+
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+# SQLite COLLATE NOCASE składa tylko litery ASCII - str.lower() dałby inną kolejność dla "É"/"é"
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# Dostępne sortowania: nazwa -> (klucz sortowania, czy iterować od końca)
+SORT_OPTIONS: Dict[str, Tuple[Callable[[Dict[str, Any]], tuple], bool]] = {
+    "intelligence": (lambda s: (-(s["intelligence_score"] or 0), -(s["confidence_score"] or 0), s["id"]), False),
+    "readiness": (lambda s: (-(s["readiness_score"] or 0), -(s["intelligence_score"] or 0), s["id"]), False),
+    "created": (lambda s: (s["created_at"] or "", s["id"]), True),
+    "name": (lambda s: ((s["name"] or "").translate(_ASCII_LOWER), s["id"]), False),
+}
+
+# Pola skrótu, z których budowany jest klucz sortowania (zapisywane w kursorze)
+SORT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "intelligence": ("intelligence_score", "confidence_score", "id"),
+    "readiness": ("readiness_score", "intelligence_score", "id"),
+    "created": ("created_at", "id"),
+    "name": ("name", "id"),
+}
+
+
+class SortedIndex:
+    """Posortowana lista kluczy utrzymywana przez bisect"""
+
+    __slots__ = ("keys",)
+
+    def __init__(self):
+        self.keys: List[tuple] = []
+
+    def add(self, key: tuple):
+        insort(self.keys, key)
+
+    def remove(self, key: tuple):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def slice(self, offset: int, limit: Optional[int], reverse: bool,
+              after: Optional[tuple] = None) -> List[tuple]:
+        """Klucze od pozycji offset (w kolejności listingu) - O(log n + k).
+
+        Gdy podano after, listing zaczyna się za tym kluczem (paginacja kursorem),
+        więc wstawienia i usunięcia między stronami nie przesuwają wyników.
+        """
+        n = len(self.keys)
+        if not reverse:
+            start = offset if after is None else bisect_right(self.keys, after) + offset
+            end = n if limit is None else min(n, start + limit)
+            return self.keys[start:end]
+        stop = n - offset if after is None else bisect_left(self.keys, after) - offset
+        start = 0 if limit is None else max(0, stop - limit)
+        return self.keys[start:max(stop, 0)][::-1]
+
+
+class _Bucket:
+    """Agenci jednej kombinacji filtrów: sortowane widoki i agregaty"""
+
+    __slots__ = ("views", "ai_enhanced", "intelligence_sum")
+
+    def __init__(self):
+        self.views = {name: SortedIndex() for name in SORT_OPTIONS}
+        self.ai_enhanced = 0
+        self.intelligence_sum = 0
+
+
+class AgentIndex:
+    """Indeksy po domenie i statusie z widokami posortowanymi po score, dacie i nazwie.
+
+    Każda kombinacja filtrów (wszystkie / domena / status / domena+status) ma własne
+    posortowane widoki, więc filtrowany i sortowany listing kosztuje O(log n + k).
+    """
+
+    def __init__(self):
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[Tuple[Optional[str], Optional[str]], _Bucket] = {}
+
+    @staticmethod
+    def _bucket_keys(summary: Dict[str, Any]):
+        domain, status = summary["domain"], summary["status"]
+        return ((None, None), (domain, None), (None, status), (domain, status))
+
+    def _apply(self, summary: Dict[str, Any], sign: int):
+        for bucket_key in self._bucket_keys(summary):
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = _Bucket()
+            for name, (key_fn, _) in SORT_OPTIONS.items():
+                if sign > 0:
+                    bucket.views[name].add(key_fn(summary))
+                else:
+                    bucket.views[name].remove(key_fn(summary))
+            bucket.ai_enhanced += sign * int(bool(summary["ai_enhanced"]))
+            bucket.intelligence_sum += sign * (summary["intelligence_score"] or 0)
+            if sign < 0 and not len(bucket.views["created"]):
+                del self._buckets[bucket_key]
+
+    def upsert(self, summary: Dict[str, Any]):
+        """Dodaje lub aktualizuje skrót agenta we wszystkich indeksach"""
+        old = self._summaries.get(summary["id"])
+        if old == summary:
+            return
+        if old is not None:
+            self._apply(old, -1)
+        self._summaries[summary["id"]] = summary
+        self._apply(summary, 1)
+
+    def remove(self, agent_id: str) -> bool:
+        old = self._summaries.pop(agent_id, None)
+        if old is None:
+            return False
+        self._apply(old, -1)
+        return True
+
+    def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        return self._summaries.get(agent_id)
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def query(self, domain: Optional[str] = None, status: Optional[str] = None,
+              sort_by: str = "intelligence", offset: int = 0,
+              limit: Optional[int] = None, after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Filtrowany i posortowany listing skrótów wraz z agregatami.
+
+        after to pola SORT_FIELDS ostatniego agenta poprzedniej strony.
+        """
+        key_fn, reverse = SORT_OPTIONS[sort_by]
+        bucket = self._buckets.get((domain or None, status or None))
+        if bucket is None:
+            return {"agents": [], "total": 0, "ai_enhanced": 0, "intelligence_sum": 0}
+
+        after_key = key_fn(after) if after is not None else None
+        keys = bucket.views[sort_by].slice(offset, limit, reverse, after_key)
+        return {
+            # Ostatni element każdego klucza sortowania to id agenta
+            "agents": [self._summaries[key[-1]] for key in keys],
+            "total": len(bucket.views[sort_by]),
+            "ai_enhanced": bucket.ai_enhanced,
+            "intelligence_sum": bucket.intelligence_sum
+        }
+
+
+def encode_cursor(sort_by: str, domain: Optional[str], status: Optional[str],
+                  summary: Dict[str, Any]) -> str:
+    """Nieprzezroczysty kursor: filtry, sortowanie i klucz ostatniego zwróconego agenta"""
+    payload = {
+        "s": sort_by,
+        "d": domain,
+        "t": status,
+        "k": {field: summary[field] for field in SORT_FIELDS[sort_by]}
+    }
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Odczytuje kursor; ValueError gdy jest uszkodzony"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        sort_by = payload["s"]
+        after = payload["k"]
+        if sort_by not in SORT_OPTIONS or set(after) != set(SORT_FIELDS[sort_by]):
+            raise ValueError
+    except (ValueError, KeyError, TypeError, UnicodeDecodeError, AttributeError):
+        raise ValueError("Invalid pagination cursor")
+    return {"sort_by": sort_by, "domain": payload.get("d"), "status": payload.get("t"), "after": after}
@@ -0,0 +1,200 @@
+"""Compact in-memory agent records
+
+Agent przechowywany jako zagnieżdżony słownik powtarza w każdym komponencie
+i węźle te same klucze oraz wartości ("auto_configured", nazwa domeny, długie
+system prompty), a każde id to 36-znakowy string. Rekordy poniżej używają
+``__slots__``, internują powtarzające się stringi, trzymają identyfikatory
+(base32 z ``utils.ids`` i dawne UUID) jako 16 bajtów i współdzielą identyczne słowniki konfiguracji między komponentami i agentami.
+Kształt JSON (dict) powstaje dopiero na granicy - w ``to_dict()``.
+"""
+
+import hashlib
+import json
+import sys
+import uuid
+import weakref
+from typing import Dict, Any, Optional, Tuple
+
+from utils.ids import decode_id, encode_id, is_time_ordered
+
+_ABSENT = object()
+_ID_FIELDS = frozenset({"id", "from_node", "to_node"})
+_SHARED_LIST_FIELDS = frozenset({"ai_analysis"})
+
+
+def pack_id(value: Any) -> Any:
+    """Identyfikator (base32 lub kanoniczny UUID) jako 16 bajtów; inne wartości bez zmian (internowane)"""
+    if isinstance(value, str) and len(value) in (26, 36):
+        raw = decode_id(value)
+        if raw is not None and unpack_id(raw) == value:
+            return raw
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def unpack_id(value: Any) -> Any:
+    """16 bajtów -> base32 dla identyfikatorów UUIDv7, kanoniczny UUID dla dawnych"""
+    if isinstance(value, bytes) and len(value) == 16:
+        return encode_id(value) if is_time_ordered(value) else str(uuid.UUID(bytes=value))
+    return value
+
+
+def _intern_value(value: Any) -> Any:
+    """Internuje stringi (także klucze) w zagnieżdżonych strukturach"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k) if isinstance(k, str) else k: _intern_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern_value(v) for v in value]
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Świeża kopia struktury dla wywołującego - rekordy nie udostępniają swoich słowników"""
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class _SharedConfig(dict):
+    """Słownik konfiguracji współdzielony przez rekordy - traktowany jako niezmienny"""
+
+    __slots__ = ("__weakref__",)
+
+
+class ConfigPool:
+    """Pula identycznych konfiguracji (i innych niezmiennych słowników); wpis znika, gdy nie używa go żaden rekord"""
+
+    def __init__(self):
+        self._configs: "weakref.WeakValueDictionary[bytes, _SharedConfig]" = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def share(self, config: Any) -> Any:
+        if not isinstance(config, dict):
+            return _intern_value(config)
+        try:
+            canonical = json.dumps(config, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return _intern_value(config)
+        key = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+        shared = self._configs.get(key)
+        if shared is not None and shared == config:
+            self.hits += 1
+            return shared
+        self.misses += 1
+        shared = _SharedConfig(_intern_value(config))
+        self._configs[key] = shared
+        return shared
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"shared_configs": len(self._configs), "hits": self.hits, "misses": self.misses}
+
+
+class _Record:
+    """Wspólna logika: znane pola w slotach, pozostałe klucze w extra.
+
+    previous (poprzednia rewizja tego samego rekordu) pozwala współdzielić
+    niezmienione wartości i rekordy potomne zamiast budować je od nowa.
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+    CHILDREN: Dict[str, type] = {}
+
+    def __init__(self, data: Dict[str, Any], pool: ConfigPool, previous: Optional["_Record"] = None):
+        for field in self.FIELDS:
+            value = data.get(field, _ABSENT)
+            if value is not _ABSENT:
+                prior = getattr(previous, field) if previous is not None else _ABSENT
+                value = self._pack(field, value, pool, prior)
+            setattr(self, field, value)
+        extra = {sys.intern(k): _intern_value(v) for k, v in data.items() if k not in self.FIELDS}
+        if previous is not None and previous.extra == (extra or None):
+            extra = previous.extra
+        self.extra = extra or None
+
+    @classmethod
+    def build(cls, data: Dict[str, Any], pool: ConfigPool, previous: Optional["_Record"] = None) -> "_Record":
+        """Rekord dla data; niezmieniona poprzednia rewizja jest zwracana bez kopiowania"""
+        if previous is not None and previous.to_dict() == data:
+            return previous
+        return cls(data, pool, previous)
+
+    def _pack(self, field: str, value: Any, pool: ConfigPool, prior: Any = _ABSENT) -> Any:
+        child = self.CHILDREN.get(field)
+        if child is not None:
+            if isinstance(value, list) and all(isinstance(v, dict) for v in value):
+                # Potomkowie dopasowani do poprzedniej rewizji po id
+                prior_children = {c.id: c for c in prior if c.id is not _ABSENT} if isinstance(prior, tuple) else {}
+                return tuple(child.build(v, pool, prior_children.get(pack_id(v.get("id")))) for v in value)
+            if isinstance(value, dict):
+                return child.build(value, pool, prior if isinstance(prior, _Record) else None)
+            return _intern_value(value)
+        if prior is not _ABSENT and self._export(field, prior) == value:
+            return prior
+        if field in _ID_FIELDS:
+            return pack_id(value)
+        if field == "configuration":
+            return pool.share(value)
+        if field in _SHARED_LIST_FIELDS and isinstance(value, dict):
+            # Elementy list analizy (wymagania, sugestie) powtarzają się między agentami
+            return {sys.intern(k): [pool.share(v) for v in items] if isinstance(items, list) else _intern_value(items)
+                    for k, items in value.items()}
+        return _intern_value(value)
+
+    def _export(self, field: str, value: Any) -> Any:
+        if isinstance(value, _Record):
+            return value.to_dict()
+        if isinstance(value, tuple) and field in self.CHILDREN:
+            return [v.to_dict() for v in value]
+        if field in _ID_FIELDS:
+            return unpack_id(value)
+        return _thaw(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not _ABSENT:
+                result[field] = self._export(field, value)
+        if self.extra:
+            result.update(_thaw(self.extra))
+        return result
+
+
+class ComponentRecord(_Record):
+    FIELDS = ("id", "component_id", "name", "reason", "confidence", "auto_added",
+              "position", "configuration", "auto_configured")
+    __slots__ = FIELDS + ("extra",)
+
+
+class WorkflowNodeRecord(_Record):
+    FIELDS = ("id", "type", "name", "position", "configuration", "auto_configured", "execution_order")
+    __slots__ = FIELDS + ("extra",)
+
+
+class ConnectionRecord(_Record):
+    FIELDS = ("id", "from_node", "to_node", "type", "auto_generated")
+    __slots__ = FIELDS + ("extra",)
+
+
+class WorkflowRecord(_Record):
+    FIELDS = ("id", "name", "description", "nodes", "connections")
+    __slots__ = FIELDS + ("extra",)
+    CHILDREN = {"nodes": WorkflowNodeRecord, "connections": ConnectionRecord}
+
+
+class AgentRecord(_Record):
+    FIELDS = ("id", "name", "description", "domain", "complexity", "status", "created_at",
+              "updated_at", "components", "workflow", "configuration", "ai_analysis", "metrics")
+    __slots__ = FIELDS + ("extra",)
+    CHILDREN = {"components": ComponentRecord, "workflow": WorkflowRecord}
+
+    @classmethod
+    def from_dict(cls, agent: Dict[str, Any], pool: Optional[ConfigPool] = None,
+                  previous: Optional["AgentRecord"] = None) -> "AgentRecord":
+        """Rekord agenta; z previous współdzieli z poprzednią rewizją wszystko, co się nie zmieniło"""
+        return cls(agent, pool if pool is not None else ConfigPool(), previous)
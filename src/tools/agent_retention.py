@@ -0,0 +1,134 @@
+"""Memory budget and TTL for draft agents held in memory
+
+Szkice (status "draft", bez uruchomionych testów) to większość agentów, których
+nikt już nie otworzy. Magazyn w pamięci śledzi szacowany rozmiar każdego agenta
+i ostatni dostęp do szkiców (get/put - także przez get_agent i test_agent).
+Szkic nieużywany dłużej niż TTL oraz najdawniej używane szkice ponad budżet
+pamięci są usuwane z RAM - albo przenoszone do magazynu trwałego (spill), skąd
+wracają przy następnym odczycie. Agenci przetestowani nigdy nie są usuwani.
+Polityka działa po każdym zapisie, po przywróceniu szkicu ze spill i okresowo
+w tle (``sweep_interval``), więc TTL działa także na serwerze, który tylko czyta.
+
+Konfiguracja: ``AGENT_MEMORY_BUDGET_MB`` i ``AGENT_DRAFT_TTL_SECONDS``
+(bez nich polityka jest wyłączona), ``AGENT_SPILL_PATH`` - plik SQLite na szkice.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_SWEEP_INTERVAL = 30.0
+
+
+def estimate_agent_bytes(agent: Dict[str, Any]) -> int:
+    """Szacowany rozmiar agenta: długość zserializowanego dokumentu"""
+    return len(json.dumps(agent, ensure_ascii=False, separators=(",", ":"), default=str))
+
+
+class RetentionPolicy:
+    """Budżet pamięci (bajty) i TTL nieaktywnych szkiców (sekundy); None wyłącza dany limit.
+
+    sweep_interval - co ile sekund polityka jest stosowana w tle (domyślnie
+    DEFAULT_SWEEP_INTERVAL, przy krótszym TTL - połowa TTL).
+    """
+
+    def __init__(self, max_resident_bytes: Optional[int] = None, draft_ttl: Optional[float] = None,
+                 sweep_interval: Optional[float] = None):
+        self.max_resident_bytes = max_resident_bytes
+        self.draft_ttl = draft_ttl
+        if sweep_interval is None:
+            sweep_interval = min(DEFAULT_SWEEP_INTERVAL, draft_ttl / 2) if draft_ttl else DEFAULT_SWEEP_INTERVAL
+        self.sweep_interval = max(0.01, sweep_interval)
+
+    @classmethod
+    def from_env(cls) -> Optional["RetentionPolicy"]:
+        budget_mb = os.environ.get("AGENT_MEMORY_BUDGET_MB")
+        ttl = os.environ.get("AGENT_DRAFT_TTL_SECONDS")
+        if not budget_mb and not ttl:
+            return None
+        return cls(max_resident_bytes=int(float(budget_mb) * 1024 * 1024) if budget_mb else None,
+                   draft_ttl=float(ttl) if ttl else None)
+
+    @staticmethod
+    def is_evictable(agent: Dict[str, Any]) -> bool:
+        """Szkic, którego nikt nie testował"""
+        return agent.get("status") == "draft" and not agent.get("metrics", {}).get("test_runs")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"max_resident_bytes": self.max_resident_bytes, "draft_ttl_seconds": self.draft_ttl,
+                "sweep_interval_seconds": self.sweep_interval}
+
+
+class ResidencyTracker:
+    """Rozmiary agentów w pamięci i kolejka LRU szkiców"""
+
+    def __init__(self, policy: RetentionPolicy):
+        self.policy = policy
+        self._sizes: Dict[str, int] = {}
+        self.resident_bytes = 0
+        # agent_id -> czas ostatniego dostępu (monotoniczny), od najdawniej używanego
+        self._drafts: "OrderedDict[str, float]" = OrderedDict()
+        self.evictions = 0
+        self.expired = 0
+        self.spilled = 0
+        self.restored = 0
+
+    def record(self, agent: Dict[str, Any]):
+        """Zapis agenta: nowy rozmiar i - dla szkicu - dostęp"""
+        agent_id = agent["id"]
+        size = estimate_agent_bytes(agent)
+        self.resident_bytes += size - self._sizes.get(agent_id, 0)
+        self._sizes[agent_id] = size
+        if self.policy.is_evictable(agent):
+            self._drafts[agent_id] = time.monotonic()
+            self._drafts.move_to_end(agent_id)
+        else:
+            self._drafts.pop(agent_id, None)
+
+    def touch(self, agent_id: str):
+        if agent_id in self._drafts:
+            self._drafts[agent_id] = time.monotonic()
+            self._drafts.move_to_end(agent_id)
+
+    def forget(self, agent_id: str):
+        self.resident_bytes -= self._sizes.pop(agent_id, 0)
+        self._drafts.pop(agent_id, None)
+
+    def select_evictions(self, now: Optional[float] = None) -> List[Tuple[str, bool]]:
+        """(agent_id, po TTL?) szkiców do usunięcia: po TTL, a potem najdawniej używane ponad budżet.
+
+        Liczniki evictions/expired zwiększa wywołujący - dopiero gdy szkic faktycznie opuści pamięć.
+        """
+        now = time.monotonic() if now is None else now
+        selected = []
+        ttl = self.policy.draft_ttl
+        if ttl is not None:
+            for agent_id, last_access in self._drafts.items():
+                if now - last_access < ttl:
+                    break  # kolejka jest uporządkowana po czasie dostępu
+                selected.append((agent_id, True))
+
+        budget = self.policy.max_resident_bytes
+        if budget is not None:
+            remaining = self.resident_bytes - sum(self._sizes[agent_id] for agent_id, _ in selected)
+            if remaining > budget:
+                for agent_id in list(self._drafts)[len(selected):]:
+                    if remaining <= budget:
+                        break
+                    selected.append((agent_id, False))
+                    remaining -= self._sizes[agent_id]
+        return selected
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.policy.to_dict(),
+            "resident_agents": len(self._sizes),
+            "resident_bytes": self.resident_bytes,
+            "resident_drafts": len(self._drafts),
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "spilled": self.spilled,
+            "restored": self.restored
+        }
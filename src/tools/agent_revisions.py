@@ -0,0 +1,74 @@
+"""Agent revision history built on shared compact records
+
+Każdy zapis agenta to nowa, niezmienna rewizja (AgentRecord). Rekord rewizji
+powstaje z poprzedniej (``AgentRecord.from_dict(..., previous=...)``), więc
+niezmienione komponenty, węzły, połączenia i konfiguracje są tymi samymi
+obiektami we wszystkich rewizjach - dodanie komponentu kosztuje jeden nowy
+rekord komponentu i nową krotkę wskaźników, a nie głęboką kopię agenta.
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+DEFAULT_MAX_REVISIONS = 100
+
+
+class AgentRevision:
+    __slots__ = ("version", "record", "event", "created_at")
+
+    def __init__(self, version: int, record: Any, event: str, created_at: str):
+        self.version = version
+        self.record = record
+        self.event = event
+        self.created_at = created_at
+
+    def summary(self) -> Dict[str, Any]:
+        if isinstance(self.record, dict):
+            components = self.record.get("components", [])
+        else:
+            components = getattr(self.record, "components", ())
+        return {
+            "version": self.version,
+            "event": self.event,
+            "created_at": self.created_at,
+            "component_count": len(components) if isinstance(components, (tuple, list)) else 0
+        }
+
+
+class RevisionHistory:
+    """Ostatnie max_revisions rewizji jednego agenta; numery rosną monotonicznie od 1"""
+
+    __slots__ = ("_revisions",)
+
+    def __init__(self, max_revisions: int = DEFAULT_MAX_REVISIONS):
+        self._revisions: "deque[AgentRevision]" = deque(maxlen=max(1, max_revisions))
+
+    @property
+    def latest(self) -> AgentRevision:
+        return self._revisions[-1]
+
+    def commit(self, record: Any, event: str = "put", version: Optional[int] = None) -> int:
+        """Dodaje rewizję; version podaje się tylko przy odtwarzaniu zapisanej historii"""
+        if version is None:
+            version = self._revisions[-1].version + 1 if self._revisions else 1
+        elif self._revisions and version != self._revisions[-1].version + 1:
+            # Luka w numeracji (np. start od snapshotu) - starsze rewizje nie są już ciągłe
+            self._revisions.clear()
+        self._revisions.append(AgentRevision(version, record, event, datetime.now().isoformat()))
+        return version
+
+    def get(self, version: int) -> Optional[AgentRevision]:
+        if not self._revisions:
+            return None
+        # Numery są ciągłe - pozycja wynika z numeru najstarszej zachowanej rewizji
+        index = version - self._revisions[0].version
+        if 0 <= index < len(self._revisions):
+            return self._revisions[index]
+        return None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        return [revision.summary() for revision in self._revisions]
+
+    def __len__(self) -> int:
+        return len(self._revisions)
@@ -0,0 +1,255 @@
+"""Full-text and similarity search over stored agents
+
+Indeks jest utrzymywany przyrostowo przy każdym zapisie i usunięciu agenta:
+
+* listy postingów: token -> {agent_id: waga}, gdzie waga sumuje wystąpienia
+  w nazwie, domenie, identyfikatorach komponentów i opisie (z wagami pól),
+  a wynik zapytania to suma idf * waga - koszt zależy od długości list
+  postingów tokenów zapytania, a nie od liczby agentów (częste tokeny,
+  obecne u ponad 5% agentów, tylko zmieniają wynik agentów znalezionych przez
+  rzadsze tokeny zapytania);
+* sygnatury MinHash zbioru cech agenta (tokeny nazwy i opisu, domena,
+  komponenty) pogrupowane w pasma LSH - kandydaci do find_similar to agenci
+  dzielący z danym co najmniej jedno pasmo, a dokładne podobieństwo Jaccarda
+  jest liczone tylko dla tych z największą liczbą wspólnych pasm.
+"""
+
+import hashlib
+import heapq
+import math
+import re
+import struct
+from functools import lru_cache
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# Wagi pól w wyniku wyszukiwania
+FIELD_WEIGHTS = {"name": 3.0, "domain": 2.0, "components": 1.5, "description": 1.0}
+
+MINHASH_BANDS = 32
+MINHASH_ROWS = 3
+MINHASH_PERMUTATIONS = MINHASH_BANDS * MINHASH_ROWS
+DEFAULT_MIN_SIMILARITY = 0.3
+
+# Rozwinięcie prefiksu ostatniego tokenu zapytania ("supp" -> support, supplier...)
+MAX_PREFIX_EXPANSIONS = 20
+
+# Token obecny u ponad tej części agentów jest "częsty": tylko zmienia wynik agentów
+# znalezionych przez rzadsze tokeny zapytania, zamiast przeglądać całą listę postingów
+COMMON_TOKEN_FRACTION = 0.05
+
+# find_similar liczy dokładny Jaccard tylko dla kandydatów z największą liczbą wspólnych pasm
+SIMILAR_CANDIDATES_PER_RESULT = 5
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset({
+    "a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "that", "from", "by", "or", "is",
+    "i", "w", "z", "na", "do", "dla", "oraz", "ze", "się", "jest", "to", "o", "po", "od"
+})
+
+# Funkcje haszujące MinHash: każdy 64-bajtowy skrót blake2b (inna sól) daje 16 wartości 32-bitowych.
+# Sole są stałe, więc sygnatury są powtarzalne między procesami i restartami.
+_HASH_SALTS = tuple(f"minhash-{i}".encode() for i in range(MINHASH_PERMUTATIONS // 16))
+_HASH_LAYOUT = struct.Struct(f"<{MINHASH_PERMUTATIONS}I")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tokeny tekstu: małe litery, bez stopwords i pojedynczych znaków"""
+    if not text:
+        return []
+    return [sys.intern(token) for token in _TOKEN_PATTERN.findall(text.lower())
+            if len(token) > 1 and token not in _STOPWORDS]
+
+
+def _component_tokens(component_id: str) -> List[str]:
+    """Identyfikator komponentu jako całość i jego części ("pollinations_llm" -> + pollinations, llm)"""
+    tokens = tokenize(component_id)
+    parts = [part for token in tokens for part in token.split("_") if len(part) > 1 and part != token]
+    return tokens + [sys.intern(part) for part in parts]
+
+
+def agent_terms(agent: Dict[str, Any]) -> Dict[str, float]:
+    """Ważone tokeny agenta do list postingów"""
+    terms: Dict[str, float] = {}
+    fields = (
+        ("name", tokenize(agent.get("name"))),
+        ("domain", tokenize(agent.get("domain"))),
+        ("components", [token for component in agent.get("components", [])
+                        for token in _component_tokens(str(component.get("component_id", "")))]),
+        ("description", tokenize(agent.get("description")))
+    )
+    for field, tokens in fields:
+        weight = FIELD_WEIGHTS[field]
+        for token in tokens:
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+def agent_features(agent: Dict[str, Any]) -> frozenset:
+    """Zbiór cech agenta do podobieństwa Jaccarda (MinHash)"""
+    features: Set[str] = set(tokenize(agent.get("name")))
+    features.update(tokenize(agent.get("description")))
+    if agent.get("domain"):
+        features.add(sys.intern(f"domain:{agent['domain']}"))
+    for component in agent.get("components", []):
+        features.add(sys.intern(f"component:{component.get('component_id')}"))
+    return frozenset(features)
+
+
+@lru_cache(maxsize=4096)  # częste tokeny i komponenty powtarzają się u wielu agentów
+def _feature_hashes(feature: str) -> Tuple[int, ...]:
+    data = feature.encode("utf-8")
+    return _HASH_LAYOUT.unpack(b"".join(hashlib.blake2b(data, digest_size=64, salt=salt).digest()
+                                        for salt in _HASH_SALTS))
+
+
+def minhash_signature(features: frozenset) -> Tuple[int, ...]:
+    """Sygnatura MinHash: minimum każdej z funkcji haszujących po cechach"""
+    if not features:
+        return ()
+    return tuple(map(min, zip(*map(_feature_hashes, features))))
+
+
+def _bands(signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    """(numer pasma, hash pasma) - klucze kubełków LSH"""
+    if not signature:
+        return []
+    return [(band, hash(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+            for band in range(MINHASH_BANDS)]
+
+
+class _Entry:
+    __slots__ = ("terms", "features", "bands", "domain")
+
+    def __init__(self, terms: Dict[str, float], features: frozenset, bands: List[Tuple[int, int]],
+                 domain: Optional[str]):
+        self.terms = terms
+        self.features = features
+        self.bands = bands
+        self.domain = domain
+
+
+class AgentSearchIndex:
+    """Odwrócony indeks tokenów i indeks LSH sygnatur MinHash, aktualizowane przy każdej zmianie agenta"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []  # posortowane tokeny - rozwijanie prefiksów przez bisect
+        self._buckets: Dict[Tuple[int, int], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, agent: Dict[str, Any]):
+        """Dodaje lub aktualizuje agenta w indeksie"""
+        agent_id = agent["id"]
+        terms = agent_terms(agent)
+        features = agent_features(agent)
+        old = self._entries.get(agent_id)
+        if old is not None:
+            if old.terms == terms and old.features == features and old.domain == agent.get("domain"):
+                return  # np. test_agent - zmienia status, nie treść
+            self.remove(agent_id)
+
+        entry = _Entry(terms, features, _bands(minhash_signature(features)), agent.get("domain"))
+        self._entries[agent_id] = entry
+        for token, weight in terms.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocabulary, token)
+            postings[agent_id] = weight
+        for band in entry.bands:
+            self._buckets.setdefault(band, set()).add(agent_id)
+
+    def remove(self, agent_id: str) -> bool:
+        entry = self._entries.pop(agent_id, None)
+        if entry is None:
+            return False
+        for token in entry.terms:
+            postings = self._postings[token]
+            del postings[agent_id]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+        for band in entry.bands:
+            bucket = self._buckets[band]
+            bucket.discard(agent_id)
+            if not bucket:
+                del self._buckets[band]
+        return True
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        expanded = []
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            expanded.append(token)
+        return expanded
+
+    def search(self, query: str, domain: Optional[str] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """(agent_id, wynik) najlepiej pasujących agentów; ostatni token zapytania działa też jako prefiks"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        if tokens[-1] not in self._postings:
+            last = tokens.pop()
+            tokens.extend(self._expand_prefix(last))
+
+        total = len(self._entries)
+        posting_lists = [self._postings[token] for token in tokens if token in self._postings]
+        rare = [postings for postings in posting_lists if len(postings) <= COMMON_TOKEN_FRACTION * total]
+        common = [postings for postings in posting_lists if len(postings) > COMMON_TOKEN_FRACTION * total]
+
+        scores: Dict[str, float] = {}
+        for postings in rare or common:
+            idf = math.log(1 + total / len(postings))
+            for agent_id, weight in postings.items():
+                scores[agent_id] = scores.get(agent_id, 0.0) + idf * weight
+        if rare:
+            # Częste tokeny tylko podbijają wynik agentów znalezionych przez rzadsze
+            for postings in common:
+                idf = math.log(1 + total / len(postings))
+                for agent_id in scores:
+                    weight = postings.get(agent_id)
+                    if weight:
+                        scores[agent_id] += idf * weight
+
+        if domain:
+            scores = {agent_id: score for agent_id, score in scores.items()
+                      if self._entries[agent_id].domain == domain}
+        best = heapq.nsmallest(max(0, limit), scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(agent_id, round(score, 4)) for agent_id, score in best]
+
+    def find_similar(self, agent_id: str, limit: int = 10,
+                     min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[List[Tuple[str, float]]]:
+        """(agent_id, podobieństwo Jaccarda) agentów podobnych do danego; None gdy agenta nie ma w indeksie"""
+        entry = self._entries.get(agent_id)
+        if entry is None:
+            return None
+        shared_bands: Counter = Counter()
+        for band in entry.bands:
+            shared_bands.update(self._buckets.get(band, ()))
+        del shared_bands[agent_id]
+
+        # Liczba wspólnych pasm rośnie z podobieństwem - dokładnie liczymy tylko najlepszych kandydatów
+        similar = []
+        for candidate_id, _ in shared_bands.most_common(max(1, limit) * SIMILAR_CANDIDATES_PER_RESULT):
+            features = self._entries[candidate_id].features
+            similarity = len(entry.features & features) / len(entry.features | features)
+            if similarity >= min_similarity:
+                similar.append((candidate_id, round(similarity, 4)))
+        similar.sort(key=lambda item: (-item[1], item[0]))
+        return similar[:max(0, limit)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "agents": len(self._entries),
+            "tokens": len(self._postings),
+            "lsh_buckets": len(self._buckets),
+            "minhash_permutations": MINHASH_PERMUTATIONS
+        }
@@ -0,0 +1,708 @@
+"""Agent storage backends: in-memory dict and indexed SQLite"""
+
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from .agent_index import AgentIndex
+from .agent_records import AgentRecord, ConfigPool
+from .agent_revisions import RevisionHistory, DEFAULT_MAX_REVISIONS
+from .agent_search import AgentSearchIndex, DEFAULT_MIN_SIMILARITY
+from .agent_retention import RetentionPolicy, ResidencyTracker
+
+
+def agent_summary(agent: Dict[str, Any]) -> Dict[str, Any]:
+    """Skrót agenta używany w listach - tylko gorące pola"""
+    description = agent.get("description", "")
+    ai_analysis = agent.get("ai_analysis", {})
+    metrics = agent.get("metrics", {})
+    return {
+        "id": agent.get("id"),
+        "name": agent.get("name"),
+        "description": (description[:100] + "...") if len(description) > 100 else description,
+        "domain": agent.get("domain"),
+        "status": agent.get("status"),
+        "created_at": agent.get("created_at"),
+        "component_count": len(agent.get("components", [])),
+        "intelligence_score": metrics.get("intelligence_score", 0),
+        "readiness_score": metrics.get("readiness_score", 0),
+        "confidence_score": ai_analysis.get("confidence_score", 0),
+        "ai_enhanced": len(ai_analysis) > 0
+    }
+
+
+class VersionConflictError(Exception):
+    """put() z expected_version, gdy agent ma już inną rewizję"""
+
+    def __init__(self, agent_id: str, expected_version: Optional[int], current_version: Optional[int]):
+        super().__init__(f"Agent {agent_id} is at version {current_version}, expected {expected_version}")
+        self.agent_id = agent_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def version_tag(version: Optional[int]) -> Optional[str]:
+    """Znacznik wersji agenta zwracany klientom (if_none_match / if_match)"""
+    return f"v{version}" if version is not None else None
+
+
+def parse_version_tag(tag: Any) -> Optional[int]:
+    """Numer rewizji ze znacznika ("v3", "3" lub 3); None dla nieprawidłowego znacznika"""
+    if isinstance(tag, int):
+        return tag
+    if isinstance(tag, str):
+        tag = tag.strip().strip('"')
+        digits = tag[1:] if tag[:1] in ("v", "V") else tag
+        if digits.isdigit():
+            return int(digits)
+    return None
+
+
+class MutationLock:
+    """Blokada zmian magazynu (asyncio), którą zadanie już ją trzymające może wziąć ponownie.
+
+    Manager trzyma ją przez całą sekcję get -> zmiana -> put/delete, a put()/delete()
+    magazynu wywołane wewnątrz tej sekcji nie czekają same na siebie.
+    """
+
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+        self._owner = None
+        self.acquisitions = 0
+        self.contended = 0
+
+    @contextlib.asynccontextmanager
+    async def hold(self):
+        task = asyncio.current_task()
+        if task is not None and self._owner is task:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio.Lock jest związany z pętlą zdarzeń (np. kolejne asyncio.run w testach)
+            self._lock, self._loop = asyncio.Lock(), loop
+        if self._lock.locked():
+            self.contended += 1
+        async with self._lock:
+            self._owner = task
+            self.acquisitions += 1
+            try:
+                yield
+            finally:
+                self._owner = None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"acquisitions": self.acquisitions, "contended": self.contended}
+
+
+class AgentStore:
+    """Interfejs magazynu agentów.
+
+    get() zwraca dokument agenta; po każdej zmianie dokumentu wywołujący
+    musi go zapisać przez put(), niezależnie od backendu. event nazywa zmianę
+    (create, add_component, test...) dla backendów prowadzących historię.
+    persistent - agenci przetrwają close() i ponowne otwarcie magazynu.
+    """
+
+    persistent = False
+
+    async def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def put(self, agent: Dict[str, Any], event: str = "put",
+                  expected_version: Optional[int] = None) -> int:
+        """Zapisuje nową rewizję i zwraca jej numer.
+
+        expected_version (optymistyczna współbieżność) - zapis tylko wtedy, gdy bieżąca
+        rewizja agenta ma ten numer; w przeciwnym razie VersionConflictError.
+        """
+        raise NotImplementedError
+
+    async def delete(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        raise NotImplementedError
+
+    async def contains(self, agent_id: str) -> bool:
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def get_version(self, agent_id: str) -> Optional[int]:
+        """Numer bieżącej rewizji agenta (rośnie przy każdym put) lub None"""
+        raise NotImplementedError
+
+    async def get_revision(self, agent_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Dokument agenta w danej rewizji lub None, gdy rewizja nie jest przechowywana"""
+        raise NotImplementedError
+
+    async def list_revisions(self, agent_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Przechowywane rewizje agenta (version, event, created_at, component_count) lub None"""
+        raise NotImplementedError
+
+    async def list_summaries(self, domain: Optional[str] = None, status: Optional[str] = None,
+                             sort_by: str = "intelligence", offset: int = 0,
+                             limit: Optional[int] = None, after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Posortowane skróty agentów spełniających filtry.
+
+        Zwraca {"agents", "total", "ai_enhanced", "intelligence_sum"}, gdzie agregaty
+        dotyczą wszystkich pasujących agentów, a nie tylko zwróconej strony.
+        after (pola SORT_FIELDS ostatniego agenta) rozpoczyna listing za tym agentem.
+        """
+        raise NotImplementedError
+
+    async def search(self, query: str, domain: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Skróty agentów pasujących do zapytania (nazwa, opis, domena, komponenty) z polem score"""
+        raise NotImplementedError
+
+    async def find_similar(self, agent_id: str, limit: int = 10,
+                           min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[List[Dict[str, Any]]]:
+        """Skróty agentów podobnych do danego z polem similarity; None gdy agent nie istnieje"""
+        raise NotImplementedError
+
+    def lock(self, agent_id: str):
+        """Sekcja read-modify-write agenta: ``async with store.lock(agent_id): get -> zmiana -> put``.
+
+        Zmiany w jednym magazynie (shardzie) są wykonywane po kolei, więc np. dodanie
+        komponentu nie może przywrócić agenta usuniętego w międzyczasie.
+        """
+        lock = self.__dict__.get("_mutation_lock")
+        if lock is None:
+            lock = self._mutation_lock = MutationLock()
+        return lock.hold()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class InMemoryAgentStore(AgentStore):
+    """Magazyn w pamięci procesu.
+
+    Domyślnie agenci są trzymani jako kompaktowe rekordy (AgentRecord), a słownik
+    powstaje dopiero przy get(); compact=False zachowuje dokumenty bez konwersji.
+    W trybie kompaktowym każdy put() to nowa rewizja współdzieląca niezmienione
+    części z poprzednią (ostatnie max_revisions rewizji na agenta).
+
+    Z retention nieaktywne szkice są usuwane z pamięci po TTL i ponad budżet
+    (patrz agent_retention) - po zapisie, po przywróceniu szkicu i okresowo w tle.
+    Z magazynem spill trafiają do niego zamiast znikać: skrót i wpis wyszukiwania
+    zostają w indeksach, a dokument wraca przy odczycie.
+    """
+
+    def __init__(self, compact: bool = True, max_revisions: int = DEFAULT_MAX_REVISIONS,
+                 retention: Optional[RetentionPolicy] = None, spill: Optional[AgentStore] = None):
+        self.compact = compact
+        # Bez rekordów nie ma współdzielenia - dokumenty nie są wersjonowane
+        self.max_revisions = max_revisions if compact else 1
+        self._agents: Dict[str, RevisionHistory] = {}
+        self._index = AgentIndex()
+        self._search = AgentSearchIndex()
+        self._config_pool = ConfigPool()
+        self._residency = ResidencyTracker(retention) if retention is not None else None
+        self._spill = spill
+        self._spilled: Dict[str, int] = {}  # agent_id -> numer rewizji przeniesionej do spill
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    def _export(self, record: Any) -> Dict[str, Any]:
+        return record.to_dict() if self.compact else record
+
+    async def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        history = await self._history_for_read(agent_id)
+        if history is None:
+            return None
+        if self._residency is not None:
+            self._residency.touch(agent_id)
+        return self._export(history.latest.record)
+
+    async def _history_for_read(self, agent_id: str) -> Optional[RevisionHistory]:
+        """Historia agenta; szkic przywrócony ze spill jest od razu rozliczany z budżetem pamięci"""
+        self._ensure_sweep()
+        history = self._agents.get(agent_id)
+        if history is None:
+            history = await self.restore(agent_id)
+            if history is not None:
+                # Odczyt korzysta z pobranej historii, nawet jeśli polityka od razu ją usunie
+                await self.enforce_retention()
+        return history
+
+    def _ensure_sweep(self):
+        """Uruchamia leniwie okresowe stosowanie polityki retencji w bieżącej pętli zdarzeń"""
+        if self._residency is None:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._sweep_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._sweep_task = loop.create_task(self._sweep())
+
+    async def _sweep(self):
+        while True:
+            async with self.lock("retention"):
+                await self.enforce_retention()
+            await asyncio.sleep(self._residency.policy.sweep_interval)
+
+    async def put(self, agent: Dict[str, Any], event: str = "put",
+                  expected_version: Optional[int] = None) -> int:
+        self._ensure_sweep()
+        async with self.lock(agent["id"]):
+            await self.restore(agent["id"])
+            version = self.put_sync(agent, event, expected_version=expected_version)
+            await self.enforce_retention()
+            return version
+
+    async def delete(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        async with self.lock(agent_id):
+            return await self.delete_unlocked(agent_id, expected_version)
+
+    async def delete_unlocked(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        """delete() bez blokady magazynu; stan w pamięci zmienia się przed pierwszym przełączeniem zadań"""
+        if agent_id in self._spilled:
+            current = self._spilled[agent_id]
+            if expected_version is not None and current != expected_version:
+                raise VersionConflictError(agent_id, expected_version, current)
+            del self._spilled[agent_id]
+            self._index.remove(agent_id)
+            self._search.remove(agent_id)
+            await self._spill.delete(agent_id)
+            return True
+        return self.delete_sync(agent_id, expected_version)
+
+    async def restore(self, agent_id: str) -> Optional[RevisionHistory]:
+        """Przywraca do pamięci szkic przeniesiony do spill (None, gdy agent nie był przeniesiony)"""
+        version = self._spilled.get(agent_id)
+        if version is None:
+            return None
+        agent = await self._spill.get(agent_id)
+        if agent_id in self._agents:
+            return self._agents[agent_id]  # przywrócony przez równoległe wywołanie
+        if self._spilled.pop(agent_id, None) is None or agent is None:
+            return None
+        self.put_sync(agent, "restore", version)
+        await self._spill.delete(agent_id)
+        self._residency.restored += 1
+        return self._agents[agent_id]
+
+    async def enforce_retention(self) -> List[str]:
+        """Usuwa z pamięci szkice wskazane przez politykę retencji; zwraca ich id"""
+        if self._residency is None:
+            return []
+        evicted = []
+        for agent_id, expired in self._residency.select_evictions():
+            history = self._agents.get(agent_id)
+            if history is None:
+                continue
+            if self._spill is not None:
+                version = history.latest.version
+                await self._spill.put(self._export(history.latest.record), event="spill")
+                if self._agents.get(agent_id) is not history or history.latest.version != version:
+                    await self._spill.delete(agent_id)  # agent zmienił się w trakcie zapisu - zostaje w pamięci
+                    continue
+                del self._agents[agent_id]
+                self._residency.forget(agent_id)
+                self._spilled[agent_id] = version
+                self._residency.spilled += 1
+            else:
+                self.delete_sync(agent_id)
+            self._residency.evictions += 1
+            self._residency.expired += expired
+            evicted.append(agent_id)
+        return evicted
+
+    async def export_state(self, at_consistent_point: Callable[[], Any]) -> Tuple[Any, List[Any]]:
+        """Spójny widok bieżących rewizji, także szkiców przeniesionych do spill - np. do snapshotu.
+
+        Dokumenty ze spill są czytane najpierw; at_consistent_point() i zebranie rewizji
+        z pamięci odbywają się potem bez przełączania zadań, gdy żaden odczyt nie jest już
+        nieaktualny. Zwraca (wynik at_consistent_point, lista (numer, rekord lub dokument)).
+        """
+        spilled: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+        while True:
+            stale = [(agent_id, version) for agent_id, version in self._spilled.items()
+                     if agent_id not in spilled or spilled[agent_id][0] != version]
+            if not stale:
+                break
+            for agent_id, version in stale:
+                agent = await self._spill.get(agent_id)
+                if self._spilled.get(agent_id) == version:
+                    spilled[agent_id] = (version, agent)
+        marker = at_consistent_point()
+        values = self.export_values()
+        values.extend(spilled[agent_id] for agent_id in self._spilled if spilled[agent_id][1] is not None)
+        return marker, values
+
+    def put_sync(self, agent: Dict[str, Any], event: str = "put", version: Optional[int] = None,
+                 expected_version: Optional[int] = None) -> int:
+        history = self._agents.get(agent["id"])
+        if expected_version is not None:
+            current = history.latest.version if history is not None else None
+            if current != expected_version:
+                raise VersionConflictError(agent["id"], expected_version, current)
+        if history is None:
+            # Szkic wciąż w spill (usunięty z pamięci między odczytem a zapisem) - nowa rewizja go zastępuje
+            self._spilled.pop(agent["id"], None)
+            history = self._agents[agent["id"]] = RevisionHistory(self.max_revisions)
+        if self.compact:
+            previous = history.latest.record if len(history) else None
+            record = AgentRecord.from_dict(agent, self._config_pool, previous)
+        else:
+            record = agent
+        version = history.commit(record, event, version)
+        self._index.upsert(agent_summary(agent))
+        self._search.upsert(agent)
+        if self._residency is not None:
+            self._residency.record(agent)
+        return version
+
+    def delete_sync(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        if expected_version is not None:
+            history = self._agents.get(agent_id)
+            current = history.latest.version if history is not None else None
+            if current != expected_version:
+                raise VersionConflictError(agent_id, expected_version, current)
+        self._index.remove(agent_id)
+        self._search.remove(agent_id)
+        if self._residency is not None:
+            self._residency.forget(agent_id)
+        return self._agents.pop(agent_id, None) is not None
+
+    def export_values(self) -> List[Any]:
+        """Spójny widok bieżących rewizji wszystkich agentów jako (numer, rekord lub dokument) - np. do snapshotu"""
+        return [(history.latest.version, history.latest.record) for history in self._agents.values()]
+
+    async def contains(self, agent_id: str) -> bool:
+        return agent_id in self._agents or agent_id in self._spilled
+
+    async def count(self) -> int:
+        return len(self._agents) + len(self._spilled)
+
+    async def get_version(self, agent_id: str) -> Optional[int]:
+        history = self._agents.get(agent_id)
+        return history.latest.version if history is not None else self._spilled.get(agent_id)
+
+    async def get_revision(self, agent_id: str, version: int) -> Optional[Dict[str, Any]]:
+        history = await self._history_for_read(agent_id)
+        revision = history.get(version) if history is not None else None
+        return self._export(revision.record) if revision is not None else None
+
+    async def list_revisions(self, agent_id: str) -> Optional[List[Dict[str, Any]]]:
+        history = await self._history_for_read(agent_id)
+        return history.summaries() if history is not None else None
+
+    async def list_summaries(self, domain: Optional[str] = None, status: Optional[str] = None,
+                             sort_by: str = "intelligence", offset: int = 0,
+                             limit: Optional[int] = None, after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._ensure_sweep()
+        return self._index.query(domain, status, sort_by, offset, limit, after)
+
+    async def search(self, query: str, domain: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        return [{**self._index.get(agent_id), "score": score}
+                for agent_id, score in self._search.search(query, domain, limit)]
+
+    async def find_similar(self, agent_id: str, limit: int = 10,
+                           min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[List[Dict[str, Any]]]:
+        similar = self._search.find_similar(agent_id, limit, min_similarity)
+        if similar is None:
+            return None
+        return [{**self._index.get(other_id), "similarity": similarity} for other_id, similarity in similar]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"backend": "memory", "agents": len(self._agents), "compact": self.compact,
+                 "revisions": sum(len(history) for history in self._agents.values()),
+                 "search_index": self._search.get_stats()}
+        if self.compact:
+            stats["config_pool"] = self._config_pool.get_stats()
+        if self._residency is not None:
+            stats["retention"] = {**self._residency.get_stats(), "spilled_agents": len(self._spilled)}
+        if "_mutation_lock" in self.__dict__:
+            stats["lock"] = self._mutation_lock.get_stats()
+        return stats
+
+
+class SQLiteAgentStore(AgentStore):
+    """Magazyn SQLite: gorące pola w indeksowanych kolumnach, pełny dokument jako skompresowany JSON.
+
+    Poprzednie rewizje (ostatnie max_revisions) trafiają do tabeli agent_revisions.
+    Indeks wyszukiwania jest budowany w pamięci przy pierwszym wyszukiwaniu i dalej
+    aktualizowany przez put/delete tego procesu.
+    """
+
+    persistent = True
+
+    _SUMMARY_COLUMNS = ("id", "name", "description", "domain", "status", "created_at",
+                        "component_count", "intelligence_score", "readiness_score",
+                        "confidence_score", "ai_enhanced")
+
+    # Kolejność zgodna z SORT_OPTIONS: (wyrażenie, malejąco, pole skrótu), obsługiwana przez indeksy idx_agents_*
+    _SORT_COLUMNS = {
+        "intelligence": (("intelligence_score", True, "intelligence_score"),
+                         ("confidence_score", True, "confidence_score"), ("id", False, "id")),
+        "readiness": (("readiness_score", True, "readiness_score"),
+                      ("intelligence_score", True, "intelligence_score"), ("id", False, "id")),
+        "created": (("created_at", True, "created_at"), ("id", True, "id")),
+        "name": (("name COLLATE NOCASE", False, "name"), ("id", False, "id")),
+    }
+
+    def __init__(self, path: str, compression_level: int = 6, max_revisions: int = DEFAULT_MAX_REVISIONS):
+        self.path = path
+        self.compression_level = compression_level
+        self.max_revisions = max(1, max_revisions)
+        # Zapytania są krótkie i lokalne - wykonujemy je bezpośrednio w pętli zdarzeń
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._search: Optional[AgentSearchIndex] = None
+
+    def _create_schema(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS agents (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                description TEXT,
+                domain TEXT,
+                status TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                component_count INTEGER NOT NULL DEFAULT 0,
+                intelligence_score INTEGER NOT NULL DEFAULT 0,
+                readiness_score INTEGER NOT NULL DEFAULT 0,
+                confidence_score INTEGER NOT NULL DEFAULT 0,
+                ai_enhanced INTEGER NOT NULL DEFAULT 0,
+                document BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_agents_name ON agents(name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_agents_domain ON agents(domain);
+            CREATE INDEX IF NOT EXISTS idx_agents_status ON agents(status);
+            CREATE INDEX IF NOT EXISTS idx_agents_created_at ON agents(created_at);
+            CREATE INDEX IF NOT EXISTS idx_agents_intelligence ON agents(intelligence_score, confidence_score);
+            CREATE INDEX IF NOT EXISTS idx_agents_readiness ON agents(readiness_score, intelligence_score);
+            CREATE INDEX IF NOT EXISTS idx_agents_domain_status ON agents(domain, status, intelligence_score);
+            CREATE TABLE IF NOT EXISTS agent_revisions (
+                agent_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                event TEXT,
+                created_at TEXT,
+                component_count INTEGER NOT NULL DEFAULT 0,
+                document BLOB NOT NULL,
+                PRIMARY KEY (agent_id, version)
+            );
+        """)
+
+    def _encode(self, agent: Dict[str, Any]) -> bytes:
+        payload = json.dumps(agent, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return zlib.compress(payload, self.compression_level)
+
+    @staticmethod
+    def _decode(blob: bytes) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    async def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT document FROM agents WHERE id = ?", (agent_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    async def put(self, agent: Dict[str, Any], event: str = "put",
+                  expected_version: Optional[int] = None) -> int:
+        summary = agent_summary(agent)
+        document = self._encode(agent)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = await self.get_version(summary["id"])
+            if expected_version is not None and current != expected_version:
+                raise VersionConflictError(summary["id"], expected_version, current)
+            self._write_agent(summary, agent, document)
+            version = (current or 0) + 1
+            self._conn.execute(
+                "INSERT INTO agent_revisions (agent_id, version, event, created_at, component_count, document) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (summary["id"], version, event, datetime.now().isoformat(), summary["component_count"], document)
+            )
+            self._conn.execute("DELETE FROM agent_revisions WHERE agent_id = ? AND version <= ?",
+                               (summary["id"], version - self.max_revisions))
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        if self._search is not None:
+            self._search.upsert(agent)
+        return version
+
+    def _write_agent(self, summary: Dict[str, Any], agent: Dict[str, Any], document: bytes):
+        self._conn.execute(
+            """INSERT OR REPLACE INTO agents
+               (id, name, description, domain, status, created_at, updated_at, component_count,
+                intelligence_score, readiness_score, confidence_score, ai_enhanced, document)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                summary["id"], summary["name"], summary["description"], summary["domain"],
+                summary["status"], summary["created_at"], agent.get("updated_at"),
+                summary["component_count"], summary["intelligence_score"], summary["readiness_score"],
+                summary["confidence_score"], int(summary["ai_enhanced"]), document
+            )
+        )
+
+    async def delete(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if expected_version is not None:
+                current = await self.get_version(agent_id)
+                if current != expected_version:
+                    raise VersionConflictError(agent_id, expected_version, current)
+            cursor = self._conn.execute("DELETE FROM agents WHERE id = ?", (agent_id,))
+            self._conn.execute("DELETE FROM agent_revisions WHERE agent_id = ?", (agent_id,))
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        if self._search is not None:
+            self._search.remove(agent_id)
+        return cursor.rowcount > 0
+
+    async def contains(self, agent_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM agents WHERE id = ?", (agent_id,)).fetchone() is not None
+
+    async def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+    async def get_version(self, agent_id: str) -> Optional[int]:
+        return self._conn.execute("SELECT MAX(version) FROM agent_revisions WHERE agent_id = ?",
+                                  (agent_id,)).fetchone()[0]
+
+    async def get_revision(self, agent_id: str, version: int) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT document FROM agent_revisions WHERE agent_id = ? AND version = ?",
+                                 (agent_id, version)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    async def list_revisions(self, agent_id: str) -> Optional[List[Dict[str, Any]]]:
+        rows = self._conn.execute(
+            "SELECT version, event, created_at, component_count FROM agent_revisions "
+            "WHERE agent_id = ? ORDER BY version", (agent_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        return [dict(zip(("version", "event", "created_at", "component_count"), row)) for row in rows]
+
+    async def list_summaries(self, domain: Optional[str] = None, status: Optional[str] = None,
+                             sort_by: str = "intelligence", offset: int = 0,
+                             limit: Optional[int] = None, after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        conditions, params = [], []
+        if domain:
+            conditions.append("domain = ?")
+            params.append(domain)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+
+        total, ai_enhanced, intelligence_sum = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(ai_enhanced), 0), COALESCE(SUM(intelligence_score), 0) "
+            f"FROM agents{where}", params
+        ).fetchone()
+
+        columns = self._SORT_COLUMNS[sort_by]
+        order_by = ", ".join(f"{expr} {'DESC' if desc else 'ASC'}" for expr, desc, _ in columns)
+        if after is not None:
+            keyset, keyset_params = self._keyset_condition(columns, after)
+            where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+            params = params + keyset_params
+
+        query = (f"SELECT {', '.join(self._SUMMARY_COLUMNS)} FROM agents{where} "
+                 f"ORDER BY {order_by} LIMIT ? OFFSET ?")
+        summaries = []
+        for row in self._conn.execute(query, params + [-1 if limit is None else limit, offset]):
+            summary = dict(zip(self._SUMMARY_COLUMNS, row))
+            summary["ai_enhanced"] = bool(summary["ai_enhanced"])
+            summaries.append(summary)
+        return {"agents": summaries, "total": total,
+                "ai_enhanced": ai_enhanced, "intelligence_sum": intelligence_sum}
+
+    @staticmethod
+    def _keyset_condition(columns, after: Dict[str, Any]):
+        """Warunek "za kluczem kursora" dla sortowania po wielu kolumnach w różnych kierunkach"""
+        alternatives, params = [], []
+        for i, (expr, desc, field) in enumerate(columns):
+            terms = [f"{prev_expr} = ?" for prev_expr, _, _ in columns[:i]]
+            terms.append(f"{expr} {'<' if desc else '>'} ?")
+            alternatives.append("(" + " AND ".join(terms) + ")")
+            params.extend(after[prev_field] for _, _, prev_field in columns[:i])
+            params.append(after[field])
+        return "(" + " OR ".join(alternatives) + ")", params
+
+    def _search_index(self) -> AgentSearchIndex:
+        if self._search is None:
+            self._search = AgentSearchIndex()
+            for (document,) in self._conn.execute("SELECT document FROM agents"):
+                self._search.upsert(self._decode(document))
+        return self._search
+
+    def _summaries_by_id(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not agent_ids:
+            return {}
+        placeholders = ", ".join("?" * len(agent_ids))
+        summaries = {}
+        for row in self._conn.execute(
+                f"SELECT {', '.join(self._SUMMARY_COLUMNS)} FROM agents WHERE id IN ({placeholders})", agent_ids):
+            summary = dict(zip(self._SUMMARY_COLUMNS, row))
+            summary["ai_enhanced"] = bool(summary["ai_enhanced"])
+            summaries[summary["id"]] = summary
+        return summaries
+
+    async def search(self, query: str, domain: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        hits = self._search_index().search(query, domain, limit)
+        summaries = self._summaries_by_id([agent_id for agent_id, _ in hits])
+        return [{**summaries[agent_id], "score": score} for agent_id, score in hits if agent_id in summaries]
+
+    async def find_similar(self, agent_id: str, limit: int = 10,
+                           min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[List[Dict[str, Any]]]:
+        similar = self._search_index().find_similar(agent_id, limit, min_similarity)
+        if similar is None:
+            return None
+        summaries = self._summaries_by_id([other_id for other_id, _ in similar])
+        return [{**summaries[other_id], "similarity": similarity}
+                for other_id, similarity in similar if other_id in summaries]
+
+    def get_stats(self) -> Dict[str, Any]:
+        agents, blob_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(document)), 0) FROM agents"
+        ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "agents": agents, "compressed_bytes": blob_bytes}
+
+    def close(self):
+        self._conn.close()
+
+
+def create_agent_store(path: Optional[str] = None, event_log_dir: Optional[str] = None) -> AgentStore:
+    """Tworzy magazyn agentów.
+
+    SQLite gdy podano ścieżkę (lub AGENT_STORE_PATH), log zdarzeń ze snapshotami
+    gdy podano katalog (lub AGENT_EVENT_LOG_DIR), inaczej magazyn w pamięci.
+    Magazyny w pamięci stosują politykę retencji szkiców ze zmiennych środowiska.
+    Każdy tenant dostaje własny shard (plik, katalog lub magazyn w pamięci);
+    AGENT_MAX_OPEN_SHARDS i AGENT_TENANTS ograniczają liczbę shardów i tenantów.
+    """
+    from .sharded_store import (ShardedAgentStore, DEFAULT_MAX_OPEN_SHARDS,
+                                shard_file_path, shard_directory)
+
+    path = path or os.environ.get("AGENT_STORE_PATH")
+    retention = RetentionPolicy.from_env()
+    event_log_dir = event_log_dir or os.environ.get("AGENT_EVENT_LOG_DIR")
+    spill_path = os.environ.get("AGENT_SPILL_PATH") if retention is not None else None
+
+    def open_shard(tenant: str) -> AgentStore:
+        if path:
+            return SQLiteAgentStore(shard_file_path(path, tenant))
+        if event_log_dir:
+            from .event_log import EventSourcedAgentStore, DEFAULT_SNAPSHOT_EVERY
+            snapshot_every = int(os.environ.get("AGENT_SNAPSHOT_EVERY", DEFAULT_SNAPSHOT_EVERY))
+            return EventSourcedAgentStore(shard_directory(event_log_dir, tenant),
+                                          snapshot_every=snapshot_every, retention=retention)
+        spill = SQLiteAgentStore(shard_file_path(spill_path, tenant)) if spill_path else None
+        return InMemoryAgentStore(retention=retention, spill=spill)
+
+    allowed_tenants = [tenant.strip() for tenant in os.environ.get("AGENT_TENANTS", "").split(",") if tenant.strip()]
+    return ShardedAgentStore(open_shard,
+                             max_open_shards=int(os.environ.get("AGENT_MAX_OPEN_SHARDS", DEFAULT_MAX_OPEN_SHARDS)),
+                             allowed_tenants=allowed_tenants or None)
@@ -0,0 +1,62 @@
+"""Application context shared by all MCP tools"""
+
+import sys
+import os
+from typing import Dict, Any, Optional
+
+# Add the src directory to the path for absolute imports
+current_dir = os.path.dirname(__file__)
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from components import get_all_available_components
+from utils.smart_context import get_smart_context
+from utils.description_analyzer import get_description_analyzer
+from utils.learning_worker import get_learning_worker
+
+from .agent_store import AgentStore, create_agent_store
+from .component_manager import ComponentManager
+from .workflow_manager import WorkflowManager
+from .deployer import AgentDeployer
+from .enhanced_agent_manager import EnhancedAgentManager
+
+
+class AppContext:
+    """Jedna instancja katalogu, magazynu, SmartContext, analizatora i deployera na serwer.
+
+    Managery dostają zależności przez konstruktor, więc żadne wywołanie narzędzia
+    nie buduje ponownie katalogu ani nie tworzy własnego (pustego) magazynu.
+    """
+
+    def __init__(self, store: Optional[AgentStore] = None):
+        self.component_catalog = get_all_available_components()
+        self.store = store if store is not None else create_agent_store()
+        self.smart_context = get_smart_context()
+        self.description_analyzer = get_description_analyzer()
+        self.learning_worker = get_learning_worker(self.smart_context)
+
+        self.deployer = AgentDeployer(store=self.store)
+        self.component_manager = ComponentManager(component_catalog=self.component_catalog)
+        self.workflow_manager = WorkflowManager()
+        self.agent_manager = EnhancedAgentManager(
+            store=self.store,
+            component_catalog=self.component_catalog,
+            smart_context=self.smart_context,
+            description_analyzer=self.description_analyzer,
+            learning_worker=self.learning_worker,
+            deployer=self.deployer,
+            workflow_manager=self.workflow_manager
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "store": self.store.get_stats(),
+            "catalog_categories": len(self.component_catalog),
+            "learning_worker": self.learning_worker.get_metrics()
+        }
+
+
+def create_app_context(store: Optional[AgentStore] = None) -> AppContext:
+    """Tworzy kontekst aplikacji (wywoływane raz w create_server)"""
+    return AppContext(store=store)
@@ -0,0 +1,213 @@
+"""Prebuilt agent blueprints cloned with fresh ids"""
+
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.ids import new_id
+
+# Klucze z identyfikatorami encji i odwołaniami do nich - tylko w encjach agenta, nie w danych
+# użytkownika (np. "id" w configuration komponentu zostaje bez zmian)
+_ID_KEYS = frozenset({"id"})
+_REF_KEYS = frozenset({"node_id", "from_node", "to_node"})
+_TIMESTAMP_KEYS = frozenset({"created_at", "updated_at"})
+_WORKFLOW_ENTITY_LISTS = ("nodes", "connections", "error_handling")
+
+
+def _copy(value: Any) -> Any:
+    """Strukturalna kopia słowników i list bez żadnych podmian"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _clone_entity(entity: Any, ids: Dict[str, str], now: str, nested: Tuple[str, ...] = ()) -> Any:
+    """Kopia encji (agent, komponent, workflow, węzeł, połączenie, obsługa błędu) ze świeżymi id,
+    odwołaniami do węzłów i znacznikami czasu; pola nested pomija - klonuje je wywołujący"""
+    if not isinstance(entity, dict):
+        return _copy(entity)
+    result = {}
+    for key, item in entity.items():
+        if key in nested:
+            continue
+        if (key in _ID_KEYS or key in _REF_KEYS) and isinstance(item, str):
+            fresh_id = ids.get(item)
+            if fresh_id is None:
+                fresh_id = ids[item] = new_id()
+            result[key] = fresh_id
+        elif key in _TIMESTAMP_KEYS and isinstance(item, str):
+            result[key] = now
+        else:
+            result[key] = _copy(item)
+    return result
+
+
+def _clone(document: Dict[str, Any], ids: Dict[str, str], now: str) -> Dict[str, Any]:
+    """Kopia dokumentu agenta z podmianą id encji (spójnie z odwołaniami) i znaczników czasu"""
+    agent = _clone_entity(document, ids, now, nested=("components", "workflow"))
+    if "components" in document:
+        components = document["components"]
+        agent["components"] = ([_clone_entity(component, ids, now) for component in components]
+                               if isinstance(components, list) else _copy(components))
+    if "workflow" in document:
+        workflow = document["workflow"]
+        agent["workflow"] = _clone_entity(workflow, ids, now, nested=_WORKFLOW_ENTITY_LISTS)
+        if isinstance(workflow, dict):
+            for part in _WORKFLOW_ENTITY_LISTS:
+                if part in workflow:
+                    entities = workflow[part]
+                    agent["workflow"][part] = ([_clone_entity(entity, ids, now) for entity in entities]
+                                               if isinstance(entities, list) else _copy(entities))
+    return agent
+
+
+class AgentBlueprint:
+    """Niezmienny szkielet agenta; instantiate() daje nowy dokument ze świeżymi id.
+
+    attachments to dodatkowe dane kopiowane razem z agentem (bez id encji),
+    np. zapamiętana odpowiedź create_agent.
+    """
+
+    __slots__ = ("source", "document", "attachments")
+
+    def __init__(self, document: Dict[str, Any], source: str,
+                 attachments: Optional[Dict[str, Any]] = None):
+        self.document = document
+        self.source = source
+        self.attachments = attachments
+
+    def instantiate_with_attachments(self, agent_id: Optional[str] = None,
+                                     **fields) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        ids = {self.document["id"]: agent_id or new_id()}
+        now = datetime.now().isoformat()
+        agent = _clone(self.document, ids, now)
+        agent.update(fields)
+        attachments = _copy(self.attachments) if self.attachments else {}
+        return agent, attachments
+
+    def instantiate(self, agent_id: Optional[str] = None, **fields) -> Dict[str, Any]:
+        return self.instantiate_with_attachments(agent_id, **fields)[0]
+
+
+def catalog_fingerprint(component_catalog: Dict[str, Any]) -> str:
+    """Odcisk katalogu komponentów - zmienia się, gdy zmienia się zestaw komponentów"""
+    digest = hashlib.blake2b(digest_size=8)
+    for category in sorted(component_catalog):
+        components = component_catalog[category]
+        if not isinstance(components, list):
+            continue
+        digest.update(category.encode("utf-8"))
+        for component in components:
+            digest.update(b"\0" + str(component.get("component_id", "")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _resolve_step_endpoint(endpoint: str, node_keys: Dict[str, str]) -> Optional[str]:
+    """Węzeł kroku szablonu: dokładny typ albo skrót (np. "llm" -> "pollinations_llm")"""
+    if endpoint in node_keys:
+        return node_keys[endpoint]
+    for node_type, node_id in node_keys.items():
+        if endpoint in node_type.split("_"):
+            return node_id
+    return None
+
+
+def blueprint_from_template(template: Dict[str, Any]) -> AgentBlueprint:
+    """Przetwarza szablon z workflow_templates na gotowy szkielet agenta (raz na szablon)"""
+    template_id = template["template_id"]
+    components: List[Dict[str, Any]] = []
+    nodes: List[Dict[str, Any]] = [{
+        "id": "node-input",
+        "type": "input_processor",
+        "name": "Procesor Wejścia",
+        "position": 0,
+        "configuration": {},
+        "auto_configured": True,
+        "execution_order": 0
+    }]
+
+    for i, spec in enumerate(template.get("components", []), start=1):
+        components.append({
+            "id": f"component-{i}",
+            "component_id": spec["type"],
+            "name": spec.get("name", spec["type"]),
+            "reason": f"Komponent szablonu {template_id}",
+            "confidence": 100,
+            "auto_added": False,
+            "position": i,
+            "configuration": dict(spec.get("config", {})),
+            "auto_configured": False
+        })
+        nodes.append({
+            "id": f"node-{i}",
+            "type": spec["type"],
+            "name": spec.get("name", spec["type"]),
+            "position": i,
+            "configuration": dict(spec.get("config", {})),
+            "auto_configured": False,
+            "execution_order": i
+        })
+
+    nodes.append({
+        "id": "node-output",
+        "type": "output_processor",
+        "name": "Procesor Wyjścia",
+        "position": len(nodes),
+        "configuration": {},
+        "auto_configured": True,
+        "execution_order": len(nodes)
+    })
+
+    # Połączenia z kroków szablonu ("a → b"), a bez kroków - łańcuch w kolejności komponentów
+    node_keys = {"input": "node-input", "output": "node-output"}
+    for node in nodes[1:-1]:
+        node_keys.setdefault(node["type"], node["id"])
+    steps = template.get("workflow", {}).get("steps", [])
+    pairs = []
+    for step in steps:
+        source, _, target = (part.strip() for part in step.partition("→"))
+        from_node = _resolve_step_endpoint(source, node_keys)
+        to_node = _resolve_step_endpoint(target, node_keys)
+        if from_node and to_node:
+            pairs.append((from_node, to_node))
+    if not pairs:
+        pairs = [(a["id"], b["id"]) for a, b in zip(nodes, nodes[1:])]
+
+    connections = [{
+        "id": f"connection-{i}",
+        "from_node": from_node,
+        "to_node": to_node,
+        "type": "sequential",
+        "auto_generated": True
+    } for i, (from_node, to_node) in enumerate(pairs)]
+
+    document = {
+        "id": "agent",
+        "name": template["name"],
+        "description": template.get("description", ""),
+        "domain": template.get("domain", "general"),
+        "complexity": template.get("complexity", "medium"),
+        "status": "draft",
+        "created_at": "",
+        "updated_at": "",
+        "template_id": template_id,
+        "components": components,
+        "workflow": {
+            "id": "workflow",
+            "name": f"Template Workflow: {template['name']}",
+            "description": template.get("description", ""),
+            "nodes": nodes,
+            "connections": connections,
+            "conditions": template.get("workflow", {}).get("conditions", []),
+            "created_at": ""
+        },
+        "configuration": {
+            "inputs": ["user_message"],
+            "outputs": ["response"],
+            "triggers": ["user_message"]
+        },
+        "ai_analysis": {}
+    }
+    return AgentBlueprint(document, source=f"template:{template_id}")
@@ -1,3 +1,4 @@
+import logging
 import sys
 import os
 from typing import Dict, Any, List
@@ -8,10 +9,12 @@ src_dir = os.path.dirname(current_dir)
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
+logger = logging.getLogger("ai_agent_generator.component_manager")
+
 try:
     from components import get_all_available_components, search_components
 except ImportError as e:
-    print(f"Warning: Could not import components: {e}")
+    logger.warning("Could not import components: %s", e)
     
     def get_all_available_components():
         return {}
@@ -20,8 +23,9 @@ except ImportError as e:
         return []
 
 class ComponentManager:
-    def __init__(self):
-        self.component_catalog = get_all_available_components()
+    def __init__(self, component_catalog: Dict[str, Any] = None):
+        # Katalog współdzielony z EnhancedAgentManager (AppContext) lub własny
+        self.component_catalog = component_catalog if component_catalog is not None else get_all_available_components()
     
     async def get_components(self, category: str = None, search: str = None) -> Dict[str, Any]:
         """Pobiera komponenty z inteligentnym filtrowaniem"""
@@ -37,8 +41,8 @@ class ComponentManager:
                 for cat_name, cat_components in self.component_catalog.items():
                     if isinstance(cat_components, list):
                         for comp in cat_components:
-                            comp["category_parent"] = cat_name
-                            components.append(comp)
+                            # Kopia - katalog jest współdzielony między managerami
+                            components.append({**comp, "category_parent": cat_name})
                     elif cat_name == "statistics":  # Skip stats
                         continue
         
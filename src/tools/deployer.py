@@ -1,34 +1,44 @@
+import asyncio
 import json
-import uuid
 import base64
+import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
+from utils.ids import new_id
+
+logger = logging.getLogger("ai_agent_generator.deployer")
+
 class AgentDeployer:
-    def __init__(self):
+    def __init__(self, store=None):
+        # Magazyn agentów współdzielony z EnhancedAgentManager (AppContext)
+        self.store = store
         self.deployments = {}
         
-    async def generate_chat_interface(self, agent_id: str, theme: str = "modern") -> Dict[str, Any]:
-        """Generuje interfejs chatu HTML z zaawansowanymi funkcjami specjalnymi dla różnych typów agentów"""
+    async def generate_chat_interface(self, agent_id: str, theme: str = "modern",
+                                      agent: Optional[Dict[str, Any]] = None,
+                                      include_base64: bool = True) -> Dict[str, Any]:
+        """Generuje interfejs chatu HTML z zaawansowanymi funkcjami specjalnymi dla różnych typów agentów
+
+        include_base64=False pomija kopię base64 (plik i tak trafia na dysk, a treść jest
+        dostępna przez get_chat_interface_html).
+        """
         
         # Try to get agent details to customize interface
-        agent_name = f"Agent {agent_id[:8]}"
+        agent_name = f"Agent {self._short_id(agent_id)}"
         agent_type = "general"
         agent_description = "Inteligentny asystent AI"
         
         try:
-            # Access the enhanced agent manager through the class variable if available
-            from .enhanced_agent_manager import EnhancedAgentManager
-            temp_manager = EnhancedAgentManager()
-            if agent_id in temp_manager.agents:
-                agent = temp_manager.agents[agent_id]
+            if agent is None and self.store is not None:
+                agent = await self.store.get(agent_id)
+            if agent is not None:
                 agent_name = agent.get("name", agent_name)
                 agent_type = agent.get("domain", "general")
                 agent_description = agent.get("description", agent_description)
         except Exception as e:
-            print(f"⚠️ Could not access agent details: {e}")
-            pass
+            logger.warning("Could not access agent details: %s", e, extra={"agent_id": agent_id})
         
         # Customize interface based on agent type
         specialized_features = self._get_specialized_features(agent_type)
@@ -292,25 +302,25 @@ class AgentDeployer:
 </body>
 </html>"""
         
-        html_base64 = base64.b64encode(html_content.encode('utf-8')).decode()
+        html_base64 = base64.b64encode(html_content.encode('utf-8')).decode() if include_base64 else None
         
         # Generate filename and save the file
-        filename = f"agent_chat_{agent_name.replace(' ', '_').lower()}_{agent_id[:8]}.html"
+        filename = self._chat_filename(agent_name, agent_id)
         
         # Save the HTML file to current directory (root of repository)
         # This makes it accessible for download
         file_path = os.path.join(os.getcwd(), filename)
         
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Zapis w wątku - nie blokuje równoległych faz create_agent
+            await asyncio.to_thread(self._write_html_file, file_path, html_content)
             file_saved = True
             file_url = f"file://{file_path}"
             # For web access, create a relative path from repository root
             relative_path = os.path.relpath(file_path, os.getcwd())
             download_link = f"./{relative_path}"
         except Exception as e:
-            print(f"⚠️ Could not save HTML file: {e}")
+            logger.warning("Could not save HTML file: %s", e, extra={"agent_id": agent_id})
             file_saved = False
             file_url = None
             download_link = None
@@ -339,9 +349,40 @@ class AgentDeployer:
             ]
         }
         
+    @staticmethod
+    def _write_html_file(file_path: str, html_content: str):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+    
+    @staticmethod
+    def _read_html_file(file_path: str) -> str:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    @staticmethod
+    def _short_id(agent_id: str) -> str:
+        # Końcówka id: początek identyfikatorów uporządkowanych w czasie to znacznik czasu
+        return agent_id[-8:]
+
+    @staticmethod
+    def _chat_filename(agent_name: str, agent_id: str) -> str:
+        return f"agent_chat_{agent_name.replace(' ', '_').lower()}_{AgentDeployer._short_id(agent_id)}.html"
+    
+    async def get_chat_interface_html(self, agent_id: str) -> Optional[str]:
+        """HTML interfejsu chatu agenta - zapisany plik albo wygenerowany na nowo; None bez agenta"""
+        agent = await self.store.get(agent_id) if self.store is not None else None
+        if agent is None:
+            return None
+        file_path = os.path.join(os.getcwd(), self._chat_filename(agent.get("name", f"Agent {self._short_id(agent_id)}"), agent_id))
+        try:
+            return await asyncio.to_thread(self._read_html_file, file_path)
+        except OSError:
+            interface = await self.generate_chat_interface(agent_id, agent=agent, include_base64=False)
+            return interface["html_content"]
+    
     async def deploy_agent(self, agent_id: str, environment: str = "local") -> Dict[str, Any]:
         """Wdraża agenta"""
-        deployment_id = str(uuid.uuid4())
+        deployment_id = new_id()
         
         self.deployments[deployment_id] = {
             "id": deployment_id,
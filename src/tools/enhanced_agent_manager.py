@@ -1,5 +1,8 @@
+import copy
+import hashlib
 import json
-import uuid
+import logging
+import time
 import re
 from typing import Dict, Any, List, Optional
 import asyncio
@@ -15,13 +18,18 @@ src_dir = os.path.dirname(current_dir)
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
+logger = logging.getLogger("ai_agent_generator.agent_manager")
+
 try:
     from components import get_all_available_components
     from utils.smart_context import get_smart_context
     from utils.description_analyzer import get_description_analyzer
+    from utils.learning_worker import get_learning_worker
+    from utils.helpers import project_fields
+    from utils.lru_cache import LRUCache
 except ImportError as e:
     # Fallback for when modules are not found
-    print(f"Warning: Could not import some modules: {e}")
+    logger.warning("Could not import some modules: %s", e)
     
     def get_all_available_components():
         """Fallback components function"""
@@ -50,15 +58,139 @@ except ImportError as e:
     def get_description_analyzer():
         """Fallback description analyzer function"""
         return DescriptionAnalyzer()
+    
+    class LearningWorker:
+        """Fallback LearningWorker class"""
+        async def submit(self, agent):
+            return False
+        def get_metrics(self):
+            return {"running": False, "queue_depth": 0}
+    
+    def get_learning_worker(smart_context=None):
+        """Fallback learning worker function"""
+        return LearningWorker()
+    
+    def project_fields(data, paths):
+        """Fallback projection - full document"""
+        return data
+    
+    class LRUCache(dict):
+        """Fallback cache - nothing is kept"""
+        def __init__(self, maxsize=0):
+            super().__init__()
+        def put(self, key, value):
+            pass
+        def get_stats(self):
+            return {"size": 0}
+
+from .agent_store import (AgentStore, VersionConflictError, create_agent_store,
+                          parse_version_tag, version_tag)
+from .agent_index import SORT_OPTIONS, encode_cursor, decode_cursor
+from .agent_search import DEFAULT_MIN_SIMILARITY
+from .agent_diff import diff_agents as diff_agent_documents
+from .phase_pipeline import PhasePipeline
+from .blueprints import AgentBlueprint, catalog_fingerprint
+from . import agent_counters
+from utils.ids import new_id
+
+# Tryby odpowiedzi create_agent: pełny dokument, skrót z URI zasobów, same identyfikatory
+RESPONSE_MODES = ("full", "summary", "ids_only")
+
+# Największa strona zwracana przez list_agents
+MAX_PAGE_SIZE = 500
+
+# Największa liczba wyników search_agents i find_similar_agents
+MAX_SEARCH_RESULTS = 100
+
+# Pola, które można nadpisać w create_agent_from_template
+TEMPLATE_OVERRIDES = ("name", "description", "domain", "complexity", "component_config")
+
+# Bazowy Intelligence Score (bez analizy AI) dla agentów z szablonów
+TEMPLATE_INTELLIGENCE_SCORE = 50
+
+# Domyślny rozmiar cache szkieletów (AGENT_BLUEPRINT_CACHE_SIZE, 0 wyłącza)
+DEFAULT_BLUEPRINT_CACHE_SIZE = 256
+
+# Limity create_agents
+MAX_BATCH_SIZE = 1000
+MAX_BATCH_CONCURRENCY = 64
+
+
+def agent_resource_uris(agent_id: str) -> Dict[str, str]:
+    """URI zasobów MCP z ciężkimi częściami agenta (rejestrowane w serwerze)"""
+    return {
+        "agent": f"agent://{agent_id}",
+        "components": f"agent://{agent_id}/components",
+        "workflow": f"agent://{agent_id}/workflow",
+        "chat_interface": f"agent://{agent_id}/chat-interface"
+    }
+
+
+def shape_creation_response(result: Dict[str, Any], response_mode: str) -> Dict[str, Any]:
+    """Odpowiedź create_agent w wybranym trybie (full zwraca wynik bez zmian)"""
+    if response_mode == "full" or not result.get("success"):
+        return result
+    agent_id = result["agent_id"]
+    if response_mode == "ids_only":
+        return {"success": True, "agent_id": agent_id, "version_tag": result.get("version_tag")}
+    
+    agent = result["agent"]
+    enhancements = result["ai_enhancements"]
+    chat_interface = result.get("chat_interface", {})
+    summary = {
+        "success": True,
+        "agent_id": agent_id,
+        "version_tag": result.get("version_tag"),
+        "name": agent["name"],
+        "domain": agent["domain"],
+        "complexity": agent["complexity"],
+        "status": agent["status"],
+        "component_count": len(agent["components"]),
+        "scores": {
+            "intelligence": enhancements["intelligence_score"],
+            "readiness": enhancements["readiness_score"],
+            "confidence": enhancements["confidence_score"]
+        },
+        "chat_interface": {
+            "generated": chat_interface.get("generated", False),
+            "filename": chat_interface.get("filename"),
+            "download_link": chat_interface.get("download_link")
+        },
+        "resources": agent_resource_uris(agent_id),
+        "total_ms": result.get("phase_timings_ms", {}).get("total")
+    }
+    if result.get("from_blueprint_cache"):
+        summary["from_blueprint_cache"] = True
+    return summary
+
 
 class EnhancedAgentManager:
     """Ulepszony AgentManager z inteligentną analizą i automatyczną optymalizacją działającą w tle"""
     
-    def __init__(self):
-        self.agents = {}  # W produkcji byłaby to baza danych
-        self.component_catalog = get_all_available_components()
-        self.smart_context = get_smart_context()
-        self.description_analyzer = get_description_analyzer()
+    def __init__(self, store: Optional[AgentStore] = None, component_catalog: Optional[Dict[str, Any]] = None,
+                 smart_context=None, description_analyzer=None, learning_worker=None, deployer=None,
+                 workflow_manager=None, blueprint_cache_size: Optional[int] = None):
+        # Zależności wstrzykuje AppContext; bez niego manager tworzy własne
+        # Magazyn agentów - w pamięci lub SQLite (AGENT_STORE_PATH)
+        self.store = store if store is not None else create_agent_store()
+        self.component_catalog = component_catalog if component_catalog is not None else get_all_available_components()
+        self.smart_context = smart_context if smart_context is not None else get_smart_context()
+        self.description_analyzer = description_analyzer if description_analyzer is not None else get_description_analyzer()
+        self.learning_worker = learning_worker if learning_worker is not None else get_learning_worker(self.smart_context)
+        if deployer is None:
+            from .deployer import AgentDeployer
+            deployer = AgentDeployer(store=self.store)
+        self.deployer = deployer
+        if workflow_manager is None:
+            from .workflow_manager import WorkflowManager
+            workflow_manager = WorkflowManager()
+        self.workflow_manager = workflow_manager
+        
+        # Cache szkieletów agentów (wynik faz 1-8) dla powtarzanych specyfikacji; 0 wyłącza
+        if blueprint_cache_size is None:
+            blueprint_cache_size = int(os.environ.get("AGENT_BLUEPRINT_CACHE_SIZE", DEFAULT_BLUEPRINT_CACHE_SIZE))
+        self.blueprint_cache = LRUCache(blueprint_cache_size) if blueprint_cache_size > 0 else None
+        self.catalog_fingerprint = catalog_fingerprint(self.component_catalog)
         
         # Predefiniowane wzorce dla różnych domen
         self.domain_patterns = {
@@ -80,143 +212,284 @@ class EnhancedAgentManager:
         }
         
     async def create_agent(self, name: str, description: str, 
-                          domain: str = "general", complexity: str = "medium") -> Dict[str, Any]:
-        """Tworzy nowego agenta z PEŁNĄ inteligentną analizą działającą w tle"""
+                          domain: str = "general", complexity: str = "medium",
+                          generate_chat_interface: bool = True,
+                          analysis_cache: Optional[Dict[Any, "asyncio.Future"]] = None,
+                          use_blueprint_cache: bool = True, response_mode: str = "full") -> Dict[str, Any]:
+        """Tworzy nowego agenta z PEŁNĄ inteligentną analizą działającą w tle.
+
+        Fazy tworzą graf zależności (PhasePipeline) - niezależne fazy działają równolegle,
+        a czasy poszczególnych faz trafiają do wyniku jako phase_timings_ms.
+        analysis_cache (używany przez create_agents) współdzieli analizę identycznych opisów.
+        Powtórzona specyfikacja (opis, domena, złożoność) jest klonowana z cache szkieletów,
+        chyba że use_blueprint_cache=False. response_mode "summary" zwraca id, wyniki i URI
+        zasobów (bez komponentów i base64), a "ids_only" tylko id i znacznik wersji.
+        """
+        
+        if response_mode not in RESPONSE_MODES:
+            return {
+                "success": False,
+                "error": f"Nieznany tryb odpowiedzi: {response_mode}",
+                "available_response_modes": list(RESPONSE_MODES)
+            }
+        include_base64 = response_mode == "full"
+        agent_id = new_id()
         
-        agent_id = str(uuid.uuid4())
+        logger.debug("Tworzenie agenta %r", name, extra={"agent_id": agent_id})
         
-        print(f"🤖 Tworzenie agenta '{name}' z AI enhancement...")
+        blueprint_key = None
+        if use_blueprint_cache and self.blueprint_cache is not None:
+            blueprint_key = self._blueprint_key(description, domain, complexity)
+            blueprint = self.blueprint_cache.get(blueprint_key)
+            if blueprint is not None:
+                result = await self._create_from_blueprint(blueprint, agent_id, name, generate_chat_interface,
+                                                           include_base64)
+                return shape_creation_response(result, response_mode)
         
         # === FAZA 1: ZAAWANSOWANA ANALIZA OPISU ===
-        print("📊 Faza 1: Inteligentna analiza opisu...")
-        enhanced_analysis = await self.description_analyzer.analyze_description(description, domain)
-        
-        # Aktualizuj domenę i złożoność na podstawie AI analizy
-        detected_domain = enhanced_analysis["enhanced_analysis"]["detected_domain"]
-        detected_complexity = enhanced_analysis["enhanced_analysis"]["complexity_level"]
-        
-        if domain == "general":
-            domain = detected_domain
-            print(f"🎯 AI wykryła domenę: {domain}")
-        if complexity == "medium":
-            complexity = detected_complexity  
-            print(f"⚖️ AI wykryła złożoność: {complexity}")
+        async def analyze(r):
+            if analysis_cache is not None:
+                # Ta sama analiza dla identycznych opisów w partii - także gdy jeszcze trwa
+                pending = analysis_cache.get((description, domain))
+                if pending is None:
+                    pending = asyncio.ensure_future(self.description_analyzer.analyze_description(description, domain))
+                    analysis_cache[(description, domain)] = pending
+                enhanced_analysis = copy.deepcopy(await pending)
+            else:
+                enhanced_analysis = await self.description_analyzer.analyze_description(description, domain)
+            
+            # Aktualizuj domenę i złożoność na podstawie AI analizy
+            detected_domain = enhanced_analysis["enhanced_analysis"]["detected_domain"]
+            detected_complexity = enhanced_analysis["enhanced_analysis"]["complexity_level"]
+            final_domain, final_complexity = domain, complexity
+            
+            if domain == "general":
+                final_domain = detected_domain
+                logger.debug("AI wykryła domenę: %s", final_domain)
+            if complexity == "medium":
+                final_complexity = detected_complexity  
+                logger.debug("AI wykryła złożoność: %s", final_complexity)
+            
+            return {
+                "enhanced_analysis": enhanced_analysis,
+                "domain": final_domain,
+                "complexity": final_complexity,
+                "detected_domain": detected_domain,
+                "detected_complexity": detected_complexity
+            }
         
         # === FAZA 2: INTELIGENTNY DOBÓR KOMPONENTÓW ===
-        print("🔧 Faza 2: Inteligentny dobór komponentów...")
-        smart_components = await self._intelligent_component_selection(
-            description, domain, complexity, enhanced_analysis
-        )
+        async def select_components(r):
+            analysis = r["analysis"]
+            return await self._intelligent_component_selection(
+                description, analysis["domain"], analysis["complexity"], analysis["enhanced_analysis"]
+            )
         
         # === FAZA 3: SMART CONTEXT SUGGESTIONS ===
-        print("🧠 Faza 3: Pobieranie AI suggestions z learned patterns...")
-        existing_component_ids = [c["component_id"] for c in smart_components]
-        context_suggestions = await self.smart_context.get_smart_component_suggestions(
-            description, domain, existing_component_ids
-        )
+        async def suggest(r):
+            # Zależy od fazy 2 - sugestie pomijają już wybrane komponenty
+            existing_component_ids = [c["component_id"] for c in r["components"]]
+            return await self.smart_context.get_smart_component_suggestions(
+                description, r["analysis"]["domain"], existing_component_ids
+            )
         
         # === FAZA 4: MERGE KOMPONENTÓW ===
-        print("🔗 Faza 4: Łączenie komponentów z AI suggestions...")
-        enhanced_components = await self._merge_component_suggestions(
-            smart_components, context_suggestions
-        )
+        async def merge(r):
+            return await self._merge_component_suggestions(r["components"], r["suggestions"])
         
         # === FAZA 5: AUTO-KONFIGURACJA WSZYSTKICH KOMPONENTÓW ===
-        print("⚙️ Faza 5: Automatyczna konfiguracja komponentów...")
-        auto_configured_components = await self._auto_configure_all_components(
-            enhanced_components, domain, description, enhanced_analysis
-        )
+        async def configure(r):
+            analysis = r["analysis"]
+            return await self._auto_configure_all_components(
+                r["merged_components"], analysis["domain"], description, analysis["enhanced_analysis"]
+            )
         
         # === FAZA 6: INTELIGENTNY WORKFLOW ===
-        print("🔀 Faza 6: Generowanie inteligentnego workflow...")
-        intelligent_workflow = await self._create_intelligent_workflow(
-            auto_configured_components, domain, enhanced_analysis
-        )
+        async def build_workflow(r):
+            analysis = r["analysis"]
+            return await self._create_intelligent_workflow(
+                r["configured_components"], analysis["domain"], analysis["enhanced_analysis"]
+            )
         
-        # === FAZA 7: AUTO-WALIDACJA I POPRAWKI ===
-        print("✅ Faza 7: Auto-walidacja i naprawy...")
-        
-        # Stwórz kompletnego agenta
-        agent = {
-            "id": agent_id,
-            "name": name,
-            "description": description,
-            "domain": domain,
-            "complexity": complexity,
-            "status": "draft",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "components": auto_configured_components,
-            "workflow": intelligent_workflow,
-            "configuration": {
-                "inputs": enhanced_analysis["io_requirements"]["inputs"],
-                "outputs": enhanced_analysis["io_requirements"]["outputs"],
-                "triggers": ["user_message"],
-                "response_style": await self._detect_response_style(domain, description)
-            },
-            "ai_analysis": {
-                "confidence_score": enhanced_analysis["enhanced_analysis"]["confidence_score"],
-                "implicit_requirements": enhanced_analysis["implicit_requirements"],
-                "smart_suggestions": enhanced_analysis["smart_suggestions"],
-                "workflow_patterns": enhanced_analysis["workflow_patterns"],
-                "auto_detected_domain": detected_domain != domain,
-                "auto_detected_complexity": detected_complexity != complexity
-            },
-            "metrics": {
-                "test_runs": 0,
-                "deployments": 0,
-                "last_tested": None,
-                "intelligence_score": await self._calculate_intelligence_score(enhanced_analysis),
-                "readiness_score": await self._calculate_readiness_score(auto_configured_components, intelligent_workflow)
-            }
-        }
+        # Fazy pomocnicze - zależą tylko od analizy lub gotowego workflow
+        async def response_style(r):
+            return await self._detect_response_style(r["analysis"]["domain"], description)
         
-        # === FAZA 8: FINAL VALIDATION & FIXES ===
-        validation_result = await self._comprehensive_auto_validation(agent)
+        async def intelligence_score(r):
+            return await self._calculate_intelligence_score(r["analysis"]["enhanced_analysis"])
         
-        self.agents[agent_id] = agent
+        async def readiness_score(r):
+            return await self._calculate_readiness_score(r["configured_components"], r["workflow"])
         
-        print(f"✨ Agent '{name}' utworzony z pełną inteligencją AI!")
+        # === FAZA 7-8: SKŁADANIE, AUTO-WALIDACJA I ZAPIS ===
+        async def assemble_and_store(r):
+            analysis = r["analysis"]
+            enhanced_analysis = analysis["enhanced_analysis"]
+            final_domain = analysis["domain"]
+            final_complexity = analysis["complexity"]
+            
+            # Stwórz kompletnego agenta
+            agent = {
+                "id": agent_id,
+                "name": name,
+                "description": description,
+                "domain": final_domain,
+                "complexity": final_complexity,
+                "status": "draft",
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+                "components": r["configured_components"],
+                "workflow": r["workflow"],
+                "configuration": {
+                    "inputs": enhanced_analysis["io_requirements"]["inputs"],
+                    "outputs": enhanced_analysis["io_requirements"]["outputs"],
+                    "triggers": ["user_message"],
+                    "response_style": r["response_style"]
+                },
+                "ai_analysis": {
+                    "confidence_score": enhanced_analysis["enhanced_analysis"]["confidence_score"],
+                    "implicit_requirements": enhanced_analysis["implicit_requirements"],
+                    "smart_suggestions": enhanced_analysis["smart_suggestions"],
+                    "workflow_patterns": enhanced_analysis["workflow_patterns"],
+                    "auto_detected_domain": analysis["detected_domain"] != final_domain,
+                    "auto_detected_complexity": analysis["detected_complexity"] != final_complexity
+                },
+                "metrics": {
+                    "test_runs": 0,
+                    "deployments": 0,
+                    "last_tested": None,
+                    "intelligence_score": r["intelligence_score"],
+                    "readiness_score": r["readiness_score"]
+                }
+            }
+            
+            # === FAZA 8: FINAL VALIDATION & FIXES ===
+            validation_result = await self._comprehensive_auto_validation(agent)
+            # Liczniki liczone raz - kolejne zmiany aktualizują je przyrostowo
+            agent["metrics"]["counters"] = agent_counters.compute_counters(agent)
+            
+            version = await self.store.put(agent, event="create")
+            
+            return {"agent": agent, "validation": validation_result, "version": version}
         
         # === FAZA 9: AUTOMATYCZNE GENEROWANIE INTERFEJSU CHATU ===
-        print("💬 Faza 9: Automatyczne generowanie interfejsu chatu...")
-        chat_interface = None
-        try:
-            from .deployer import AgentDeployer
-            deployer = AgentDeployer()
-            chat_interface = await deployer.generate_chat_interface(agent_id, "modern")
-            print(f"✅ Interfejs chatu wygenerowany pomyślnie!")
-        except Exception as e:
-            print(f"⚠️ Nie udało się wygenerować interfejsu chatu: {e}")
+        async def chat_interface(r):
+            if not generate_chat_interface:
+                return None
+            try:
+                return await self.deployer.generate_chat_interface(agent_id, "modern", agent=r["stored"]["agent"],
+                                                                   include_base64=include_base64)
+            except Exception as e:
+                logger.warning("Nie udało się wygenerować interfejsu chatu: %s", e, extra={"agent_id": agent_id})
+                return None
+        
+        async def next_steps(r):
+            return await self._generate_intelligent_next_steps(
+                r["stored"]["agent"], r["analysis"]["enhanced_analysis"]
+            )
+        
+        async def estimated_performance(r):
+            return await self._estimate_agent_performance(r["stored"]["agent"])
+        
+        pipeline = (PhasePipeline()
+                    .add("analysis", analyze)
+                    .add("components", select_components, after=["analysis"])
+                    .add("response_style", response_style, after=["analysis"])
+                    .add("intelligence_score", intelligence_score, after=["analysis"])
+                    .add("suggestions", suggest, after=["components"])
+                    .add("merged_components", merge, after=["components", "suggestions"])
+                    .add("configured_components", configure, after=["merged_components"])
+                    .add("workflow", build_workflow, after=["configured_components"])
+                    .add("readiness_score", readiness_score, after=["configured_components", "workflow"])
+                    .add("stored", assemble_and_store,
+                         after=["workflow", "response_style", "intelligence_score", "readiness_score"])
+                    .add("chat_interface", chat_interface, after=["stored"])
+                    .add("next_steps", next_steps, after=["stored"])
+                    .add("estimated_performance", estimated_performance, after=["stored"]))
+        r, phase_timings = await pipeline.run()
+        
+        analysis = r["analysis"]
+        enhanced_analysis = analysis["enhanced_analysis"]
+        agent = r["stored"]["agent"]
+        auto_configured_components = r["configured_components"]
+        
+        outcome = {
+            "ai_enhancements": {
+                "detected_domain": analysis["detected_domain"],
+                "detected_complexity": analysis["detected_complexity"],
+                "total_components_added": len(auto_configured_components),
+                "auto_configured_components": agent["metrics"]["counters"]["auto_configured_count"],
+                "smart_suggestions_applied": len(r["suggestions"]),
+                "implicit_requirements_detected": len(enhanced_analysis["implicit_requirements"]),
+                "intelligence_score": agent["metrics"]["intelligence_score"],
+                "readiness_score": agent["metrics"]["readiness_score"],
+                "confidence_score": enhanced_analysis["enhanced_analysis"]["confidence_score"]
+            },
+            "auto_improvements": r["stored"]["validation"],
+            "next_steps": r["next_steps"],
+            "estimated_performance": r["estimated_performance"]
+        }
+        
+        if blueprint_key is not None:
+            # Wynik faz 1-8 zależy tylko od klucza - zapamiętaj go jako szkielet
+            self.blueprint_cache.put(blueprint_key, AgentBlueprint(
+                copy.deepcopy(agent), source="create_agent", attachments=copy.deepcopy(outcome)
+            ))
+        
+        result = self._creation_result(agent, outcome, r["chat_interface"], phase_timings, r["stored"]["version"])
+        return shape_creation_response(result, response_mode)
+    
+    async def _create_from_blueprint(self, blueprint: "AgentBlueprint", agent_id: str, name: str,
+                                     generate_chat_interface: bool, include_base64: bool = True) -> Dict[str, Any]:
+        """Trafienie w cache szkieletów: świeże id, zapis i (opcjonalnie) interfejs chatu"""
+        started = time.perf_counter()
+        agent, outcome = blueprint.instantiate_with_attachments(agent_id, name=name)
+        version = await self.store.put(agent, event="create")
+        phase_timings = {"blueprint_clone": round((time.perf_counter() - started) * 1000, 3)}
         
+        chat_interface = None
+        if generate_chat_interface:
+            chat_started = time.perf_counter()
+            try:
+                chat_interface = await self.deployer.generate_chat_interface(agent_id, "modern", agent=agent,
+                                                                             include_base64=include_base64)
+            except Exception as e:
+                logger.warning("Nie udało się wygenerować interfejsu chatu: %s", e, extra={"agent_id": agent_id})
+            phase_timings["chat_interface"] = round((time.perf_counter() - chat_started) * 1000, 3)
+        phase_timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+        
+        result = self._creation_result(agent, outcome, chat_interface, phase_timings, version)
+        result["from_blueprint_cache"] = True
+        return result
+    
+    def _creation_result(self, agent: Dict[str, Any], outcome: Dict[str, Any],
+                         chat_interface: Optional[Dict[str, Any]],
+                         phase_timings: Dict[str, float], version: Optional[int] = None) -> Dict[str, Any]:
+        """Odpowiedź create_agent - wspólna dla pełnego pipeline i cache szkieletów"""
+        name = agent["name"]
+        logger.info("Agent created", extra={
+            "agent_id": agent["id"],
+            "domain": agent["domain"],
+            "components": len(agent["components"]),
+            "phase_timings_ms": phase_timings
+        })
         result = {
             "success": True,
-            "agent_id": agent_id,
+            "agent_id": agent["id"],
+            "version_tag": version_tag(version),
             "message": f"Agent '{name}' został utworzony z zaawansowaną inteligencją AI i gotowym interfejsem chatu",
             "ready_to_use": True,
             "agent": {
-                "id": agent_id,
+                "id": agent["id"],
                 "name": name,
-                "description": description,
-                "domain": domain,
-                "complexity": complexity,
-                "components": auto_configured_components,
+                "description": agent["description"],
+                "domain": agent["domain"],
+                "complexity": agent["complexity"],
+                "components": agent["components"],
                 "status": "ready_to_deploy"
             },
-            "ai_enhancements": {
-                "detected_domain": detected_domain,
-                "detected_complexity": detected_complexity,
-                "total_components_added": len(auto_configured_components),
-                "auto_configured_components": len([c for c in auto_configured_components if c.get("auto_configured")]),
-                "smart_suggestions_applied": len(context_suggestions),
-                "implicit_requirements_detected": len(enhanced_analysis["implicit_requirements"]),
-                "intelligence_score": agent["metrics"]["intelligence_score"],
-                "readiness_score": agent["metrics"]["readiness_score"],
-                "confidence_score": enhanced_analysis["enhanced_analysis"]["confidence_score"]
-            },
-            "auto_improvements": validation_result,
-            "next_steps": await self._generate_intelligent_next_steps(agent, enhanced_analysis),
-            "estimated_performance": await self._estimate_agent_performance(agent)
+            **outcome,
+            "phase_timings_ms": phase_timings
         }
         
         # Add chat interface to result if successfully generated
@@ -225,7 +498,7 @@ class EnhancedAgentManager:
                 "generated": True,
                 "download_ready": True,
                 "filename": chat_interface["filename"],
-                "download_base64": chat_interface["download_base64"],
+                "download_base64": chat_interface.get("download_base64"),
                 "file_path": chat_interface.get("file_path"),
                 "file_url": chat_interface.get("file_url"),
                 "download_link": chat_interface.get("download_link"),
@@ -235,11 +508,6 @@ class EnhancedAgentManager:
                           (f" Dostępny pod linkiem: {chat_interface.get('download_link', 'N/A')}" 
                            if chat_interface.get("file_saved") else "")
             }
-            if chat_interface.get("file_saved"):
-                print(f"🎉 KOMPLETNY AGENT GOTOWY! Plik zapisany: {chat_interface['filename']}")
-                print(f"🔗 Link do pobrania: {chat_interface.get('download_link', 'N/A')}")
-            else:
-                print(f"🎉 KOMPLETNY AGENT GOTOWY! Nazwa pliku: {chat_interface['filename']}")
         else:
             result["chat_interface"] = {
                 "generated": False,
@@ -248,6 +516,177 @@ class EnhancedAgentManager:
         
         return result
     
+    async def create_agents(self, specs: List[Dict[str, Any]], concurrency: int = 8,
+                            generate_chat_interface: bool = False,
+                            on_result=None, use_blueprint_cache: bool = True) -> Dict[str, Any]:
+        """Tworzy wielu agentów naraz z ograniczoną równoległością.
+
+        specs to lista {"name", "description", "domain"?, "complexity"?}. Analiza identycznych
+        opisów jest wykonywana raz na partię. on_result(entry, done, total) jest wywoływane
+        po każdym agencie (np. powiadomienia o postępie MCP). Wynik to zwięzłe podsumowanie.
+        """
+        if len(specs) > MAX_BATCH_SIZE:
+            return {
+                "success": False,
+                "error": f"Maksymalnie {MAX_BATCH_SIZE} agentów w jednym wywołaniu (otrzymano {len(specs)})"
+            }
+        
+        concurrency = max(1, min(int(concurrency), MAX_BATCH_CONCURRENCY))
+        total = len(specs)
+        entries: List[Optional[Dict[str, Any]]] = [None] * total
+        analysis_cache: Dict[Any, asyncio.Future] = {}
+        next_index = iter(range(total))
+        done = 0
+        started = time.perf_counter()
+        
+        async def create_one(index: int) -> Dict[str, Any]:
+            spec = specs[index]
+            if not isinstance(spec, dict) or not spec.get("name") or not spec.get("description"):
+                return {"index": index, "success": False, "error": "Spec wymaga pól 'name' i 'description'"}
+            try:
+                result = await self.create_agent(
+                    name=spec["name"],
+                    description=spec["description"],
+                    domain=spec.get("domain", "general"),
+                    complexity=spec.get("complexity", "medium"),
+                    generate_chat_interface=generate_chat_interface,
+                    analysis_cache=analysis_cache,
+                    use_blueprint_cache=use_blueprint_cache
+                )
+            except Exception as e:
+                return {"index": index, "name": spec.get("name"), "success": False, "error": str(e)}
+            if not result.get("success"):
+                return {"index": index, "name": spec["name"], "success": False, "error": result.get("error")}
+            return {
+                "index": index,
+                "success": True,
+                "agent_id": result["agent_id"],
+                "name": spec["name"],
+                "domain": result["agent"]["domain"],
+                "components": len(result["agent"]["components"]),
+                "intelligence_score": result["ai_enhancements"]["intelligence_score"]
+            }
+        
+        async def worker():
+            nonlocal done
+            for index in next_index:
+                entry = await create_one(index)
+                entries[index] = entry
+                done += 1
+                if on_result is not None:
+                    try:
+                        await on_result(entry, done, total)
+                    except Exception as e:
+                        logger.warning("Progress callback failed: %s", e)
+        
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        
+        elapsed = time.perf_counter() - started
+        created = [e for e in entries if e["success"]]
+        failed = [e for e in entries if not e["success"]]
+        return {
+            "success": not failed,
+            "requested": total,
+            "created": len(created),
+            "failed": len(failed),
+            "agents": [{k: v for k, v in e.items() if k != "success"} for e in created],
+            "errors": failed,
+            "unique_analyses": len(analysis_cache),
+            "concurrency": concurrency,
+            "duration_ms": round(elapsed * 1000, 1),
+            "agents_per_second": round(total / elapsed, 1) if elapsed > 0 else None
+        }
+    
+    def _blueprint_key(self, description: str, domain: str, complexity: str) -> tuple:
+        """Klucz cache szkieletów: hash treści specyfikacji + generacje katalogu i modelu"""
+        digest = hashlib.blake2b(
+            json.dumps([description, domain, complexity], ensure_ascii=False).encode("utf-8"),
+            digest_size=16
+        ).digest()
+        return (digest, self.catalog_fingerprint, getattr(self.smart_context, "model_generation", 0))
+    
+    def get_blueprint_cache_stats(self) -> Dict[str, Any]:
+        if self.blueprint_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.blueprint_cache.get_stats()}
+    
+    async def create_agent_from_template(self, template_id: str, overrides: Optional[Dict[str, Any]] = None,
+                                         generate_chat_interface: bool = False) -> Dict[str, Any]:
+        """Szybka ścieżka: agent z gotowego szablonu workflow, bez analizy i doboru komponentów.
+
+        overrides: name, description, domain, complexity oraz component_config
+        ({component_id: {klucz: wartość}}) dołączane do konfiguracji komponentów.
+        """
+        blueprint = self.workflow_manager.get_blueprint(template_id)
+        if blueprint is None:
+            return {
+                "success": False,
+                "error": f"Szablon {template_id} nie istnieje",
+                "available_templates": self.workflow_manager.template_ids
+            }
+        
+        if overrides is not None and not isinstance(overrides, dict):
+            return {"success": False, "error": "overrides musi być obiektem JSON",
+                    "allowed_overrides": list(TEMPLATE_OVERRIDES)}
+        overrides = dict(overrides or {})
+        unknown = [key for key in overrides if key not in TEMPLATE_OVERRIDES]
+        if unknown:
+            return {
+                "success": False,
+                "error": f"Nieobsługiwane nadpisania: {unknown}",
+                "allowed_overrides": list(TEMPLATE_OVERRIDES)
+            }
+        
+        component_config = overrides.pop("component_config", None) or {}
+        if not isinstance(component_config, dict) or not all(
+                isinstance(config, dict) for config in component_config.values()):
+            return {
+                "success": False,
+                "error": "component_config musi mieć postać {component_id: {klucz: wartość}}"
+            }
+        agent = blueprint.instantiate(**overrides)
+        for entity in agent["components"] + agent["workflow"]["nodes"]:
+            entity_type = entity.get("component_id", entity.get("type"))
+            if entity_type in component_config:
+                entity["configuration"].update(component_config[entity_type])
+        
+        counters = agent_counters.compute_counters(agent)
+        agent["metrics"] = {
+            "test_runs": 0,
+            "deployments": 0,
+            "last_tested": None,
+            "intelligence_score": TEMPLATE_INTELLIGENCE_SCORE,
+            "readiness_score": agent_counters.readiness_score(counters),
+            "counters": counters
+        }
+        version = await self.store.put(agent, event="create")
+        
+        result = {
+            "success": True,
+            "agent_id": agent["id"],
+            "version_tag": version_tag(version),
+            "template_id": template_id,
+            "message": f"Agent '{agent['name']}' utworzony z szablonu {template_id}",
+            "agent": {
+                "id": agent["id"],
+                "name": agent["name"],
+                "domain": agent["domain"],
+                "complexity": agent["complexity"],
+                "components": [c["component_id"] for c in agent["components"]],
+                "workflow_nodes": len(agent["workflow"]["nodes"]),
+                "status": agent["status"]
+            },
+            "metrics": agent["metrics"]
+        }
+        if generate_chat_interface:
+            interface = await self.deployer.generate_chat_interface(agent["id"], "modern", agent=agent)
+            result["chat_interface"] = {
+                "generated": interface.get("success", False),
+                "filename": interface.get("filename"),
+                "download_link": interface.get("download_link")
+            }
+        return result
+    
     async def _intelligent_component_selection(self, description: str, domain: str, 
                                              complexity: str, analysis: Dict) -> List[Dict[str, Any]]:
         """INTELIGENTNY dobór komponentów z AI reasoning"""
@@ -257,7 +696,7 @@ class EnhancedAgentManager:
         # === ZAWSZE DODAJ PODSTAWOWE KOMPONENTY ===
         basic_components = await self._add_essential_components(domain)
         selected_components.extend(basic_components)
-        print(f"✅ Dodano {len(basic_components)} essential komponentów")
+        logger.debug("Dodano %d essential komponentów", len(basic_components))
         
         # === KOMPONENTY NA PODSTAWIE IMPLICIT REQUIREMENTS ===
         implicit_components_added = 0
@@ -267,7 +706,7 @@ class EnhancedAgentManager:
                     component_info = await self._get_component_info(comp_id)
                     if component_info:
                         selected_components.append({
-                            "id": str(uuid.uuid4()),
+                            "id": new_id(),
                             "component_id": comp_id,
                             "name": component_info["name"],
                             "reason": f"AI wykryła: {requirement['reasoning']}",
@@ -278,20 +717,20 @@ class EnhancedAgentManager:
                         })
                         implicit_components_added += 1
         
-        print(f"🔍 AI wykryła {implicit_components_added} ukrytych komponentów")
+        logger.debug("AI wykryła %d ukrytych komponentów", implicit_components_added)
         
         # === KOMPONENTY NA PODSTAWIE WORKFLOW PATTERNS ===
         workflow_components = await self._add_workflow_pattern_components(
             analysis["workflow_patterns"]
         )
         selected_components.extend(workflow_components)
-        print(f"🔀 Dodano {len(workflow_components)} komponentów workflow")
+        logger.debug("Dodano %d komponentów workflow", len(workflow_components))
         
         # === KOMPONENTY DLA WYSOKIEJ ZŁOŻONOŚCI ===
         if complexity == "complex":
             advanced_components = await self._add_advanced_components(domain)
             selected_components.extend(advanced_components)
-            print(f"🚀 Dodano {len(advanced_components)} zaawansowanych komponentów")
+            logger.debug("Dodano %d zaawansowanych komponentów", len(advanced_components))
         
         # Usuń duplikaty zachowując najwyższą confidence
         unique_components = {}
@@ -301,7 +740,7 @@ class EnhancedAgentManager:
                 unique_components[comp_id] = comp
         
         final_components = list(unique_components.values())
-        print(f"🎯 Finalne komponenty: {len(final_components)} (usunięto duplikaty)")
+        logger.debug("Finalne komponenty: %d (usunięto duplikaty)", len(final_components))
         
         return final_components
     
@@ -310,7 +749,7 @@ class EnhancedAgentManager:
         
         essential = [
             {
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "pollinations_llm",  # Bezpłatny model jako default
                 "name": "Główny Generator Odpowiedzi",
                 "reason": "Podstawowy komponent AI - bezpłatny model",
@@ -319,7 +758,7 @@ class EnhancedAgentManager:
                 "position": 1
             },
             {
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "input_processor",
                 "name": "Procesor Wejścia",
                 "reason": "Obsługa i walidacja danych wejściowych",
@@ -328,7 +767,7 @@ class EnhancedAgentManager:
                 "position": 0
             },
             {
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "output_processor", 
                 "name": "Procesor Wyjścia",
                 "reason": "Formatowanie i optymalizacja odpowiedzi",
@@ -393,7 +832,7 @@ class EnhancedAgentManager:
         if domain in domain_essentials:
             for comp_info in domain_essentials[domain]:
                 essential.append({
-                    "id": str(uuid.uuid4()),
+                    "id": new_id(),
                     "component_id": comp_info["component_id"],
                     "name": comp_info["name"],
                     "reason": comp_info["reason"],
@@ -442,7 +881,7 @@ class EnhancedAgentManager:
             if pattern in pattern_mapping:
                 comp_info = pattern_mapping[pattern]
                 pattern_components.append({
-                    "id": str(uuid.uuid4()),
+                    "id": new_id(),
                     "component_id": comp_info["component_id"],
                     "name": comp_info["name"],
                     "reason": comp_info["reason"],
@@ -471,7 +910,7 @@ class EnhancedAgentManager:
                 component_info = await self._get_component_info(comp_id)
                 if component_info:
                     merged.append({
-                        "id": str(uuid.uuid4()),
+                        "id": new_id(),
                         "component_id": comp_id,
                         "name": component_info["name"],
                         "reason": suggestion["reason"],
@@ -484,7 +923,7 @@ class EnhancedAgentManager:
                     existing_ids.add(comp_id)
                     added_from_suggestions += 1
         
-        print(f"🎓 Dodano {added_from_suggestions} komponentów z learned patterns")
+        logger.debug("Dodano %d komponentów z learned patterns", added_from_suggestions)
         return merged
     
     async def _auto_configure_all_components(self, components: List[Dict], domain: str, 
@@ -534,7 +973,7 @@ class EnhancedAgentManager:
                 "configuration_source": "ai_optimized" if len(config) > 0 else "default"
             })
         
-        print(f"⚙️ Auto-skonfigurowano {total_configured}/{len(components)} komponentów")
+        logger.debug("Auto-skonfigurowano %d/%d komponentów", total_configured, len(components))
         return auto_configured
     
     async def _advanced_llm_configuration(self, description: str, domain: str, analysis: Dict) -> Dict[str, Any]:
@@ -666,8 +1105,6 @@ class EnhancedAgentManager:
                                          analysis: Dict) -> Dict[str, Any]:
         """Tworzy INTELIGENTNY workflow z automatycznymi połączeniami i optymalizacjami"""
         
-        print("🔀 Generowanie inteligentnego workflow...")
-        
         # Sortuj komponenty według pozycji i logicznej kolejności
         sorted_components = sorted(components, key=lambda x: x.get("position", 0))
         
@@ -722,7 +1159,8 @@ class EnhancedAgentManager:
             "execution_strategy": await self._determine_execution_strategy(nodes, analysis)
         }
         
-        print(f"✅ Workflow: {len(nodes)} węzłów, {len(connections)} połączeń, {len(error_handling)} error handlers")
+        logger.debug("Workflow: %d węzłów, %d połączeń, %d error handlers",
+                     len(nodes), len(connections), len(error_handling))
         
         return workflow
     
@@ -740,7 +1178,7 @@ class EnhancedAgentManager:
         # Auto-dodawanie brakujących elementów
         if not has_input:
             enhanced.insert(0, {
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "advanced_input_processor",
                 "name": "🔄 Auto: Advanced Input Handler",
                 "reason": "Automatycznie dodany - kompleksowa obsługa wejścia",
@@ -759,7 +1197,7 @@ class EnhancedAgentManager:
             
             if handles_sensitive_data:
                 enhanced.insert(1, {
-                    "id": str(uuid.uuid4()),
+                    "id": new_id(),
                     "component_id": "advanced_input_validator",
                     "name": "🔒 Auto: Security Validator", 
                     "reason": "Automatycznie dodany - agent obsługuje dane wrażliwe",
@@ -771,7 +1209,7 @@ class EnhancedAgentManager:
         
         if not has_error_handling:
             enhanced.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "smart_error_handler",
                 "name": "⚠️ Auto: Smart Error Handler",
                 "reason": "Automatycznie dodany - comprehensive error handling",
@@ -812,106 +1250,278 @@ class EnhancedAgentManager:
         return min(100, max(0, score))
     
     async def _calculate_readiness_score(self, components: List[Dict], workflow: Dict) -> int:
-        """Oblicza wskaźnik gotowości do wdrożenia"""
-        score = 30  # Baza
-        
-        # Punkty za komponenty
-        score += min(40, len(components) * 5)
-        
-        # Punkty za auto-konfigurację
-        auto_configured = len([c for c in components if c.get("auto_configured")])
-        score += auto_configured * 3
-        
-        # Punkty za workflow features
-        if workflow.get("error_handling"):
-            score += 10
-        if workflow.get("connections"):
-            score += 10
-        
-        return min(100, score)
+        """Oblicza wskaźnik gotowości do wdrożenia (dla istniejącego agenta: liczniki z metrics)"""
+        counters = agent_counters.compute_counters({"components": components, "workflow": workflow})
+        return agent_counters.readiness_score(counters)
     
-    async def get_agent(self, agent_id: str) -> Dict[str, Any]:
-        """Pobiera szczegóły agenta z AI insights"""
-        
-        if agent_id not in self.agents:
+    async def get_agent(self, agent_id: str, include: Optional[List[str]] = None,
+                        version: Optional[int] = None,
+                        if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """Pobiera szczegóły agenta z AI insights.
+
+        include ogranicza dokument agenta do wskazanych pól (np. ["metrics", "workflow.nodes"]).
+        version zwraca wskazaną rewizję zamiast bieżącej (patrz list_agent_revisions).
+        if_none_match (version_tag z poprzedniej odpowiedzi) daje krótką odpowiedź
+        "not_modified", gdy agent się nie zmienił - bez odczytu dokumentu.
+        """
+        
+        latest_version = await self.store.get_version(agent_id)
+        if (latest_version is not None and version is None and if_none_match is not None
+                and parse_version_tag(if_none_match) == latest_version):
             return {
-                "success": False,
-                "error": f"Agent o ID {agent_id} nie został znaleziony"
+                "success": True,
+                "not_modified": True,
+                "agent_id": agent_id,
+                "version_tag": version_tag(latest_version)
             }
+        agent, version, error = await self._load_revision(agent_id, version, latest_version)
+        if error:
+            return error
         
-        agent = self.agents[agent_id]
+        # Agenci sprzed liczników dostają je dopiero przy następnej zmianie
+        counters = agent.get("metrics", {}).get("counters") or agent_counters.compute_counters(agent)
         
-        # Dodaj real-time AI insights
-        ai_insights = agent.get("ai_analysis", {})
+        # Dodaj real-time AI insights (kopia - nie zmieniamy zapisanego dokumentu)
+        ai_insights = dict(agent.get("ai_analysis", {}))
         ai_insights["current_intelligence_score"] = agent.get("metrics", {}).get("intelligence_score", 0)
         ai_insights["readiness_score"] = agent.get("metrics", {}).get("readiness_score", 0)
         
-        return {
+        result = {
             "success": True,
             "agent": agent,
+            "version": version,
+            "latest_version": latest_version,
+            "version_tag": version_tag(version),
             "ai_insights": ai_insights,
             "performance_stats": {
-                "total_components": len(agent.get("components", [])),
-                "auto_configured_components": len([c for c in agent.get("components", []) if c.get("auto_configured")]),
+                "total_components": counters["component_count"],
+                "auto_configured_components": counters["auto_configured_count"],
+                "llm_nodes": counters["llm_node_count"],
+                "error_handlers": counters["error_handler_count"],
                 "workflow_nodes": len(agent.get("workflow", {}).get("nodes", [])),
                 "intelligence_level": "Advanced" if ai_insights.get("current_intelligence_score", 0) > 80 else "Standard"
             }
         }
+        if include:
+            result["agent"] = {"id": agent["id"], **project_fields(agent, include)}
+            result["fields_included"] = include
+        return result
     
-    async def list_agents(self, filter_domain: str = None, filter_status: str = None) -> Dict[str, Any]:
-        """Lista agentów posortowana według Intelligence Score"""
-        
-        filtered_agents = []
+    async def _load_revision(self, agent_id: str, version: Optional[int], latest_version: Optional[int] = None):
+        """(dokument, numer rewizji, odpowiedź błędu) - bez version bieżąca rewizja.
+
+        latest_version pozwala pominąć ponowny odczyt numeru, gdy wywołujący już go zna.
+        """
+        if latest_version is None:
+            latest_version = await self.store.get_version(agent_id)
+        if latest_version is None:
+            return None, None, {"success": False, "error": f"Agent o ID {agent_id} nie został znaleziony"}
+        if version is None or version == latest_version:
+            return await self.store.get(agent_id), latest_version, None
+        agent = await self.store.get_revision(agent_id, version)
+        if agent is None:
+            return None, None, {"success": False, "error": f"Rewizja {version} agenta {agent_id} nie jest dostępna",
+                                "latest_version": latest_version}
+        return agent, version, None
+    
+    async def diff_agents(self, agent_a: str, agent_b: Optional[str] = None,
+                          version_a: Optional[int] = None, version_b: Optional[int] = None) -> Dict[str, Any]:
+        """Strukturalny diff dwóch agentów lub dwóch rewizji jednego agenta (a -> b).
+
+        Bez agent_b porównywane są rewizje agent_a: version_a (domyślnie poprzednia)
+        z version_b (domyślnie bieżąca).
+        """
+        started = time.perf_counter()
+        if agent_b is None:
+            agent_b = agent_a
+            if version_a is None:
+                latest_version = await self.store.get_version(agent_a)
+                if latest_version is None:
+                    return {"success": False, "error": f"Agent o ID {agent_a} nie został znaleziony"}
+                version_a = max(1, (version_b or latest_version) - 1)
+        
+        old, old_version, error = await self._load_revision(agent_a, version_a)
+        if error:
+            return error
+        new, new_version, error = await self._load_revision(agent_b, version_b)
+        if error:
+            return error
         
-        for agent_id, agent in self.agents.items():
-            if filter_domain and agent.get("domain") != filter_domain:
-                continue
-            if filter_status and agent.get("status") != filter_status:
-                continue
-                
-            agent_summary = {
-                "id": agent_id,
-                "name": agent.get("name"),
-                "description": (agent.get("description", "")[:100] + "...") if len(agent.get("description", "")) > 100 else agent.get("description", ""),
-                "domain": agent.get("domain"),
-                "status": agent.get("status"),
-                "created_at": agent.get("created_at"),
-                "component_count": len(agent.get("components", [])),
-                "intelligence_score": agent.get("metrics", {}).get("intelligence_score", 0),
-                "readiness_score": agent.get("metrics", {}).get("readiness_score", 0),
-                "confidence_score": agent.get("ai_analysis", {}).get("confidence_score", 0),
-                "ai_enhanced": len(agent.get("ai_analysis", {})) > 0
+        return {
+            "success": True,
+            "a": {"agent_id": agent_a, "version_tag": version_tag(old_version)},
+            "b": {"agent_id": agent_b, "version_tag": version_tag(new_version)},
+            "diff": diff_agent_documents(old, new),
+            "diff_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    async def list_agent_revisions(self, agent_id: str) -> Dict[str, Any]:
+        """Lista przechowywanych rewizji agenta (od najstarszej)"""
+        revisions = await self.store.list_revisions(agent_id)
+        if revisions is None:
+            return {
+                "success": False,
+                "error": f"Agent o ID {agent_id} nie został znaleziony"
+            }
+        return {
+            "success": True,
+            "agent_id": agent_id,
+            "revisions": revisions,
+            "latest_version": revisions[-1]["version"]
+        }
+    
+    async def list_agents(self, filter_domain: str = None, filter_status: str = None,
+                          sort_by: str = "intelligence", page_size: Optional[int] = None,
+                          cursor: Optional[str] = None,
+                          include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Lista agentów z filtrami i sortowaniem (domyślnie według Intelligence Score).
+
+        Z page_size wynik jest stronicowany - next_cursor przekazany jako cursor zwraca
+        kolejną stronę z tymi samymi filtrami i sortowaniem. include ogranicza pola skrótów.
+        """
+        
+        after = None
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            # Kursor niesie filtry i sortowanie pierwszej strony
+            filter_domain, filter_status = position["domain"], position["status"]
+            sort_by, after = position["sort_by"], position["after"]
+        
+        # "all" (wartość domyślna narzędzia MCP) oznacza brak filtra
+        filter_domain = None if filter_domain in (None, "", "all") else filter_domain
+        filter_status = None if filter_status in (None, "", "all") else filter_status
+        
+        if sort_by not in SORT_OPTIONS:
+            return {
+                "success": False,
+                "error": f"Nieznane sortowanie: {sort_by}",
+                "available_sort_options": list(SORT_OPTIONS)
             }
-            filtered_agents.append(agent_summary)
         
-        # Sortuj według intelligence score (AI enhanced agents na górze)
-        filtered_agents.sort(key=lambda x: (x["intelligence_score"], x["confidence_score"]), reverse=True)
+        limit = None
+        if page_size is not None:
+            limit = max(1, min(int(page_size), MAX_PAGE_SIZE))
         
-        return {
+        # Jeden dodatkowy skrót mówi, czy istnieje następna strona
+        listing = await self.store.list_summaries(
+            filter_domain, filter_status, sort_by,
+            limit=None if limit is None else limit + 1, after=after
+        )
+        agents = listing["agents"]
+        next_cursor = None
+        if limit is not None and len(agents) > limit:
+            agents = agents[:limit]
+            next_cursor = encode_cursor(sort_by, filter_domain, filter_status, agents[-1])
+        total = listing["total"]
+        
+        if include:
+            agents = [{"id": a["id"], **project_fields(a, include)} for a in agents]
+        
+        result = {
             "success": True,
-            "agents": filtered_agents,
-            "total_count": len(filtered_agents),
-            "ai_enhanced_count": len([a for a in filtered_agents if a["ai_enhanced"]]),
-            "average_intelligence_score": sum(a["intelligence_score"] for a in filtered_agents) / len(filtered_agents) if filtered_agents else 0,
+            "agents": agents,
+            "total_count": total,
+            "ai_enhanced_count": listing["ai_enhanced"],
+            "average_intelligence_score": listing["intelligence_sum"] / total if total else 0,
             "filters_applied": {
                 "domain": filter_domain,
                 "status": filter_status
-            }
+            },
+            "sort_by": sort_by
         }
+        if limit is not None:
+            result["page_size"] = limit
+            result["next_cursor"] = next_cursor
+        return result
     
-    async def test_agent(self, agent_id: str, test_input: Dict[str, Any], 
-                        test_scenario: str = "default") -> Dict[str, Any]:
-        """Testuje agenta z zaawansowaną analizą i uczeniem się"""
-        
-        if agent_id not in self.agents:
+    async def search_agents(self, query: str, filter_domain: Optional[str] = None,
+                            limit: int = 10) -> Dict[str, Any]:
+        """Wyszukiwanie pełnotekstowe po nazwie, opisie, domenie i komponentach agentów"""
+        filter_domain = None if filter_domain in (None, "", "all") else filter_domain
+        limit = max(1, min(int(limit), MAX_SEARCH_RESULTS))
+        started = time.perf_counter()
+        agents = await self.store.search(query, filter_domain, limit)
+        return {
+            "success": True,
+            "query": query,
+            "agents": agents,
+            "count": len(agents),
+            "filters_applied": {"domain": filter_domain},
+            "search_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    async def find_similar_agents(self, agent_id: str, limit: int = 10,
+                                  min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Dict[str, Any]:
+        """Agenci podobni do danego (podobieństwo Jaccarda nazw, opisów, domeny i komponentów)"""
+        limit = max(1, min(int(limit), MAX_SEARCH_RESULTS))
+        started = time.perf_counter()
+        similar = await self.store.find_similar(agent_id, limit, min_similarity)
+        if similar is None:
             return {
                 "success": False,
                 "error": f"Agent o ID {agent_id} nie został znaleziony"
             }
+        return {
+            "success": True,
+            "agent_id": agent_id,
+            "similar_agents": similar,
+            "count": len(similar),
+            "min_similarity": min_similarity,
+            "search_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    async def _get_for_update(self, agent_id: str, if_match: Optional[str]):
+        """Agent do zmiany: (agent, oczekiwana wersja do put(), odpowiedź błędu).
+
+        Z if_match niezgodny znacznik kończy się konfliktem od razu, a zgodny jest
+        sprawdzany ponownie przy zapisie (optymistyczna współbieżność).
+        """
+        expected_version = None
+        if if_match is not None:
+            expected_version = parse_version_tag(if_match)
+            if expected_version is None:
+                return None, None, {"success": False, "error": f"Nieprawidłowy znacznik wersji: {if_match}"}
+            current_version = await self.store.get_version(agent_id)
+            if current_version is not None and current_version != expected_version:
+                return None, None, self._version_conflict(
+                    VersionConflictError(agent_id, expected_version, current_version))
+        agent = await self.store.get(agent_id)
+        if agent is None:
+            return None, None, {
+                "success": False,
+                "error": f"Agent o ID {agent_id} nie został znaleziony"
+            }
+        return agent, expected_version, None
+    
+    @staticmethod
+    def _version_conflict(error: VersionConflictError) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "conflict": True,
+            "error": f"Agent {error.agent_id} został zmieniony - pobierz aktualną wersję i ponów operację",
+            "expected_version_tag": version_tag(error.expected_version),
+            "current_version_tag": version_tag(error.current_version)
+        }
+    
+    async def test_agent(self, agent_id: str, test_input: Dict[str, Any], 
+                        test_scenario: str = "default", if_match: Optional[str] = None) -> Dict[str, Any]:
+        """Testuje agenta z zaawansowaną analizą i uczeniem się.
+
+        if_match (version_tag) zapisuje wynik tylko, jeśli agent nie zmienił się w międzyczasie.
+        """
+        async with self.store.lock(agent_id):
+            return await self._test_agent(agent_id, test_input, test_scenario, if_match)
+    
+    async def _test_agent(self, agent_id: str, test_input: Dict[str, Any],
+                          test_scenario: str, if_match: Optional[str]) -> Dict[str, Any]:
+        agent, expected_version, error = await self._get_for_update(agent_id, if_match)
+        if error:
+            return error
         
-        agent = self.agents[agent_id]
-        
-        print(f"🧪 Testowanie agenta '{agent['name']}'...")
+        logger.debug("Testowanie agenta %r", agent["name"], extra={"agent_id": agent_id})
         
         # === SYMULACJA WYKONANIA Z INTELLIGENCE TRACKING ===
         test_result = await self._advanced_agent_simulation(agent, test_input)
@@ -921,19 +1531,26 @@ class EnhancedAgentManager:
         agent["metrics"]["last_tested"] = datetime.now().isoformat()
         
         # === UCZENIE SIĘ Z WYNIKÓW ===
-        if test_result["success_rate"] > 80:
-            print("📚 Test udany - Smart Context uczy się z tego wzorca...")
+        test_succeeded = test_result["success_rate"] > 80
+        if test_succeeded:
+            logger.debug("Test udany - Smart Context uczy się z tego wzorca", extra={"agent_id": agent_id})
             
             # Zaktualizuj readiness score na podstawie testów
             agent["metrics"]["readiness_score"] = min(100, 
                 agent["metrics"].get("readiness_score", 50) + 10
             )
-            
-            # Naucz smart context z udanego agenta
-            await self.smart_context.learn_from_successful_agent(agent)
+        
+        try:
+            version = await self.store.put(agent, event="test", expected_version=expected_version)
+        except VersionConflictError as e:
+            return self._version_conflict(e)
+        
+        # Naucz smart context z udanego agenta dopiero po zapisie wersji - w tle, bez czekania na uczenie
+        learning_queued = await self.learning_worker.submit(agent) if test_succeeded else False
         
         return {
             "success": True,
+            "version_tag": version_tag(version),
             "test_scenario": test_scenario,
             "input": test_input,
             "output": test_result["output"],
@@ -947,12 +1564,138 @@ class EnhancedAgentManager:
             "intelligence_insights": {
                 "current_intelligence_score": agent["metrics"]["intelligence_score"], 
                 "readiness_score": agent["metrics"]["readiness_score"],
-                "learning_contribution": test_result["success_rate"] > 80,
+                "learning_contribution": test_succeeded,
+                "learning_queued": learning_queued,
                 "optimization_opportunities": await self._identify_optimization_opportunities(test_result)
             },
             "total_tests_run": agent["metrics"]["test_runs"]
         }
     
+    async def add_component_to_agent(self, agent_id: str, component_id: str,
+                                     configuration: Optional[Dict[str, Any]] = None,
+                                     if_match: Optional[str] = None) -> Dict[str, Any]:
+        """Dodaje komponent do agenta z inteligentną auto-konfiguracją.
+
+        if_match (version_tag) dodaje komponent tylko do niezmienionej wersji agenta.
+        """
+        async with self.store.lock(agent_id):
+            return await self._add_component_to_agent(agent_id, component_id, configuration, if_match)
+    
+    async def _add_component_to_agent(self, agent_id: str, component_id: str,
+                                      configuration: Optional[Dict[str, Any]],
+                                      if_match: Optional[str]) -> Dict[str, Any]:
+        agent, expected_version, error = await self._get_for_update(agent_id, if_match)
+        if error:
+            return error
+        
+        component_info = await self._get_component_info(component_id)
+        if not component_info:
+            return {
+                "success": False,
+                "error": f"Komponent '{component_id}' nie został znaleziony w katalogu 500+ komponentów",
+                "suggestion": "Użyj 'get_components' aby zobaczyć dostępne komponenty"
+            }
+        
+        # === AUTO-KONFIGURACJA ===
+        if not configuration:
+            configuration = await self._auto_configure_added_component(agent, component_id, component_info)
+        
+        new_component = {
+            "id": new_id(),
+            "component_id": component_id,
+            "name": component_info["name"],
+            "type": component_info.get("type", "unknown"),
+            "configuration": configuration,
+            "auto_configured": configuration.get("auto_configured", False),
+            "added_at": datetime.now().isoformat(),
+            "position": len(agent.get("components", []))
+        }
+        
+        agent_counters.append_component(agent, new_component)
+        agent["updated_at"] = datetime.now().isoformat()
+        agent["metrics"]["intelligence_score"] = await self._recalculate_intelligence_score(agent)
+        
+        try:
+            version = await self.store.put(agent, event="add_component", expected_version=expected_version)
+        except VersionConflictError as e:
+            return self._version_conflict(e)
+        
+        return {
+            "success": True,
+            "version_tag": version_tag(version),
+            "message": f"Komponent '{component_info['name']}' dodany z enhanced AI configuration",
+            "component_added": {
+                "id": new_component["id"],
+                "name": component_info["name"],
+                "type": component_info.get("type"),
+                "auto_configured": new_component["auto_configured"],
+                "configuration_keys": list(configuration.keys())
+            },
+            "agent_updated": {
+                "total_components": len(agent["components"]),
+                "intelligence_score": agent["metrics"]["intelligence_score"],
+                "last_modified": agent["updated_at"]
+            }
+        }
+    
+    async def _auto_configure_added_component(self, agent: Dict[str, Any], component_id: str,
+                                            component_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Konfiguracja komponentu dodawanego do istniejącego agenta"""
+        domain = agent.get("domain", "general")
+        description = agent.get("description", "")
+        
+        if "llm" in component_id or "pollinations" in component_id:
+            # Analiza odtworzona z zapisanych wyników AI analysis agenta
+            analysis = {
+                "enhanced_analysis": {
+                    "confidence_score": agent.get("ai_analysis", {}).get("confidence_score", 60),
+                    "complexity_level": agent.get("complexity", "medium")
+                },
+                "detected_patterns": []
+            }
+            return await self._advanced_llm_configuration(description, domain, analysis)
+        elif "integration" in component_id:
+            return {**await self._smart_integration_config(component_id, domain, description), "auto_configured": True}
+        elif "classifier" in component_id:
+            return {**await self._smart_classifier_config(component_id, domain, {}), "auto_configured": True}
+        
+        return component_info.get("default_config", {
+            "timeout": 30,
+            "auto_configured": True
+        })
+    
+    async def _recalculate_intelligence_score(self, agent: Dict) -> int:
+        """Przelicza intelligence score agenta po zmianie komponentów - w O(1) z liczników"""
+        return agent_counters.intelligence_score(agent_counters.get_counters(agent))
+    
+    async def delete_agent(self, agent_id: str, if_match: Optional[str] = None) -> Dict[str, Any]:
+        """Usuwa agenta z magazynu (z if_match - tylko niezmienioną wersję)"""
+        async with self.store.lock(agent_id):
+            return await self._delete_agent(agent_id, if_match)
+    
+    async def _delete_agent(self, agent_id: str, if_match: Optional[str]) -> Dict[str, Any]:
+        agent, expected_version, error = await self._get_for_update(agent_id, if_match)
+        if error:
+            return error
+        
+        agent_name = agent.get("name", "Unknown")
+        intelligence_score = agent.get("metrics", {}).get("intelligence_score", 0)
+        
+        try:
+            await self.store.delete(agent_id, expected_version=expected_version)
+        except VersionConflictError as e:
+            return self._version_conflict(e)
+        
+        return {
+            "success": True,
+            "message": f"Agent '{agent_name}' (Intelligence Score: {intelligence_score}%) został usunięty",
+            "deleted_agent": {
+                "id": agent_id,
+                "name": agent_name,
+                "intelligence_score": intelligence_score
+            }
+        }
+    
     async def _advanced_agent_simulation(self, agent: Dict[str, Any], 
                                        test_input: Dict[str, Any]) -> Dict[str, Any]:
         """Zaawansowana symulacja wykonania agenta z AI insights"""
@@ -1079,7 +1822,7 @@ class EnhancedAgentManager:
         connections = []
         for i in range(len(nodes) - 1):
             connections.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "from_node": nodes[i]["id"],
                 "to_node": nodes[i + 1]["id"], 
                 "type": "sequential",
@@ -1092,7 +1835,7 @@ class EnhancedAgentManager:
         for node in nodes:
             if node["type"] in ["pollinations_llm", "llm_text_generator"]:
                 error_handlers.append({
-                    "id": str(uuid.uuid4()),
+                    "id": new_id(),
                     "node_id": node["id"],
                     "type": "llm_error_handler",
                     "configuration": {
@@ -1156,7 +1899,7 @@ class EnhancedAgentManager:
         
         # Monitoring dla wszystkich złożonych agentów
         advanced.append({
-            "id": str(uuid.uuid4()),
+            "id": new_id(),
             "component_id": "performance_monitor",
             "name": "🔍 Auto: Performance Monitor",
             "reason": "Złożony agent wymaga monitoringu wydajności",
@@ -1184,11 +1927,10 @@ class EnhancedAgentManager:
     # Debug method for testing
     async def debug_agent(self, agent_id: str, debug_level: str = "basic") -> Dict[str, Any]:
         """Debug agenta z AI insights"""
-        if agent_id not in self.agents:
+        agent = await self.store.get(agent_id)
+        if agent is None:
             return {"success": False, "error": "Agent not found"}
         
-        agent = self.agents[agent_id]
-        
         return {
             "success": True,
             "debug_info": {
@@ -1198,6 +1940,7 @@ class EnhancedAgentManager:
                     "ai_enhanced": bool(agent.get("ai_analysis"))
                 },
                 "intelligence_metrics": agent.get("metrics", {}),
+                "counter_mismatches": agent_counters.check_counters(agent),
                 "ai_analysis": agent.get("ai_analysis", {})
             }
         }
@@ -1243,7 +1986,7 @@ class EnhancedAgentManager:
             comp["auto_configured"] = True
             auto_configured.append(comp)
             
-        print(f"⚙️ Auto-skonfigurowano {len(auto_configured)} komponentów")
+        logger.debug("Auto-skonfigurowano %d komponentów", len(auto_configured))
         return auto_configured
     
     async def _advanced_llm_configuration(self, description: str, domain: str, analysis: Dict) -> Dict[str, Any]:
@@ -1300,7 +2043,7 @@ class EnhancedAgentManager:
         nodes = []
         for i, comp in enumerate(components):
             nodes.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "type": comp["component_id"],
                 "name": comp["name"],
                 "position": comp.get("position", i),
@@ -1322,7 +2065,7 @@ class EnhancedAgentManager:
         execution_strategy = await self._determine_execution_strategy(nodes, analysis)
         
         workflow = {
-            "id": str(uuid.uuid4()),
+            "id": new_id(),
             "name": f"Intelligent Workflow",
             "description": "AI-generated workflow z automatyczną optymalizacją",
             "nodes": nodes,
@@ -1349,7 +2092,7 @@ class EnhancedAgentManager:
         # Sequential workflow components
         if "sequential" in patterns:
             workflow_components.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "sequential_processor",
                 "name": "🔄 Auto: Sequential Processor",
                 "reason": "Wykryto wzorzec sekwencyjny - potrzebna synchronizacja",
@@ -1360,7 +2103,7 @@ class EnhancedAgentManager:
         # Conditional workflow components  
         if "conditional" in patterns:
             workflow_components.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "decision_engine",
                 "name": "🤔 Auto: Decision Engine",
                 "reason": "Wykryto wzorce warunkowe - potrzebna logika decyzyjna",
@@ -1371,7 +2114,7 @@ class EnhancedAgentManager:
         # Parallel workflow components
         if "parallel" in patterns:
             workflow_components.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "parallel_executor",
                 "name": "⚡ Auto: Parallel Executor", 
                 "reason": "Wykryto możliwość przetwarzania równoległego",
@@ -1382,7 +2125,7 @@ class EnhancedAgentManager:
         # Iterative workflow components
         if "iterative" in patterns:
             workflow_components.append({
-                "id": str(uuid.uuid4()),
+                "id": new_id(),
                 "component_id": "loop_controller",
                 "name": "🔄 Auto: Loop Controller",
                 "reason": "Wykryto wzorce iteracyjne - potrzebna kontrola pętli",
@@ -0,0 +1,463 @@
+"""Event-sourced agent store: append-only mutation log with periodic snapshots
+
+Każda zmiana agenta (create, add_component, test, delete) to jedna linia JSONL
+dopisana na koniec bieżącego segmentu logu. fsync jest grupowany: zapisy z jednego
+okna (``fsync_interval``) czekają na wspólne ``os.fsync``, więc put() wraca dopiero,
+gdy zmiana jest trwała, a koszt to jeden sekwencyjny zapis na mutację.
+
+Co ``snapshot_every`` mutacji log przechodzi do nowego segmentu, a w tle powstaje
+snapshot stanu (gzip JSONL) i usuwane są segmenty, które snapshot już obejmuje.
+Start serwera = najnowszy snapshot + odtworzenie ogona logu, więc czas odtwarzania
+nie zależy od długości historii. Snapshot zawiera tylko bieżącą rewizję agenta
+(z jej numerem), więc po restarcie dostępne są rewizje od ostatniego snapshotu.
+
+Z polityką retencji nieaktywne szkice opuszczają RAM do ``spill.db`` w katalogu
+logu, a log i snapshoty nadal je zawierają - retencja nigdy nie usuwa agenta.
+spill.db jest tylko pamięcią podręczną: przy starcie jest tworzony od nowa.
+
+Układ katalogu::
+
+    snapshot-000000001000.jsonl.gz   # stan po mutacji 1000
+    log-000000001001.jsonl           # mutacje od 1001
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from .agent_retention import RetentionPolicy
+from .agent_records import unpack_id
+from .agent_search import DEFAULT_MIN_SIMILARITY
+from .agent_store import AgentStore, InMemoryAgentStore, SQLiteAgentStore, VersionConflictError
+
+logger = logging.getLogger("ai_agent_generator.event_log")
+
+DEFAULT_SNAPSHOT_EVERY = 1000
+DEFAULT_FSYNC_INTERVAL = 0.002
+
+_LOG_PATTERN = re.compile(r"^log-(\d{12})\.jsonl$")
+_SNAPSHOT_PATTERN = re.compile(r"^snapshot-(\d{12})\.jsonl\.gz$")
+SPILL_FILE = "spill.db"
+
+
+def _log_name(first_seq: int) -> str:
+    return f"log-{first_seq:012d}.jsonl"
+
+
+def _snapshot_name(seq: int) -> str:
+    return f"snapshot-{seq:012d}.jsonl.gz"
+
+
+def _fsync_directory(directory: str):
+    """Utrwala zmiany w katalogu (nowe pliki, rename) - na systemach, które to wspierają"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _record_id(record: Any) -> str:
+    return record["id"] if isinstance(record, dict) else unpack_id(record.id)
+
+
+class MutationLog:
+    """Segmentowany log JSONL z grupowanym fsync"""
+
+    def __init__(self, directory: str, fsync_interval: float = DEFAULT_FSYNC_INTERVAL):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.seq = 0
+        self._file = None
+        self._pending_sync: Optional[asyncio.Future] = None
+        self.appends = 0
+        self.fsyncs = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(pierwszy seq, ścieżka) segmentów w kolejności"""
+        found = []
+        for name in os.listdir(self.directory):
+            match = _LOG_PATTERN.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def snapshots(self) -> List[Tuple[int, str]]:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SNAPSHOT_PATTERN.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    @staticmethod
+    def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+        """Rekord z pełnej linii; None dla urwanej lub uszkodzonej (awaria w trakcie zapisu)"""
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
+
+    @staticmethod
+    def read_segment(path: str):
+        """Rekordy segmentu do pierwszej urwanej lub uszkodzonej linii"""
+        with open(path, "rb") as f:
+            for line in f:
+                record = MutationLog._parse_line(line)
+                if record is None:
+                    logger.warning("Ignoring torn record in %s", path)
+                    break
+                yield record
+
+    @staticmethod
+    def repair_segment(path: str) -> int:
+        """Obcina segment za ostatnim poprawnym rekordem; zwraca liczbę usuniętych bajtów.
+
+        Bez tego kolejny rekord dopisany po restarcie trafiłby do tej samej linii
+        co urwany fragment i cała linia byłaby nieczytelna.
+        """
+        valid = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if MutationLog._parse_line(line) is None:
+                    break
+                valid += len(line)
+            size = f.seek(0, os.SEEK_END)
+        if size > valid:
+            with open(path, "r+b") as f:
+                f.truncate(valid)
+                f.flush()
+                os.fsync(f.fileno())
+            logger.warning("Truncated %d bytes of torn records from %s", size - valid, path)
+        return size - valid
+
+    def open_segment(self, first_seq: int):
+        """Zamyka bieżący segment i otwiera nowy, zaczynający się od first_seq"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        path = os.path.join(self.directory, _log_name(first_seq))
+        self._file = open(path, "ab", buffering=0)
+        _fsync_directory(self.directory)
+
+    async def append(self, record: Dict[str, Any]) -> int:
+        """Dopisuje rekord i czeka na (wspólny) fsync; zwraca numer sekwencyjny"""
+        self.seq += 1
+        record = {"seq": self.seq, "ts": time.time(), **record}
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.appends += 1
+        seq = self.seq
+        await self._sync()
+        return seq
+
+    async def _sync(self):
+        pending = self._pending_sync
+        if pending is None:
+            pending = self._pending_sync = asyncio.get_running_loop().create_future()
+            asyncio.ensure_future(self._sync_after_window(pending))
+        await asyncio.shield(pending)
+
+    async def _sync_after_window(self, pending: asyncio.Future):
+        try:
+            if self.fsync_interval:
+                await asyncio.sleep(self.fsync_interval)
+            # Zapisy, które przyjdą w trakcie fsync, czekają na kolejną partię
+            if self._pending_sync is pending:
+                self._pending_sync = None
+            if self._file is not None:
+                # Kopia deskryptora - rotacja segmentu może zamknąć plik w trakcie fsync
+                fd = os.dup(self._file.fileno())
+                try:
+                    await asyncio.to_thread(os.fsync, fd)
+                finally:
+                    os.close(fd)
+                self.fsyncs += 1
+            # else: close() w trakcie okna - sam wykonał fsync przed zamknięciem pliku
+        except BaseException as e:
+            if not pending.done():
+                pending.set_exception(e if isinstance(e, Exception) else RuntimeError("Mutation log sync was cancelled"))
+            if not isinstance(e, Exception):
+                raise
+        else:
+            if not pending.done():
+                pending.set_result(None)
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+class EventSourcedAgentStore(AgentStore):
+    """Magazyn w pamięci odtwarzany z logu mutacji i snapshotów"""
+
+    persistent = True
+
+    def __init__(self, directory: str, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL, compact: bool = True,
+                 retention: Optional[RetentionPolicy] = None):
+        self.directory = directory
+        self.snapshot_every = max(1, int(snapshot_every))
+        self._log = MutationLog(directory, fsync_interval)
+        self._spill = self._open_spill() if retention is not None else None
+        self._state = InMemoryAgentStore(compact=compact, retention=retention, spill=self._spill)
+        self._snapshot_task: Optional[asyncio.Task] = None
+        # agent_id -> (wersja, dokument) zapisu czekającego na fsync; (None, None) = oczekujące usunięcie
+        self._pending: Dict[str, Tuple[Optional[int], Optional[Dict[str, Any]]]] = {}
+        self.snapshot_seq = 0
+        self.snapshots_written = 0
+        self.recovery = self._recover()
+
+    def _open_spill(self) -> SQLiteAgentStore:
+        """Świeży spill.db - po starcie wszyscy agenci są odtworzeni z logu, więc stara zawartość jest zbędna"""
+        path = os.path.join(self.directory, SPILL_FILE)
+        for stale in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(stale):
+                os.remove(stale)
+        return SQLiteAgentStore(path, max_revisions=1)
+
+    # === ODTWARZANIE ===
+
+    def _recover(self) -> Dict[str, Any]:
+        """Najnowszy snapshot + ogon logu; zwraca statystyki odtwarzania"""
+        started = time.perf_counter()
+        snapshot_seq, loaded = 0, 0
+        snapshots = self._log.snapshots()
+        if snapshots:
+            snapshot_seq, path = snapshots[-1]
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._apply({"op": "put", "event": "snapshot", **entry})
+                    loaded += 1
+
+        replayed, seq = 0, snapshot_seq
+        segments = self._log.segments()
+        if segments:
+            # Do najnowszego segmentu będą dopisywane kolejne rekordy - urwany ogon trzeba usunąć
+            self._log.repair_segment(segments[-1][1])
+        for first_seq, path in segments:
+            for record in MutationLog.read_segment(path):
+                if record["seq"] <= snapshot_seq:
+                    continue
+                self._apply(record)
+                seq = record["seq"]
+                replayed += 1
+
+        self.snapshot_seq = snapshot_seq
+        self._log.seq = seq
+        self._log.open_segment(seq + 1)
+        stats = {
+            "snapshot_seq": snapshot_seq,
+            "snapshot_agents": loaded,
+            "replayed_records": replayed,
+            "recovery_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+        logger.info("Agent store recovered", extra=stats)
+        return stats
+
+    def _apply(self, record: Dict[str, Any]):
+        # Operacje magazynu w pamięci są synchroniczne w środku - wykonujemy je bez pętli zdarzeń
+        if record["op"] == "put":
+            self._state.put_sync(record["agent"], record.get("event", "put"), record.get("version"))
+        elif record["op"] == "delete":
+            self._state.delete_sync(record["id"])
+
+    # === INTERFEJS AgentStore ===
+
+    async def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        return await self._state.get(agent_id)
+
+    async def _current_version(self, agent_id: str) -> Optional[int]:
+        """Wersja agenta z uwzględnieniem zapisów, które jeszcze czekają na fsync"""
+        if agent_id in self._pending:
+            return self._pending[agent_id][0]
+        return await self._state.get_version(agent_id)
+
+    async def _append_durably(self, agent_id: str, version: Optional[int],
+                              agent: Optional[Dict[str, Any]], record: Dict[str, Any]):
+        """Dopisuje rekord i czeka na fsync; do tego czasu kolejne zapisy i snapshot widzą go jako oczekujący"""
+        self._pending[agent_id] = (version, agent)
+        try:
+            await self._log.append(record)
+        except BaseException:
+            self._settle(agent_id, version)
+            raise
+
+    def _settle(self, agent_id: str, version: Optional[int]):
+        if agent_id in self._pending and self._pending[agent_id][0] == version:
+            del self._pending[agent_id]
+
+    async def put(self, agent: Dict[str, Any], event: str = "put",
+                  expected_version: Optional[int] = None) -> int:
+        """Stan w pamięci zmienia się dopiero, gdy rekord jest trwały w logu"""
+        agent_id = agent["id"]
+        current = await self._current_version(agent_id)
+        if expected_version is not None and current != expected_version:
+            raise VersionConflictError(agent_id, expected_version, current)
+        version = (current or 0) + 1
+        # Szkic przeniesiony do spill wraca do pamięci, żeby numeracja rewizji była ciągła
+        await self._state.restore(agent_id)
+        await self._append_durably(agent_id, version, agent,
+                                   {"op": "put", "event": event, "version": version, "agent": agent})
+        try:
+            # Bez przełączania zadań; równoległy zapis z wyższą wersją mógł zostać już zastosowany
+            if (await self._state.get_version(agent_id) or 0) < version:
+                self._state.put_sync(agent, event, version)
+        finally:
+            self._settle(agent_id, version)
+        # Retencja tylko zwalnia RAM - agent zostaje w logu i w spill
+        await self._state.enforce_retention()
+        self._maybe_snapshot()
+        return version
+
+    async def delete(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        current = await self._current_version(agent_id)
+        if current is None:
+            return False
+        if expected_version is not None and current != expected_version:
+            raise VersionConflictError(agent_id, expected_version, current)
+        await self._append_durably(agent_id, None, None, {"op": "delete", "event": "delete", "id": agent_id})
+        try:
+            await self._state.delete_unlocked(agent_id)
+        finally:
+            self._settle(agent_id, None)
+        self._maybe_snapshot()
+        return True
+
+    async def contains(self, agent_id: str) -> bool:
+        return await self._state.contains(agent_id)
+
+    async def count(self) -> int:
+        return await self._state.count()
+
+    async def get_version(self, agent_id: str) -> Optional[int]:
+        return await self._state.get_version(agent_id)
+
+    async def get_revision(self, agent_id: str, version: int) -> Optional[Dict[str, Any]]:
+        return await self._state.get_revision(agent_id, version)
+
+    async def list_revisions(self, agent_id: str) -> Optional[List[Dict[str, Any]]]:
+        return await self._state.list_revisions(agent_id)
+
+    async def list_summaries(self, domain: Optional[str] = None, status: Optional[str] = None,
+                             sort_by: str = "intelligence", offset: int = 0,
+                             limit: Optional[int] = None, after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._state.list_summaries(domain, status, sort_by, offset, limit, after)
+
+    async def search(self, query: str, domain: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        return await self._state.search(query, domain, limit)
+
+    async def find_similar(self, agent_id: str, limit: int = 10,
+                           min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[List[Dict[str, Any]]]:
+        return await self._state.find_similar(agent_id, limit, min_similarity)
+
+    # === SNAPSHOTY I KOMPAKCJA ===
+
+    def _maybe_snapshot(self):
+        if self._log.seq - self.snapshot_seq < self.snapshot_every:
+            return
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+        self._snapshot_task = asyncio.ensure_future(self.snapshot())
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Zapisuje snapshot stanu po bieżącej mutacji i usuwa pokryte nim segmenty logu"""
+        def rotate():
+            # Nowy segment od seq+1 i spójny widok stanu - synchronicznie, bez przełączania zadań.
+            # Rekordy czekające na fsync są już w logu (seq <= current), ale jeszcze nie w pamięci.
+            current = self._log.seq
+            self._log.open_segment(current + 1)
+            return current, dict(self._pending)
+
+        (seq, pending), agents = await self._state.export_state(rotate)
+        if pending:
+            agents = [(version, record) for version, record in agents if _record_id(record) not in pending]
+            agents.extend((version, agent) for version, agent in pending.values() if agent is not None)
+
+        started = time.perf_counter()
+        path = await asyncio.to_thread(self._write_snapshot, seq, agents)
+        self.snapshot_seq = seq
+        self.snapshots_written += 1
+        removed = await asyncio.to_thread(self._compact, seq)
+        stats = {
+            "snapshot_seq": seq,
+            "agents": len(agents),
+            "removed_files": removed,
+            "snapshot_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+        logger.info("Agent store snapshot written", extra=stats)
+        return {"path": path, **stats}
+
+    def _write_snapshot(self, seq: int, agents: List[Any]) -> str:
+        path = os.path.join(self.directory, _snapshot_name(seq))
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            for version, agent in agents:
+                entry = {"version": version, "agent": agent.to_dict() if hasattr(agent, "to_dict") else agent}
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_directory(self.directory)
+        return path
+
+    def _compact(self, seq: int) -> int:
+        """Usuwa starsze snapshoty i segmenty zawierające wyłącznie mutacje <= seq"""
+        removed = 0
+        for snapshot_seq, path in self._log.snapshots():
+            if snapshot_seq < seq:
+                os.remove(path)
+                removed += 1
+        for first_seq, path in self._log.segments():
+            if first_seq <= seq:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    async def flush(self):
+        """Czeka na zaplanowany snapshot (np. przed zamknięciem lub w testach)"""
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+
+    @property
+    def busy(self) -> bool:
+        """Snapshot w toku - magazynu nie należy teraz zamykać"""
+        return self._snapshot_task is not None and not self._snapshot_task.done()
+
+    def close(self):
+        self._log.close()
+        if self._spill is not None:
+            self._spill.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._state.get_stats()
+        stats.update({
+            "backend": "event_log",
+            "directory": self.directory,
+            "seq": self._log.seq,
+            "snapshot_seq": self.snapshot_seq,
+            "log_tail": self._log.seq - self.snapshot_seq,
+            "appends": self._log.appends,
+            "fsyncs": self._log.fsyncs,
+            "snapshots_written": self.snapshots_written,
+            "recovery": self.recovery
+        })
+        return stats
@@ -0,0 +1,62 @@
+"""Small dependency graph of async phases with per-phase timing"""
+
+import asyncio
+import time
+from typing import Dict, Any, Callable, Awaitable, Iterable, List, Tuple
+
+PhaseFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class PhasePipeline:
+    """Faza startuje, gdy skończą się wszystkie jej zależności; niezależne fazy biegną równolegle.
+
+    Funkcja fazy dostaje słownik wyników faz (nazwa -> wynik) i zwraca własny wynik.
+    Czas każdej fazy jest mierzony bez czekania na zależności.
+    """
+
+    def __init__(self):
+        self._phases: Dict[str, Tuple[PhaseFunction, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, run: PhaseFunction, after: Iterable[str] = ()) -> "PhasePipeline":
+        after = tuple(after)
+        missing = [dep for dep in after if dep not in self._phases]
+        if missing:
+            # Zależności deklarowane wcześniej - graf nie może mieć cykli
+            raise ValueError(f"Phase '{name}' depends on undeclared phases: {missing}")
+        if name in self._phases:
+            raise ValueError(f"Phase '{name}' is already declared")
+        self._phases[name] = (run, after)
+        return self
+
+    @property
+    def phases(self) -> List[str]:
+        return list(self._phases)
+
+    async def run(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Wykonuje graf; zwraca (wyniki faz, czasy faz w ms z kluczem "total")"""
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def execute(name: str, run: PhaseFunction, after: Tuple[str, ...]):
+            if after:
+                await asyncio.gather(*(tasks[dep] for dep in after))
+            phase_started = time.perf_counter()
+            results[name] = await run(results)
+            timings[name] = round((time.perf_counter() - phase_started) * 1000, 3)
+
+        for name, (run, after) in self._phases.items():
+            tasks[name] = asyncio.ensure_future(execute(name, run, after))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # Błąd jednej fazy przerywa pozostałe
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+        return results, timings
@@ -0,0 +1,218 @@
+"""Tenant-sharded agent storage
+
+Każdy tenant (``tenant_id`` z konfiguracji sesji) ma własny shard: osobny
+magazyn z własnymi indeksami, wyszukiwaniem i blokadą zmian. Listing, wyszukiwanie
+i liczniki dotyczą bieżącego tenanta, a zmiany agentów jednego tenanta nie
+czekają na blokadę innych - rywalizacja rośnie z liczbą aktywnych tenantów,
+a nie z całkowitym ruchem.
+
+Bieżący tenant jest przekazywany przez ``contextvars``: narzędzie lub zasób MCP
+ustawia go na początku wywołania z konfiguracji sesji (``set_current_tenant``),
+a każde żądanie działa we własnym zadaniu asyncio, więc wartość nie przechodzi
+między żądaniami. Bez tenanta używany jest shard ``DEFAULT_TENANT``. Agent
+innego tenanta jest dla wywołującego niewidoczny, także gdy zna jego id.
+
+Liczba otwartych shardów jest ograniczona (``AGENT_MAX_OPEN_SHARDS``): ponad limit
+najdawniej używane bezczynne shardy trwałe (SQLite, log zdarzeń) są zamykane
+i otwierane ponownie przy kolejnym użyciu. Shardów w pamięci nie da się zamknąć
+bez utraty agentów, więc nowy tenant ponad limit dostaje ``TenantError``.
+``AGENT_TENANTS`` (lista po przecinkach) ogranicza dozwolonych tenantów.
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from .agent_store import AgentStore
+from .agent_search import DEFAULT_MIN_SIMILARITY
+
+DEFAULT_TENANT = "default"
+DEFAULT_MAX_OPEN_SHARDS = 64
+
+_current_tenant: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("agent_tenant", default=None)
+_SAFE_TENANT = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class TenantError(ValueError):
+    """Tenant spoza dozwolonej listy albo brak miejsca na kolejny shard"""
+
+
+def get_current_tenant() -> str:
+    return _current_tenant.get() or DEFAULT_TENANT
+
+
+def set_current_tenant(tenant: Optional[str]):
+    """Ustawia tenanta dla bieżącego zadania (None = domyślny)"""
+    _current_tenant.set(tenant or None)
+
+
+@contextlib.contextmanager
+def tenant_scope(tenant: Optional[str]):
+    """Tenant dla bloku kodu, przywracany po wyjściu"""
+    token = _current_tenant.set(tenant or None)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def _safe_name(tenant: str) -> str:
+    """Nazwa tenanta bezpieczna w ścieżce pliku"""
+    if _SAFE_TENANT.match(tenant) and tenant not in (".", ".."):
+        return tenant
+    return hashlib.blake2b(tenant.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def shard_file_path(path: str, tenant: str) -> str:
+    """Plik shardu: agents.db dla tenanta domyślnego, agents.<tenant>.db dla pozostałych"""
+    if tenant == DEFAULT_TENANT:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{_safe_name(tenant)}{ext}"
+
+
+def shard_directory(directory: str, tenant: str) -> str:
+    """Katalog shardu: katalog bazowy dla tenanta domyślnego, tenants/<tenant> dla pozostałych"""
+    if tenant == DEFAULT_TENANT:
+        return directory
+    return os.path.join(directory, "tenants", _safe_name(tenant))
+
+
+class ShardedAgentStore(AgentStore):
+    """Magazyn kierujący każde wywołanie do shardu bieżącego tenanta.
+
+    open_shard(tenant) tworzy magazyn shardu przy pierwszym użyciu tenanta.
+    allowed_tenants (opcjonalnie) to jedyni dopuszczalni tenanci poza domyślnym.
+    """
+
+    def __init__(self, open_shard: Callable[[str], AgentStore],
+                 max_open_shards: int = DEFAULT_MAX_OPEN_SHARDS,
+                 allowed_tenants: Optional[Iterable[str]] = None):
+        self._open_shard = open_shard
+        self.max_open_shards = max(1, int(max_open_shards))
+        self.allowed_tenants = frozenset(allowed_tenants) if allowed_tenants else None
+        # Od najdawniej używanego; liczba trwających wywołań i sekcji lock() na shard
+        self._shards: "OrderedDict[str, AgentStore]" = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        self.shards_closed = 0
+
+    def shard(self, tenant: Optional[str] = None) -> AgentStore:
+        tenant = tenant or get_current_tenant()
+        store = self._shards.get(tenant)
+        if store is not None:
+            self._shards.move_to_end(tenant)
+            return store
+        if self.allowed_tenants is not None and tenant != DEFAULT_TENANT and tenant not in self.allowed_tenants:
+            raise TenantError(f"Unknown tenant: {tenant}")
+        self._close_idle_shards(self.max_open_shards - 1)
+        if len(self._shards) >= self.max_open_shards:
+            raise TenantError(f"Too many open tenant shards (limit {self.max_open_shards})")
+        store = self._shards[tenant] = self._open_shard(tenant)
+        return store
+
+    def _close_idle_shards(self, keep: int):
+        """Zamyka najdawniej używane bezczynne shardy trwałe, aż zostanie co najwyżej keep"""
+        for tenant in list(self._shards):
+            if len(self._shards) <= keep:
+                break
+            store = self._shards[tenant]
+            if self._in_use.get(tenant) or not getattr(store, "persistent", False) or getattr(store, "busy", False):
+                continue
+            del self._shards[tenant]
+            store.close()
+            self.shards_closed += 1
+
+    @contextlib.asynccontextmanager
+    async def _using(self):
+        """Shard bieżącego tenanta, który nie zostanie zamknięty w trakcie wywołania"""
+        tenant = get_current_tenant()
+        store = self.shard(tenant)
+        self._in_use[tenant] = self._in_use.get(tenant, 0) + 1
+        try:
+            yield store
+        finally:
+            self._in_use[tenant] -= 1
+            if not self._in_use[tenant]:
+                del self._in_use[tenant]
+
+    @contextlib.asynccontextmanager
+    async def lock(self, agent_id: str):
+        # Blokada shardu to blokada jego magazynu - put()/delete() wewnątrz sekcji jej nie biorą ponownie
+        async with self._using() as store:
+            async with store.lock(agent_id):
+                yield
+
+    async def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        async with self._using() as store:
+            return await store.get(agent_id)
+
+    async def put(self, agent: Dict[str, Any], event: str = "put",
+                  expected_version: Optional[int] = None) -> int:
+        async with self._using() as store:
+            async with store.lock(agent["id"]):
+                return await store.put(agent, event, expected_version)
+
+    async def delete(self, agent_id: str, expected_version: Optional[int] = None) -> bool:
+        async with self._using() as store:
+            async with store.lock(agent_id):
+                return await store.delete(agent_id, expected_version)
+
+    async def contains(self, agent_id: str) -> bool:
+        async with self._using() as store:
+            return await store.contains(agent_id)
+
+    async def count(self) -> int:
+        async with self._using() as store:
+            return await store.count()
+
+    async def get_version(self, agent_id: str) -> Optional[int]:
+        async with self._using() as store:
+            return await store.get_version(agent_id)
+
+    async def get_revision(self, agent_id: str, version: int) -> Optional[Dict[str, Any]]:
+        async with self._using() as store:
+            return await store.get_revision(agent_id, version)
+
+    async def list_revisions(self, agent_id: str) -> Optional[List[Dict[str, Any]]]:
+        async with self._using() as store:
+            return await store.list_revisions(agent_id)
+
+    async def list_summaries(self, domain: Optional[str] = None, status: Optional[str] = None,
+                             sort_by: str = "intelligence", offset: int = 0,
+                             limit: Optional[int] = None, after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        async with self._using() as store:
+            return await store.list_summaries(domain, status, sort_by, offset, limit, after)
+
+    async def search(self, query: str, domain: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        async with self._using() as store:
+            return await store.search(query, domain, limit)
+
+    async def find_similar(self, agent_id: str, limit: int = 10,
+                           min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[List[Dict[str, Any]]]:
+        async with self._using() as store:
+            return await store.find_similar(agent_id, limit, min_similarity)
+
+    async def flush(self):
+        for store in list(self._shards.values()):
+            if hasattr(store, "flush"):
+                await store.flush()
+
+    def close(self):
+        for store in self._shards.values():
+            if hasattr(store, "close"):
+                store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        shards = {tenant: store.get_stats() for tenant, store in self._shards.items()}
+        return {
+            "backend": "sharded",
+            "tenants": len(shards),
+            "max_open_shards": self.max_open_shards,
+            "shards_closed": self.shards_closed,
+            "current_tenant": get_current_tenant(),
+            "shards": shards
+        }
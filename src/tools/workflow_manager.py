@@ -1,31 +1,38 @@
-from typing import Dict, Any, List
+import sys
+import os
+from typing import Dict, Any, List, Optional
+
+# Add the src directory to the path for absolute imports
+current_dir = os.path.dirname(__file__)
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+try:
+    from components.workflow_templates import get_workflow_templates
+except ImportError:
+    def get_workflow_templates():
+        return []
+
+from .blueprints import AgentBlueprint, blueprint_from_template
 
 class WorkflowManager:
     def __init__(self):
-        pass
+        # Szablony wczytywane raz; szkielety agentów budowane przy pierwszym użyciu
+        self.templates: List[Dict[str, Any]] = get_workflow_templates()
+        self._templates_by_id = {t["template_id"]: t for t in self.templates}
+        self._blueprints: Dict[str, AgentBlueprint] = {}
         
     async def get_workflow_templates(self, domain: str = None, complexity: str = None) -> Dict[str, Any]:
         """Pobiera szablony workflow"""
-        import sys
-        import os
-        current_dir = os.path.dirname(__file__)
-        src_dir = os.path.dirname(current_dir)
-        if src_dir not in sys.path:
-            sys.path.insert(0, src_dir)
-            
-        try:
-            from components.workflow_templates import get_workflow_templates
-            templates = get_workflow_templates()
-        except ImportError:
-            templates = []
         filtered = []
         
-        for template in templates:
+        for template in self.templates:
             # Filtrowanie po domenie
-            if domain and template.get("domain") != domain:
+            if domain and domain != "all" and template.get("domain") != domain:
                 continue
             # Filtrowanie po złożoności  
-            if complexity and template.get("complexity") != complexity:
+            if complexity and complexity != "all" and template.get("complexity") != complexity:
                 continue
             filtered.append(template)
         
@@ -33,4 +40,21 @@ class WorkflowManager:
             "success": True,
             "templates": filtered,
             "total_available": len(filtered)
-        }
\ No newline at end of file
+        }
+    
+    def get_template(self, template_id: str) -> Optional[Dict[str, Any]]:
+        return self._templates_by_id.get(template_id)
+    
+    def get_blueprint(self, template_id: str) -> Optional[AgentBlueprint]:
+        """Gotowy szkielet agenta dla szablonu (przetwarzany raz i cache'owany)"""
+        blueprint = self._blueprints.get(template_id)
+        if blueprint is None:
+            template = self._templates_by_id.get(template_id)
+            if template is None:
+                return None
+            blueprint = self._blueprints[template_id] = blueprint_from_template(template)
+        return blueprint
+    
+    @property
+    def template_ids(self) -> List[str]:
+        return list(self._templates_by_id)
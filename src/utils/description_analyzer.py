@@ -4,10 +4,13 @@ import re
 from typing import Dict, Any, List
 from datetime import datetime
 
+from .lru_cache import LRUCache
+
 class DescriptionAnalyzer:
     """Analizator opisów do wykrywania ukrytych wymagań i wzorców"""
     
-    def __init__(self):
+    def __init__(self, suggestion_cache_size: int = 512):
+        self.suggestion_cache = LRUCache(suggestion_cache_size)
         self.patterns = {
             'data_processing': [
                 r'\b(proces|przetwarzanie|analiza|dane|database|baza|csv|excel|json)\b',
@@ -109,7 +112,7 @@ class DescriptionAnalyzer:
         detected_complexity = self._calculate_complexity_level(analysis['complexity_score'])
         
         # Generate suggested components based on patterns
-        suggested_components = self._suggest_components_for_patterns(analysis['detected_patterns'], text)
+        suggested_components = self._suggest_components_for_patterns(analysis['detected_patterns'], text, domain)
         analysis['suggested_components'] = suggested_components
         
         # Create enhanced analysis structure expected by create_agent
@@ -318,12 +321,29 @@ class DescriptionAnalyzer:
         total_score = min(95, base_score + pattern_score + keyword_score)
         return max(60, total_score)  # Minimum 60% confidence
     
-    def _suggest_components_for_patterns(self, patterns: List[str], text: str) -> List[Dict[str, Any]]:
-        """Sugeruje komponenty na podstawie wykrytych wzorców"""
+    def _suggest_components_for_patterns(self, patterns: List[str], text: str,
+                                         domain: str = "general") -> List[Dict[str, Any]]:
+        """Sugeruje komponenty na podstawie wykrytych wzorców (z pamięcią podręczną LRU)"""
+        signals = set(patterns)
+        if any(word in text for word in ['email', 'mail', 'poczta', 'śledzenie', 'tracking']):
+            signals.add('email_keywords')
+        signals = frozenset(signals)
+        
+        # Reguły analizatora nie zależą od wyuczonego modelu - generacja jest stała
+        cache_key = (domain, signals, 0)
+        suggestions = self.suggestion_cache.get(cache_key)
+        if suggestions is None:
+            suggestions = tuple(self._build_suggestions_for_signals(signals))
+            self.suggestion_cache.put(cache_key, suggestions)
+        
+        return [dict(s) for s in suggestions]
+    
+    def _build_suggestions_for_signals(self, signals: frozenset) -> List[Dict[str, Any]]:
+        """Buduje listę sugestii dla sygnatury wzorców i słów kluczowych"""
         suggestions = []
         
         # Email/Communication components
-        if 'communication' in patterns or any(word in text for word in ['email', 'mail', 'poczta', 'śledzenie', 'tracking']):
+        if 'communication' in signals or 'email_keywords' in signals:
             suggestions.extend([
                 {
                     'component_id': 'gmail_integration',
@@ -348,7 +368,7 @@ class DescriptionAnalyzer:
             ])
         
         # User interaction components
-        if 'user_interaction' in patterns:
+        if 'user_interaction' in signals:
             suggestions.extend([
                 {
                     'component_id': 'llm_text_generator',
@@ -363,7 +383,7 @@ class DescriptionAnalyzer:
             ])
         
         # Automation components
-        if 'automation' in patterns:
+        if 'automation' in signals:
             suggestions.extend([
                 {
                     'component_id': 'scheduler',
@@ -378,7 +398,7 @@ class DescriptionAnalyzer:
             ])
         
         # Data processing components
-        if 'data_processing' in patterns:
+        if 'data_processing' in signals:
             suggestions.extend([
                 {
                     'component_id': 'data_validator',
@@ -1,12 +1,13 @@
-import uuid
 import json
 import re
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+from .ids import new_id
+
 def generate_unique_id(prefix: str = "") -> str:
     """Generuje unikalny identyfikator"""
-    unique_id = str(uuid.uuid4())
+    unique_id = new_id()
     if prefix:
         return f"{prefix}_{unique_id}"
     return unique_id
@@ -209,6 +210,39 @@ def flatten_dictionary(d: Dict[str, Any], parent_key: str = '', sep: str = '.')
     
     return dict(items)
 
+def project_fields(data: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Zwraca tylko wskazane pola (ścieżki z kropkami, np. "workflow.nodes").
+
+    Ścieżka przechodząca przez listę słowników jest stosowana do każdego elementu,
+    np. "components.component_id". Nieistniejące ścieżki są pomijane.
+    """
+    result: Dict[str, Any] = {}
+    selected: List[str] = []
+    for path in sorted(set(paths)):
+        # Ścieżka zawarta w już wybranym polu niczego nie zmienia
+        if any(path.startswith(prefix + ".") for prefix in selected):
+            continue
+        selected.append(path)
+        _project_path(data, path.split("."), result)
+    return result
+
+def _project_path(source: Any, parts: List[str], target: Dict[str, Any]):
+    key, rest = parts[0], parts[1:]
+    if not isinstance(source, dict) or key not in source:
+        return
+    value = source[key]
+    if not rest:
+        target[key] = value
+    elif isinstance(value, dict):
+        _project_path(value, rest, target.setdefault(key, {}))
+    elif isinstance(value, list):
+        existing = target.get(key)
+        items = existing if isinstance(existing, list) and len(existing) == len(value) else [{} for _ in value]
+        for item, projected in zip(value, items):
+            if isinstance(item, dict):
+                _project_path(item, rest, projected)
+        target[key] = items
+
 def safe_json_loads(json_str: str, default: Any = None) -> Any:
     """Bezpieczne parsowanie JSON"""
     try:
@@ -0,0 +1,103 @@
+"""Time-ordered compact identifiers
+
+Identyfikatory agentów, komponentów i części workflow mają układ UUIDv7:
+48 bitów czasu uniksowego w milisekundach, 12-bitowy licznik w obrębie tej samej
+milisekundy i 62 bity losowe. Wewnętrznie to 16 bajtów, a na granicy API -
+26 znaków base32 Crockforda (zamiast 36 znaków UUID). Kolejność bajtów, a więc
+i kolejność napisów, odpowiada kolejności utworzenia, także w obrębie procesu
+w tej samej milisekundzie.
+
+Dawne identyfikatory (UUID w postaci kanonicznej) są nadal akceptowane.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+ID_LENGTH = 26
+
+# Alfabet Crockforda jest rosnący w ASCII - porządek napisów = porządek bajtów
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: index for index, char in enumerate(_ALPHABET)}
+_DECODE.update({char.lower(): index for char, index in list(_DECODE.items())})
+_DECODE.update({"O": 0, "o": 0, "I": 1, "i": 1, "L": 1, "l": 1})
+
+_COUNTER_MAX = 0xFFF
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def new_id_bytes() -> bytes:
+    """16 bajtów UUIDv7; kolejne wywołania dają rosnące wartości"""
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Losowy start licznika z wolną górną połową - zapas na kolejne id w tej milisekundzie
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                # Licznik wyczerpany (lub zegar cofnięty) - kolejna milisekunda "pożyczona" z przyszłości
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (timestamp << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | random_bits
+    return value.to_bytes(16, "big")
+
+
+def encode_id(raw: bytes) -> str:
+    """16 bajtów -> 26 znaków base32 Crockforda"""
+    value = int.from_bytes(raw, "big")
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(_ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def is_compact_id(value: str) -> bool:
+    """Czy napis jest identyfikatorem w postaci base32 (26 znaków, mieści się w 128 bitach)"""
+    return (isinstance(value, str) and len(value) == ID_LENGTH
+            and value[0] in "01234567" and all(char in _DECODE for char in value))
+
+
+def decode_id(value: str) -> Optional[bytes]:
+    """Identyfikator (base32 lub kanoniczny UUID) -> 16 bajtów; None dla innych napisów"""
+    if is_compact_id(value):
+        number = 0
+        for char in value:
+            number = (number << 5) | _DECODE[char]
+        return number.to_bytes(16, "big")
+    if isinstance(value, str) and len(value) == 36:
+        try:
+            parsed = uuid.UUID(value)
+        except ValueError:
+            return None
+        if str(parsed) == value:
+            return parsed.bytes
+    return None
+
+
+def is_time_ordered(raw: bytes) -> bool:
+    """Czy 16 bajtów to UUIDv7 (a nie np. dawny losowy UUID4)"""
+    return len(raw) == 16 and raw[6] >> 4 == 0x7 and raw[8] >> 6 == 0b10
+
+
+def new_id() -> str:
+    """Nowy identyfikator w postaci base32"""
+    return encode_id(new_id_bytes())
+
+
+def id_timestamp(value: str) -> Optional[float]:
+    """Czas utworzenia (sekundy uniksowe) zapisany w identyfikatorze; None dla dawnych UUID"""
+    raw = decode_id(value)
+    if raw is None or not is_time_ordered(raw):
+        return None
+    return int.from_bytes(raw[:6], "big") / 1000.0
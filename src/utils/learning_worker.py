@@ -0,0 +1,176 @@
+"""Background learning worker for SmartContext"""
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+
+QUEUE_FULL_POLICIES = ("drop", "block")
+
+
+class LearningEvent:
+    """Lekkie zdarzenie uczenia - tylko pola potrzebne SmartContext"""
+
+    __slots__ = ("agent_id", "agent", "occurrences", "enqueued_at")
+
+    def __init__(self, agent: Dict[str, Any]):
+        self.agent_id = agent.get("id")
+        self.agent = self._slim_agent(agent)
+        self.occurrences = 1
+        self.enqueued_at = time.monotonic()
+
+    @staticmethod
+    def _slim_agent(agent: Dict[str, Any]) -> Dict[str, Any]:
+        """Kopiuje tylko to, czego potrzebuje learn_from_successful_agent"""
+        return {
+            "id": agent.get("id"),
+            "domain": agent.get("domain", "general"),
+            "description": agent.get("description", ""),
+            "components": [
+                {"component_id": c.get("component_id", "unknown")}
+                for c in agent.get("components", [])
+            ]
+        }
+
+    def merge(self, agent: Dict[str, Any]):
+        """Łączy kolejne zdarzenie tego samego agenta (ostatni stan wygrywa)"""
+        self.agent = self._slim_agent(agent)
+        self.occurrences += 1
+
+
+class LearningWorker:
+    """Worker asyncio uczący SmartContext w tle z ograniczoną kolejką"""
+
+    def __init__(self, smart_context, max_queue_size: int = 1000,
+                 batch_size: int = 32, full_policy: str = "drop"):
+        if full_policy not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"Unknown queue full policy: {full_policy}")
+
+        self.smart_context = smart_context
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.full_policy = full_policy
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        # Zdarzenia oczekujące w kolejce, po agent_id (kolejność = kolejność wstawiania)
+        self._pending: Dict[str, LearningEvent] = {}
+
+        self._stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "applied_events": 0,
+            "applied_occurrences": 0,
+            "batches": 0,
+            "failures": 0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0
+        }
+
+    def _ensure_started(self):
+        """Uruchamia worker leniwie w bieżącej pętli zdarzeń"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._pending = {}
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, agent: Dict[str, Any]) -> bool:
+        """Wrzuca zdarzenie uczenia do kolejki; zwraca False jeśli zostało odrzucone"""
+        self._ensure_started()
+        self._stats["submitted"] += 1
+
+        agent_id = agent.get("id")
+        pending = self._pending.get(agent_id)
+        if pending is not None:
+            pending.merge(agent)
+            self._stats["coalesced"] += 1
+            return True
+
+        if self._queue.full() and self.full_policy == "drop":
+            self._stats["dropped"] += 1
+            return False
+
+        self._pending[agent_id] = LearningEvent(agent)
+        await self._queue.put(agent_id)
+        return True
+
+    async def _run(self):
+        """Pętla workera - pobiera zdarzenia i aplikuje je partiami"""
+        queue = self._queue
+        while True:
+            batch_ids = [await queue.get()]
+            while len(batch_ids) < self.batch_size and not queue.empty():
+                batch_ids.append(queue.get_nowait())
+
+            events = [self._pending.pop(agent_id) for agent_id in batch_ids if agent_id in self._pending]
+            try:
+                await self._apply_batch(events)
+            finally:
+                for _ in batch_ids:
+                    queue.task_done()
+
+    async def _apply_batch(self, events: List[LearningEvent]):
+        """Aplikuje partię zdarzeń do SmartContext"""
+        for event in events:
+            try:
+                await self.smart_context.learn_from_successful_agent(
+                    event.agent, occurrences=event.occurrences
+                )
+                self._stats["applied_events"] += 1
+                self._stats["applied_occurrences"] += event.occurrences
+            except Exception:
+                self._stats["failures"] += 1
+
+            lag_ms = (time.monotonic() - event.enqueued_at) * 1000
+            self._stats["last_lag_ms"] = round(lag_ms, 3)
+            self._stats["max_lag_ms"] = round(max(self._stats["max_lag_ms"], lag_ms), 3)
+
+        self._stats["batches"] += 1
+
+    async def drain(self):
+        """Czeka aż wszystkie zdarzenia w kolejce zostaną zaaplikowane"""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def stop(self):
+        """Aplikuje zaległe zdarzenia i zatrzymuje worker"""
+        await self.drain()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Zwraca metryki workera: głębokość kolejki, opóźnienie i liczniki"""
+        oldest_lag_ms = 0.0
+        if self._pending:
+            oldest = next(iter(self._pending.values()))
+            oldest_lag_ms = round((time.monotonic() - oldest.enqueued_at) * 1000, 3)
+
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "full_policy": self.full_policy,
+            "current_lag_ms": oldest_lag_ms,
+            **self._stats
+        }
+
+# Singleton instance
+_learning_worker_instance = None
+
+def get_learning_worker(smart_context=None) -> LearningWorker:
+    """Zwraca singleton instance LearningWorker"""
+    global _learning_worker_instance
+    if _learning_worker_instance is None:
+        if smart_context is None:
+            from .smart_context import get_smart_context
+            smart_context = get_smart_context()
+        _learning_worker_instance = LearningWorker(smart_context)
+    return _learning_worker_instance
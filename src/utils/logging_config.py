@@ -0,0 +1,120 @@
+"""Structured, non-blocking logging for the MCP server
+
+Wszystkie moduły logują przez loggery ``ai_agent_generator.*``. Rekordy trafiają
+do kolejki (``QueueHandler``), a zapisem na stderr lub do pliku zajmuje się wątek
+``QueueListener`` - ścieżka żądania nie czeka na I/O i nigdy nie pisze na stdout,
+którym transport stdio przesyła protokół MCP.
+
+Konfiguracja: ``AGENT_LOG_LEVEL`` (domyślnie WARNING - komunikaty INFO są wyciszone),
+``AGENT_LOG_FILE`` (domyślnie stderr), ``AGENT_LOG_FORMAT`` (``json`` lub ``text``).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Optional
+
+ROOT_LOGGER = "ai_agent_generator"
+
+# Atrybuty każdego LogRecord - pozostałe (przekazane przez extra=) są polami strukturalnymi
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger w hierarchii serwera, np. get_logger("agent_manager")"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """Jedna linia JSON na rekord: czas, poziom, logger, komunikat i pola z extra="""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_fields(record)
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Czytelny format z polami key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={json.dumps(v, ensure_ascii=False, default=str)}" for k, v in fields.items())
+        return line
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, który zachowuje pola extra= (domyślny prepare() formatuje komunikat w wątku żądania)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_text = logging.Formatter().formatException(record.exc_info) if record.exc_info else None
+        record.exc_info = None
+        return record
+
+
+def configure_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                      fmt: Optional[str] = None) -> logging.Logger:
+    """Konfiguruje logger serwera (idempotentnie) i uruchamia wątek zapisu"""
+    global _listener
+
+    level = (level or os.environ.get("AGENT_LOG_LEVEL", "WARNING")).upper()
+    log_file = log_file or os.environ.get("AGENT_LOG_FILE")
+    fmt = (fmt or os.environ.get("AGENT_LOG_FORMAT", "json")).lower()
+
+    shutdown_logging()
+
+    if log_file:
+        target: logging.Handler = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        target = logging.StreamHandler(sys.stderr)
+    target.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, target, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_StructuredQueueHandler(records))
+    root.setLevel(getattr(logging, level, logging.WARNING))
+    root.propagate = False
+    return root
+
+
+def shutdown_logging():
+    """Zatrzymuje wątek zapisu, opróżniając kolejkę"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
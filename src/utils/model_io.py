@@ -0,0 +1,276 @@
+"""Compact binary export/import of learned SmartContext models
+
+Format (little-endian, wersja 1):
+
+    header   : magic(8) | version u16 | flags u16 | section_count u32 | table_crc32 u32 | pad u32
+    table    : section_count x (name 8s | typecode 1s | pad 7x | offset u64 | nbytes u64 | crc32 u32 | pad u32)
+    sections : tablice wyrównane do 8 bajtów
+
+Wszystkie napisy (domeny, klucze wzorców, id komponentów, opisy) trafiają raz do
+tablicy napisów (STRS), a sekcje liczbowe przechowują tylko ich indeksy.
+Przy imporcie plik jest mapowany w pamięć, a tablice są widokami na mmap
+(memoryview.cast lub numpy.frombuffer) - bez kopiowania danych.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Any, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy jest opcjonalne - stdlib array/memoryview wystarczą
+    np = None
+
+MODEL_MAGIC = b"SCTXMDL\x00"
+MODEL_VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIII")
+_SECTION = struct.Struct("<8ss7xQQI4x")
+_ALIGN = 8
+
+# Kolejność i typy sekcji (I = u32 indeksy/offsety, Q = u64 liczniki, d = float64)
+_SECTIONS = (
+    ("STRS_OFF", "I"), ("STRS_DAT", "B"),
+    ("PAT_DOM", "I"), ("PAT_KEY", "I"), ("PAT_CNT", "Q"),
+    ("PAT_COFF", "I"), ("PCMP_ID", "I"), ("PCMP_CNT", "Q"),
+    ("PAT_DOFF", "I"), ("PDSC_ID", "I"),
+    ("PRF_DOM", "I"), ("PRF_CMP", "I"), ("PRF_USE", "Q"), ("PRF_RATE", "d"),
+    ("COC_DOM", "I"), ("COC_A", "I"), ("COC_B", "I"), ("COC_CNT", "Q"),
+)
+
+_NUMPY_DTYPES = {"I": "<u4", "Q": "<u8", "d": "<f8", "B": "u1"}
+
+
+class ModelFormatError(ValueError):
+    """Plik modelu jest uszkodzony lub w nieobsługiwanej wersji"""
+
+
+class _StringTable:
+    """Internuje napisy - każdy unikalny napis zapisany tylko raz"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+    def encode(self) -> Tuple[array, bytes]:
+        offsets = array("I", [0])
+        chunks = []
+        total = 0
+        for value in self.strings:
+            data = value.encode("utf-8")
+            chunks.append(data)
+            total += len(data)
+            offsets.append(total)
+        return offsets, b"".join(chunks)
+
+
+def encode_model(snapshot: Dict[str, Dict[str, Any]]) -> bytes:
+    """Serializuje snapshot SmartContext (domena -> stan sharda) do formatu binarnego"""
+    strings = _StringTable()
+    cols = {name: array(typecode) for name, typecode in _SECTIONS if name not in ("STRS_OFF", "STRS_DAT")}
+    cols["PAT_COFF"].append(0)
+    cols["PAT_DOFF"].append(0)
+
+    for domain, state in snapshot.items():
+        dom = strings.intern(domain)
+
+        for pattern_key, pattern in state["patterns"].items():
+            cols["PAT_DOM"].append(dom)
+            cols["PAT_KEY"].append(strings.intern(pattern_key))
+            cols["PAT_CNT"].append(pattern["count"])
+            for comp_id, count in pattern["components"].items():
+                cols["PCMP_ID"].append(strings.intern(comp_id))
+                cols["PCMP_CNT"].append(count)
+            cols["PAT_COFF"].append(len(cols["PCMP_ID"]))
+            for description in pattern["descriptions"]:
+                cols["PDSC_ID"].append(strings.intern(description))
+            cols["PAT_DOFF"].append(len(cols["PDSC_ID"]))
+
+        for comp_id, perf in state["component_performance"].items():
+            cols["PRF_DOM"].append(dom)
+            cols["PRF_CMP"].append(strings.intern(comp_id))
+            cols["PRF_USE"].append(perf["usage_count"])
+            cols["PRF_RATE"].append(perf["success_rate"])
+
+        for (comp_a, comp_b), count in state.get("cooccurrence", {}).items():
+            cols["COC_DOM"].append(dom)
+            cols["COC_A"].append(strings.intern(comp_a))
+            cols["COC_B"].append(strings.intern(comp_b))
+            cols["COC_CNT"].append(count)
+
+    cols["STRS_OFF"], cols["STRS_DAT"] = strings.encode()
+
+    payloads = []
+    for name, _ in _SECTIONS:
+        col = cols[name]
+        if isinstance(col, array):
+            if sys.byteorder != "little":
+                col = array(col.typecode, col)
+                col.byteswap()
+            col = col.tobytes()
+        payloads.append(col)
+
+    offset = _HEADER.size + _SECTION.size * len(_SECTIONS)
+    table = []
+    body = []
+    for (name, typecode), payload in zip(_SECTIONS, payloads):
+        padding = -offset % _ALIGN
+        body.append(b"\x00" * padding)
+        offset += padding
+        table.append(_SECTION.pack(name.encode("ascii"), typecode.encode("ascii"),
+                                   offset, len(payload), zlib.crc32(payload)))
+        body.append(payload)
+        offset += len(payload)
+
+    table_bytes = b"".join(table)
+    header = _HEADER.pack(MODEL_MAGIC, MODEL_VERSION, 0, len(_SECTIONS), zlib.crc32(table_bytes), 0)
+    return header + table_bytes + b"".join(body)
+
+
+def _section_view(buffer, typecode: str, offset: int, nbytes: int):
+    """Widok tablicy na buforze (mmap) bez kopiowania"""
+    if np is not None:
+        return np.frombuffer(buffer, dtype=_NUMPY_DTYPES[typecode],
+                             count=nbytes // struct.calcsize(typecode), offset=offset)
+    view = memoryview(buffer)[offset:offset + nbytes]
+    if typecode == "B":
+        return view
+    if sys.byteorder != "little":
+        swapped = array(typecode, view.tobytes())
+        swapped.byteswap()
+        return swapped
+    return view.cast(typecode)
+
+
+def _crc32(buffer, offset: int, nbytes: int) -> int:
+    """CRC32 fragmentu bufora bez kopiowania"""
+    with memoryview(buffer) as view:
+        with view[offset:offset + nbytes] as chunk:
+            return zlib.crc32(chunk)
+
+
+def read_sections(buffer, verify: bool = True) -> Dict[str, Any]:
+    """Parsuje nagłówek i zwraca widoki sekcji, opcjonalnie weryfikując sumy kontrolne"""
+    if len(buffer) < _HEADER.size:
+        raise ModelFormatError("Plik modelu jest za krótki")
+
+    magic, version, _flags, section_count, table_crc, _ = _HEADER.unpack_from(buffer, 0)
+    if magic != MODEL_MAGIC:
+        raise ModelFormatError("Nieprawidłowy magic - to nie jest plik modelu SmartContext")
+    if version != MODEL_VERSION:
+        raise ModelFormatError(f"Nieobsługiwana wersja modelu: {version}")
+
+    table_end = _HEADER.size + _SECTION.size * section_count
+    if table_end > len(buffer):
+        raise ModelFormatError("Tablica sekcji wykracza poza plik")
+    table = bytes(buffer[_HEADER.size:table_end])
+    if verify and zlib.crc32(table) != table_crc:
+        raise ModelFormatError("Suma kontrolna tablicy sekcji się nie zgadza")
+
+    sections = {}
+    try:
+        for i in range(section_count):
+            name, typecode, offset, nbytes, crc = _SECTION.unpack_from(table, i * _SECTION.size)
+            name = name.rstrip(b"\x00").decode("ascii")
+            typecode = typecode.decode("ascii")
+            if typecode not in _NUMPY_DTYPES:
+                raise ModelFormatError(f"Nieznany typ sekcji {name}: {typecode!r}")
+            if offset + nbytes > len(buffer):
+                raise ModelFormatError(f"Sekcja {name} wykracza poza plik")
+            if verify and _crc32(buffer, offset, nbytes) != crc:
+                raise ModelFormatError(f"Suma kontrolna sekcji {name} się nie zgadza")
+            sections[name] = _section_view(buffer, typecode, offset, nbytes)
+
+        missing = [name for name, _ in _SECTIONS if name not in sections]
+        if missing:
+            raise ModelFormatError(f"Brak sekcji: {', '.join(missing)}")
+    except ModelFormatError:
+        # Zwolnij widoki, żeby mmap dało się zamknąć
+        sections.clear()
+        raise
+    except (struct.error, UnicodeDecodeError, ValueError, TypeError) as e:
+        # Bez weryfikacji sum uszkodzona tablica sekcji może mieć dowolną zawartość
+        sections.clear()
+        raise ModelFormatError(f"Uszkodzona tablica sekcji: {e}") from e
+    return sections
+
+
+def decode_sections(sections: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Buduje snapshot SmartContext z widoków sekcji"""
+    offsets = sections["STRS_OFF"]
+    data = bytes(sections["STRS_DAT"])
+    strings = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    snapshot: Dict[str, Dict[str, Any]] = {}
+
+    def state_for(dom_sid):
+        return snapshot.setdefault(strings[dom_sid], {"patterns": {}, "component_performance": {}, "cooccurrence": {}})
+
+    comp_off, desc_off = sections["PAT_COFF"], sections["PAT_DOFF"]
+    comp_ids, comp_counts, desc_ids = sections["PCMP_ID"], sections["PCMP_CNT"], sections["PDSC_ID"]
+    for i, (dom, key, count) in enumerate(zip(sections["PAT_DOM"], sections["PAT_KEY"], sections["PAT_CNT"])):
+        components = {strings[comp_ids[j]]: int(comp_counts[j]) for j in range(comp_off[i], comp_off[i + 1])}
+        descriptions = tuple(strings[desc_ids[j]] for j in range(desc_off[i], desc_off[i + 1]))
+        state_for(dom)["patterns"][strings[key]] = {
+            "count": int(count),
+            "components": components,
+            "descriptions": descriptions
+        }
+
+    for dom, comp, usage, rate in zip(sections["PRF_DOM"], sections["PRF_CMP"],
+                                      sections["PRF_USE"], sections["PRF_RATE"]):
+        state_for(dom)["component_performance"][strings[comp]] = {
+            "usage_count": int(usage),
+            "success_rate": float(rate)
+        }
+
+    for dom, comp_a, comp_b, count in zip(sections["COC_DOM"], sections["COC_A"],
+                                          sections["COC_B"], sections["COC_CNT"]):
+        state_for(dom)["cooccurrence"][(strings[comp_a], strings[comp_b])] = int(count)
+
+    return snapshot
+
+
+def write_model(path: str, snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Zapisuje snapshot do pliku modelu i zwraca statystyki eksportu"""
+    payload = encode_model(snapshot)
+    with open(path, "wb") as f:
+        f.write(payload)
+    return {
+        "path": path,
+        "format_version": MODEL_VERSION,
+        "size_bytes": len(payload),
+        "checksum": f"{zlib.crc32(payload):08x}",
+        "domains": len(snapshot)
+    }
+
+
+def read_model(path: str, verify: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Mapuje plik modelu w pamięć i odtwarza snapshot SmartContext"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            # mmap nie obsługuje pustych plików
+            raise ModelFormatError("Plik modelu jest za krótki")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            sections = read_sections(mm, verify=verify)
+            try:
+                return decode_sections(sections)
+            except (IndexError, UnicodeDecodeError, ValueError) as e:
+                raise ModelFormatError(f"Uszkodzone sekcje modelu: {e}") from e
+            finally:
+                # Widoki muszą zostać zwolnione przed zamknięciem mmap
+                for view in sections.values():
+                    if isinstance(view, memoryview):
+                        view.release()
+                sections.clear()
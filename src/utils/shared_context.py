@@ -0,0 +1,268 @@
+"""Shared-memory aggregate tables for multi-worker SmartContext deployments
+
+Kilka procesów serwera na jednej maszynie Linux może współdzielić gorące tabele
+SmartContext (liczniki użyć komponentów, success score i współwystępowanie par)
+w jednym segmencie ``multiprocessing.shared_memory``. Komponent dostaje stały
+numer slotu (ordinal) wyznaczany z odcisku jego id, więc każdy worker czyta
+ten sam model bez IPC. Inkrementacje są atomowe per slot dzięki blokadom
+``fcntl.lockf`` na pasmach pliku blokady (bez zewnętrznych usług).
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows - tryb współdzielony niedostępny
+    fcntl = None
+
+SHARED_MAGIC = 0x53435458534d454d  # "SCTXSMEM"
+SHARED_VERSION = 1
+
+_HEADER = struct.Struct("<QIIQI")
+_HEADER_SIZE = 64
+_NAME_SIZE = 64
+_LOCK_STRIPES = 64
+_DIRECTORY_LOCK = _LOCK_STRIPES      # bajt blokady katalogu slotów
+_INIT_LOCK = _LOCK_STRIPES + 1       # bajt blokady inicjalizacji segmentu
+
+# success_rate trzymamy w promilach jako liczbę całkowitą (0.1 za sukces, max 1.0)
+_SUCCESS_STEP = 100
+_SUCCESS_MAX = 1000
+
+
+def component_fingerprint(component_id: str) -> int:
+    """Stabilny między procesami, niezerowy odcisk id komponentu"""
+    digest = hashlib.blake2b(component_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | 1
+
+
+class SharedAggregateTables:
+    """Tabele agregatów SmartContext w pamięci współdzielonej, indeksowane ordinalem komponentu"""
+
+    def __init__(self, name: str = "ai_agent_smart_context", capacity: int = 1024,
+                 lock_dir: Optional[str] = None):
+        if fcntl is None:
+            raise RuntimeError("Shared SmartContext requires fcntl (Linux/Unix)")
+
+        self.name = name
+        self._lock_fd = os.open(
+            os.path.join(lock_dir or tempfile.gettempdir(), f"{name}.lock"),
+            os.O_RDWR | os.O_CREAT, 0o600
+        )
+        self._slots: Dict[str, int] = {}
+
+        with self._locked(_INIT_LOCK):
+            self._shm, created = self._open_segment(name, capacity)
+            if created:
+                _HEADER.pack_into(self._shm.buf, 0, SHARED_MAGIC, SHARED_VERSION, capacity, 0, 0)
+
+        magic, version, capacity, _, _ = _HEADER.unpack_from(self._shm.buf, 0)
+        if magic != SHARED_MAGIC or version != SHARED_VERSION:
+            self.close()
+            raise RuntimeError(f"Shared memory segment '{name}' has an incompatible layout")
+
+        self.capacity = capacity
+        self._map_tables()
+
+    @staticmethod
+    def _segment_size(capacity: int) -> int:
+        return (_HEADER_SIZE + capacity * 8 + capacity * _NAME_SIZE
+                + capacity * 8 * 2 + capacity * capacity * 4)
+
+    def _open_segment(self, name: str, capacity: int) -> Tuple[shared_memory.SharedMemory, bool]:
+        """Tworzy segment lub dołącza do istniejącego (wywoływane pod blokadą inicjalizacji)"""
+        try:
+            shm = self._shared_memory(name, create=True, size=self._segment_size(capacity))
+            created = True
+        except FileExistsError:
+            shm = self._shared_memory(name, create=False)
+            created = False
+        return shm, created
+
+    @staticmethod
+    def _shared_memory(name: str, create: bool, size: int = 0) -> shared_memory.SharedMemory:
+        """Segment, którego nie usuwa resource_tracker przy wyjściu pojedynczego workera"""
+        try:
+            return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+        except TypeError:
+            # Python < 3.13 - brak parametru track, wyrejestruj ręcznie
+            shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+            return shm
+
+    def _map_tables(self):
+        """Widoki tablic na buforze segmentu"""
+        cap = self.capacity
+        buf = self._shm.buf
+        offset = _HEADER_SIZE
+        self._keys = buf[offset:offset + cap * 8].cast("Q")
+        offset += cap * 8
+        self._names = buf[offset:offset + cap * _NAME_SIZE]
+        offset += cap * _NAME_SIZE
+        self._usage = buf[offset:offset + cap * 8].cast("Q")
+        offset += cap * 8
+        self._success = buf[offset:offset + cap * 8].cast("Q")
+        offset += cap * 8
+        self._cooccurrence = buf[offset:offset + cap * cap * 4].cast("I")
+
+    @contextmanager
+    def _locked(self, stripe: int):
+        """Blokada międzyprocesowa na jednym bajcie pliku blokady"""
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, stripe)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, stripe)
+
+    # === ORDINALE KOMPONENTÓW ===
+
+    def _probe(self, component_id: str) -> Tuple[int, int]:
+        """Zwraca (slot, odcisk) - slot z tym odciskiem albo pierwszy pusty"""
+        fingerprint = component_fingerprint(component_id)
+        start = fingerprint % self.capacity
+        for step in range(self.capacity):
+            slot = (start + step) % self.capacity
+            key = self._keys[slot]
+            if key == fingerprint or key == 0:
+                return slot, fingerprint
+        return -1, fingerprint
+
+    def slot_for(self, component_id: str, create: bool = True) -> Optional[int]:
+        """Stały ordinal komponentu, wspólny dla wszystkich workerów"""
+        slot = self._slots.get(component_id)
+        if slot is not None:
+            return slot
+
+        slot, fingerprint = self._probe(component_id)
+        if slot >= 0 and self._keys[slot] == fingerprint:
+            self._slots[component_id] = slot
+            return slot
+        if not create:
+            return None
+
+        with self._locked(_DIRECTORY_LOCK):
+            # Ponowne sprawdzenie pod blokadą - inny worker mógł zająć slot
+            slot, fingerprint = self._probe(component_id)
+            if slot < 0:
+                return None
+            if self._keys[slot] == 0:
+                name = component_id.encode("utf-8")[:_NAME_SIZE]
+                start = slot * _NAME_SIZE
+                self._names[start:start + _NAME_SIZE] = name.ljust(_NAME_SIZE, b"\x00")
+                # Klucz zapisujemy po nazwie - kto widzi klucz, widzi też nazwę
+                self._keys[slot] = fingerprint
+                self._add_header_field(4, 1)
+
+        self._slots[component_id] = slot
+        return slot
+
+    def _slot_name(self, slot: int) -> str:
+        start = slot * _NAME_SIZE
+        return bytes(self._names[start:start + _NAME_SIZE]).rstrip(b"\x00").decode("utf-8", "ignore")
+
+    # === AKTUALIZACJE ===
+
+    def _add_header_field(self, index: int, delta: int):
+        """Zwiększa pole nagłówka (3 = generacja, 4 = zajęte sloty) - wywoływane pod blokadą"""
+        fields = list(_HEADER.unpack_from(self._shm.buf, 0))
+        fields[index] += delta
+        _HEADER.pack_into(self._shm.buf, 0, *fields)
+
+    def record_success(self, component_ids: Iterable[str], occurrences: int = 1) -> bool:
+        """Atomowo (per slot) dolicza udanego agenta do tabel współdzielonych"""
+        slots = sorted({slot for slot in (self.slot_for(c) for c in component_ids) if slot is not None})
+
+        # Aktualizacje grupowane po pasmach blokad; jedno pasmo naraz - bez zakleszczeń
+        by_stripe: Dict[int, List[int]] = {}
+        for slot in slots:
+            by_stripe.setdefault(slot % _LOCK_STRIPES, []).append(slot)
+
+        for stripe in sorted(by_stripe):
+            with self._locked(stripe):
+                for slot in by_stripe[stripe]:
+                    self._usage[slot] += occurrences
+                    self._success[slot] = min(_SUCCESS_MAX, self._success[slot] + _SUCCESS_STEP * occurrences)
+                    # Wiersz współwystępowania należy do slotu o mniejszym numerze
+                    row = slot * self.capacity
+                    for other in slots:
+                        if other > slot:
+                            self._cooccurrence[row + other] += occurrences
+
+        with self._locked(_DIRECTORY_LOCK):
+            self._add_header_field(3, 1)
+        return len(slots) > 0
+
+    # === ODCZYTY (bez blokad) ===
+
+    @property
+    def generation(self) -> int:
+        """Liczba zapisów do tabel ze wszystkich workerów"""
+        return _HEADER.unpack_from(self._shm.buf, 0)[3]
+
+    def _used_slots(self) -> List[int]:
+        return [slot for slot in range(self.capacity) if self._keys[slot] != 0]
+
+    def component_performance(self) -> Dict[str, Dict[str, Any]]:
+        """Wspólne dla wszystkich workerów statystyki komponentów"""
+        return {
+            self._slot_name(slot): {
+                "usage_count": self._usage[slot],
+                "success_rate": self._success[slot] / _SUCCESS_MAX
+            }
+            for slot in self._used_slots()
+            if self._usage[slot] > 0
+        }
+
+    def usage_count(self, component_id: str) -> int:
+        slot = self.slot_for(component_id, create=False)
+        return self._usage[slot] if slot is not None else 0
+
+    def cooccurrence(self, component_a: str, component_b: str) -> int:
+        slot_a = self.slot_for(component_a, create=False)
+        slot_b = self.slot_for(component_b, create=False)
+        if slot_a is None or slot_b is None or slot_a == slot_b:
+            return 0
+        low, high = min(slot_a, slot_b), max(slot_a, slot_b)
+        return self._cooccurrence[low * self.capacity + high]
+
+    def get_stats(self) -> Dict[str, Any]:
+        _, _, capacity, generation, slots_used = _HEADER.unpack_from(self._shm.buf, 0)
+        return {
+            "mode": "shared_memory",
+            "segment": self.name,
+            "capacity": capacity,
+            "slots_used": slots_used,
+            "generation": generation,
+            "segment_bytes": self._shm.size
+        }
+
+    # === CYKL ŻYCIA ===
+
+    def close(self):
+        """Odłącza bieżący proces od segmentu"""
+        for view in ("_keys", "_names", "_usage", "_success", "_cooccurrence"):
+            mv = self.__dict__.pop(view, None)
+            if mv is not None:
+                mv.release()
+        if getattr(self, "_shm", None) is not None:
+            self._shm.close()
+            self._shm = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def unlink(self):
+        """Usuwa segment z systemu (gdy wszystkie workery zostały zatrzymane)"""
+        shm = shared_memory.SharedMemory(name=self.name, create=False)
+        shm.close()
+        shm.unlink()
@@ -1,50 +1,142 @@
 """Smart Context module for AI-enhanced decision making"""
 
+import asyncio
 import json
+import os
 from typing import Dict, Any, List
 from datetime import datetime
 
+from .lru_cache import LRUCache
+from .model_io import write_model, read_model
+
+# Ile ostatnich opisów trzymamy na wzorzec (ogranicza koszt copy-on-write)
+MAX_PATTERN_DESCRIPTIONS = 100
+
+
+def empty_shard_state() -> Dict[str, Any]:
+    """Pusty stan sharda: wzorce, wydajność komponentów i współwystępowanie par komponentów"""
+    return {"patterns": {}, "component_performance": {}, "cooccurrence": {}}
+
+
+# Reguły sugestii: (sygnał, słowa kluczowe, sugerowane komponenty)
+SUGGESTION_RULES = (
+    ("conversation", frozenset(['chat', 'conversation', 'talk', 'rozmowa', 'czat']), (
+        {'component_id': 'llm_text_generator', 'reason': 'Conversation needs LLM', 'confidence': 90},
+        {'component_id': 'chat_interface', 'reason': 'Chat functionality', 'confidence': 85},
+        {'component_id': 'conversation_memory', 'reason': 'Context retention', 'confidence': 80}
+    )),
+    ("email", frozenset(['email', 'mail', 'wiadomość', 'newsletter', 'poczta']), (
+        {'component_id': 'gmail_integration', 'reason': 'Gmail email handling', 'confidence': 90},
+        {'component_id': 'sendgrid_integration', 'reason': 'Bulk email sending', 'confidence': 85},
+        {'component_id': 'email_template_manager', 'reason': 'Template management', 'confidence': 80}
+    )),
+    ("calendar", frozenset(['calendar', 'schedule', 'kalendarz', 'terminarz']), (
+        {'component_id': 'google_calendar_integration', 'reason': 'Calendar access', 'confidence': 90},
+        {'component_id': 'scheduling_system', 'reason': 'Appointment scheduling', 'confidence': 85}
+    )),
+)
+
+
+class DomainShard:
+    """Partycja stanu SmartContext dla jednej domeny z własnym lockiem.
+
+    Stan jest niemutowalnym snapshotem podmienianym w całości przez writerów
+    (copy-on-write), więc odczyty nie potrzebują locka i nigdy nie blokują uczenia.
+    """
+
+    __slots__ = ("domain", "lock", "state")
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.lock = asyncio.Lock()
+        self.state = empty_shard_state()
+
+
 class SmartContext:
     """Inteligentny kontekst do uczenia się wzorców i podpowiadania"""
     
-    def __init__(self):
-        self.learned_patterns = {}
-        self.component_performance = {}
-        self.domain_insights = {}
+    def __init__(self, suggestion_cache_size: int = 512, shared_tables=None):
+        self._shards: Dict[str, DomainShard] = {}
+        # Rośnie przy każdej zmianie wyuczonego modelu - unieważnia zapamiętane sugestie
+        self._generation = 0
+        self.suggestion_cache = LRUCache(suggestion_cache_size)
+        # Opcjonalne tabele w pamięci współdzielonej (tryb wielu workerów)
+        self.shared_tables = shared_tables
+    
+    @property
+    def model_generation(self) -> int:
+        """Generacja modelu - lokalne zmiany plus zapisy innych workerów w trybie współdzielonym"""
+        if self.shared_tables is not None:
+            return self._generation + self.shared_tables.generation
+        return self._generation
+        
+    def _get_shard(self, domain: str) -> DomainShard:
+        """Zwraca (lub tworzy) shard dla domeny"""
+        shard = self._shards.get(domain)
+        if shard is None:
+            shard = self._shards.setdefault(domain, DomainShard(domain))
+        return shard
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Spójny per-domena snapshot stanu - bez blokowania writerów"""
+        return {domain: shard.state for domain, shard in list(self._shards.items())}
+    
+    @property
+    def learned_patterns(self) -> Dict[str, Any]:
+        """Wszystkie wyuczone wzorce (widok tylko do odczytu)"""
+        patterns = {}
+        for state in self.snapshot().values():
+            patterns.update(state["patterns"])
+        return patterns
+    
+    @property
+    def component_performance(self) -> Dict[str, Any]:
+        """Zagregowana wydajność komponentów ze wszystkich domen (widok tylko do odczytu)"""
+        performance = {}
+        if self.shared_tables is not None:
+            # Liczniki wspólne dla wszystkich workerów, domeny z lokalnych shardów
+            for comp_id, perf in self.shared_tables.component_performance().items():
+                performance[comp_id] = {**perf, 'domains': []}
+            for domain, state in self.snapshot().items():
+                for comp_id in state["component_performance"]:
+                    if comp_id in performance:
+                        performance[comp_id]['domains'].append(domain)
+            return performance
+        for domain, state in self.snapshot().items():
+            for comp_id, perf in state["component_performance"].items():
+                merged = performance.setdefault(comp_id, {
+                    'usage_count': 0,
+                    'success_rate': 0.0,
+                    'domains': []
+                })
+                merged['usage_count'] += perf['usage_count']
+                merged['success_rate'] = min(1.0, merged['success_rate'] + perf['success_rate'])
+                merged['domains'].append(domain)
+        return performance
         
     async def get_smart_component_suggestions(self, description: str, domain: str, 
                                             existing_component_ids: List[str] = None) -> List[Dict[str, Any]]:
         """Inteligentne sugestie komponentów na podstawie opisu i domeny"""
         if existing_component_ids is None:
             existing_component_ids = []
-            
-        suggestions = []
         
-        # Podstawowe sugestie na podstawie słów kluczowych
-        keywords = description.lower().split()
+        # Sygnatura opisu - które grupy słów kluczowych wystąpiły
+        keywords = set(description.lower().split())
+        signals = frozenset(name for name, words, _ in SUGGESTION_RULES if not keywords.isdisjoint(words))
         
-        if any(word in keywords for word in ['chat', 'conversation', 'talk', 'rozmowa', 'czat']):
-            suggestions.extend([
-                {'component_id': 'llm_text_generator', 'reason': 'Conversation needs LLM', 'confidence': 90},
-                {'component_id': 'chat_interface', 'reason': 'Chat functionality', 'confidence': 85},
-                {'component_id': 'conversation_memory', 'reason': 'Context retention', 'confidence': 80}
-            ])
-            
-        if any(word in keywords for word in ['email', 'mail', 'wiadomość', 'newsletter', 'poczta']):
-            suggestions.extend([
-                {'component_id': 'gmail_integration', 'reason': 'Gmail email handling', 'confidence': 90},
-                {'component_id': 'sendgrid_integration', 'reason': 'Bulk email sending', 'confidence': 85},
-                {'component_id': 'email_template_manager', 'reason': 'Template management', 'confidence': 80}
-            ])
-            
-        if any(word in keywords for word in ['calendar', 'schedule', 'kalendarz', 'terminarz']):
-            suggestions.extend([
-                {'component_id': 'google_calendar_integration', 'reason': 'Calendar access', 'confidence': 90},
-                {'component_id': 'scheduling_system', 'reason': 'Appointment scheduling', 'confidence': 85}
-            ])
+        # Generację czytamy przed wyliczeniem, więc wpis nigdy nie jest nowszy niż model
+        cache_key = (domain, signals, self.model_generation)
+        suggestions = self.suggestion_cache.get(cache_key)
+        if suggestions is None:
+            suggestions = tuple(
+                suggestion
+                for name, _, rule_suggestions in SUGGESTION_RULES if name in signals
+                for suggestion in rule_suggestions
+            )
+            self.suggestion_cache.put(cache_key, suggestions)
         
         # Filter out existing components
-        filtered_suggestions = [s for s in suggestions if s['component_id'] not in existing_component_ids]
+        filtered_suggestions = [dict(s) for s in suggestions if s['component_id'] not in existing_component_ids]
         
         # Return max 10 suggestions
         return filtered_suggestions[:10]
@@ -55,7 +147,10 @@ class SmartContext:
             "learned_patterns": list(self.learned_patterns.keys()),
             "success_metrics": {
                 "total_patterns": len(self.learned_patterns),
-                "component_performance_count": len(self.component_performance)
+                "component_performance_count": len(self.component_performance),
+                "model_generation": self.model_generation,
+                "suggestion_cache": self.suggestion_cache.get_stats(),
+                "storage": self.shared_tables.get_stats() if self.shared_tables is not None else {"mode": "local"}
             },
             "optimization_suggestions": [
                 "Use components with high success rates",
@@ -66,46 +161,65 @@ class SmartContext:
             "status": "full"
         }
     
-    async def learn_from_successful_agent(self, agent: Dict[str, Any]):
-        """Uczenie się z udanych agentów"""
+    async def learn_from_successful_agent(self, agent: Dict[str, Any], occurrences: int = 1):
+        """Uczenie się z udanych agentów (occurrences - liczba połączonych udanych testów)"""
         domain = agent.get('domain', 'general')
         components = agent.get('components', [])
+        comp_ids = [comp.get('component_id', 'unknown') for comp in components]
         
-        # Zapisz wzorzec sukcesu
-        pattern_key = f"{domain}_{len(components)}_components"
-        if pattern_key not in self.learned_patterns:
-            self.learned_patterns[pattern_key] = {
-                'count': 0,
-                'components': {},
-                'descriptions': []
-            }
+        shard = self._get_shard(domain)
+        async with shard.lock:
+            state = shard.state
             
-        pattern = self.learned_patterns[pattern_key]
-        pattern['count'] += 1
-        pattern['descriptions'].append(agent.get('description', ''))
-        
-        # Zlicz komponenty
-        for comp in components:
-            comp_id = comp.get('component_id', 'unknown')
-            if comp_id not in pattern['components']:
-                pattern['components'][comp_id] = 0
-            pattern['components'][comp_id] += 1
+            # Zapisz wzorzec sukcesu (kopia tylko zmienianego wzorca)
+            pattern_key = f"{domain}_{len(components)}_components"
+            old_pattern = state["patterns"].get(pattern_key)
+            if old_pattern is None:
+                pattern = {'count': 0, 'components': {}, 'descriptions': ()}
+            else:
+                pattern = {
+                    'count': old_pattern['count'],
+                    'components': dict(old_pattern['components']),
+                    'descriptions': old_pattern['descriptions']
+                }
             
-        # Aktualizuj performance komponentów
-        for comp in components:
-            comp_id = comp.get('component_id', 'unknown')
-            if comp_id not in self.component_performance:
-                self.component_performance[comp_id] = {
-                    'usage_count': 0,
-                    'success_rate': 0.0,
-                    'domains': []
+            pattern['count'] += occurrences
+            pattern['descriptions'] = (pattern['descriptions'] + (agent.get('description', ''),))[-MAX_PATTERN_DESCRIPTIONS:]
+            
+            # Zlicz komponenty
+            for comp_id in comp_ids:
+                pattern['components'][comp_id] = pattern['components'].get(comp_id, 0) + occurrences
+            
+            # Aktualizuj performance komponentów w tej domenie
+            performance = dict(state["component_performance"])
+            for comp_id in comp_ids:
+                perf = performance.get(comp_id, {'usage_count': 0, 'success_rate': 0.0})
+                performance[comp_id] = {
+                    'usage_count': perf['usage_count'] + occurrences,
+                    'success_rate': min(1.0, perf['success_rate'] + 0.1 * occurrences)
                 }
             
-            perf = self.component_performance[comp_id]
-            perf['usage_count'] += 1
-            perf['success_rate'] = min(1.0, perf['success_rate'] + 0.1)
-            if domain not in perf['domains']:
-                perf['domains'].append(domain)
+            # Współwystępowanie komponentów w udanych agentach (pary posortowane)
+            cooccurrence = dict(state["cooccurrence"])
+            unique_ids = sorted(set(comp_ids))
+            for i, comp_a in enumerate(unique_ids):
+                for comp_b in unique_ids[i + 1:]:
+                    pair = (comp_a, comp_b)
+                    cooccurrence[pair] = cooccurrence.get(pair, 0) + occurrences
+            
+            patterns = dict(state["patterns"])
+            patterns[pattern_key] = pattern
+            
+            # Publikacja nowego snapshotu - pojedyncze przypisanie
+            shard.state = {
+                "patterns": patterns,
+                "component_performance": performance,
+                "cooccurrence": cooccurrence
+            }
+            self._generation += 1
+        
+        if self.shared_tables is not None:
+            self.shared_tables.record_success(comp_ids, occurrences)
     
     async def get_domain_insights(self, domain: str) -> Dict[str, Any]:
         """Zwraca insights dla konkretnej domeny"""
@@ -115,25 +229,29 @@ class SmartContext:
             'recommendations': []
         }
         
-        # Znajdź popularne komponenty w tej domenie
-        domain_components = {}
-        for comp_id, perf in self.component_performance.items():
-            if domain in perf['domains']:
-                domain_components[comp_id] = perf['usage_count']
-                
-        # Sortuj po popularności
-        popular = sorted(domain_components.items(), key=lambda x: x[1], reverse=True)
+        shard = self._shards.get(domain)
+        state = shard.state if shard is not None else empty_shard_state()
+        
+        # Sortuj komponenty domeny po popularności (w trybie współdzielonym - we wszystkich workerach)
+        if self.shared_tables is not None:
+            usage = lambda item: self.shared_tables.usage_count(item[0])
+        else:
+            usage = lambda item: item[1]['usage_count']
+        popular = sorted(state["component_performance"].items(), key=usage, reverse=True)
         insights['popular_components'] = [comp[0] for comp in popular[:5]]
         
+        # Pary komponentów najczęściej używane razem
+        pairs = sorted(state["cooccurrence"].items(), key=lambda x: x[1], reverse=True)
+        insights['component_pairs'] = [list(pair) for pair, _ in pairs[:5]]
+        
         # Wzorce sukcesu
-        for pattern_key, pattern in self.learned_patterns.items():
-            if domain in pattern_key:
-                insights['success_patterns'].append({
-                    'pattern': pattern_key,
-                    'count': pattern['count'],
-                    'top_components': sorted(pattern['components'].items(), 
-                                           key=lambda x: x[1], reverse=True)[:3]
-                })
+        for pattern_key, pattern in state["patterns"].items():
+            insights['success_patterns'].append({
+                'pattern': pattern_key,
+                'count': pattern['count'],
+                'top_components': sorted(pattern['components'].items(), 
+                                       key=lambda x: x[1], reverse=True)[:3]
+            })
         
         # Rekomendacje
         insights['recommendations'] = [
@@ -144,12 +262,40 @@ class SmartContext:
         
         return insights
 
+    async def export_model(self, path: str) -> Dict[str, Any]:
+        """Eksportuje wyuczony model (wzorce, wydajność, współwystępowanie) do pliku binarnego"""
+        return write_model(path, self.snapshot())
+    
+    async def import_model(self, path: str, verify: bool = True) -> Dict[str, Any]:
+        """Importuje model z pliku (mmap) i zastępuje stan shardów zaimportowanych domen"""
+        snapshot = read_model(path, verify=verify)
+        for domain, state in snapshot.items():
+            shard = self._get_shard(domain)
+            async with shard.lock:
+                shard.state = state
+                self._generation += 1
+        return {
+            "path": path,
+            "domains": len(snapshot),
+            "patterns": sum(len(state["patterns"]) for state in snapshot.values()),
+            "components": sum(len(state["component_performance"]) for state in snapshot.values())
+        }
+
 # Singleton instance
 _smart_context_instance = None
 
 def get_smart_context() -> SmartContext:
-    """Zwraca singleton instance SmartContext"""
+    """Zwraca singleton instance SmartContext.
+
+    Ustawienie SMART_CONTEXT_SHARED_MEMORY=<nazwa segmentu> włącza tryb, w którym
+    gorące tabele są współdzielone przez wszystkie procesy serwera na tej maszynie.
+    """
     global _smart_context_instance
     if _smart_context_instance is None:
-        _smart_context_instance = SmartContext()
+        shared_tables = None
+        segment = os.environ.get("SMART_CONTEXT_SHARED_MEMORY")
+        if segment:
+            from .shared_context import SharedAggregateTables
+            shared_tables = SharedAggregateTables(name=segment)
+        _smart_context_instance = SmartContext(shared_tables=shared_tables)
     return _smart_context_instance
\ No newline at end of file
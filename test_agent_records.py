@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests and memory benchmark for compact agent records
+"""
+
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import sys
+import os
+import tempfile
+import tracemalloc
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+DESCRIPTIONS = [
+    "chat agent for customers that sends email and stores data in database",
+    "sales assistant that analyzes leads and posts updates to slack",
+    "support bot answering questions from product documents",
+]
+DOMAINS = ["general", "sales", "customer_service"]
+
+
+def _generated_agents(count: int):
+    """Dokumenty agentów utworzonych przez manager (każdy z unikalnym opisem i promptem)"""
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+    from tools.agent_store import InMemoryAgentStore
+
+    async def create_all():
+        manager = EnhancedAgentManager(store=InMemoryAgentStore(compact=False))
+        ids = []
+        for i in range(count):
+            created = await manager.create_agent(
+                name=f"Agent {i}",
+                description=f"{DESCRIPTIONS[i % 3]} for team {i}",
+                domain=DOMAINS[i % 3],
+                complexity="medium"
+            )
+            ids.append(created["agent_id"])
+        return [json.dumps(await manager.store.get(agent_id)) for agent_id in ids]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(tmp_dir)  # interfejs chatu zapisuje plik HTML w katalogu bieżącym
+        try:
+            return asyncio.run(create_all())
+        finally:
+            os.chdir(cwd)
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, objects
+    finally:
+        tracemalloc.stop()
+
+
+def test_records_round_trip_and_share_configs():
+    """Rekord odtwarza identyczny dokument, id są 16-bajtowe, a konfiguracje współdzielone"""
+    from tools.agent_records import AgentRecord, ConfigPool
+
+    documents = [json.loads(blob) for blob in _generated_agents(6)]
+    pool = ConfigPool()
+    records = [AgentRecord.from_dict(doc, pool) for doc in documents]
+
+    for record, document in zip(records, documents):
+        assert record.to_dict() == document
+        assert isinstance(record.id, bytes) and len(record.id) == 16
+        assert not hasattr(record, "__dict__")
+
+    # Ta sama konfiguracja integracji w różnych agentach to jeden obiekt
+    configs = [c.configuration for r in records for c in r.components
+               if c.configuration == {"timeout": 30, "rate_limit": 60, "retry_attempts": 3}]
+    assert len(configs) > 1 and all(c is configs[0] for c in configs)
+
+    # Zmiany w zwróconym słowniku nie przeciekają do rekordu ani współdzielonej konfiguracji
+    exported = records[0].to_dict()
+    exported["components"][0]["configuration"]["changed"] = True
+    exported["metrics"]["test_runs"] = 99
+    assert records[0].to_dict() == documents[0]
+    print("✅ Records round-trip and share configuration dicts")
+
+
+def test_record_memory_benchmark():
+    """Benchmark: rekordy zajmują kilkukrotnie mniej pamięci niż słowniki"""
+    from tools.agent_records import AgentRecord, ConfigPool
+
+    blobs = _generated_agents(60)
+    dict_bytes, _ = _measure(lambda: [json.loads(blob) for blob in blobs])
+    pool = ConfigPool()
+    record_bytes, _ = _measure(lambda: [AgentRecord.from_dict(json.loads(blob), pool) for blob in blobs])
+
+    ratio = dict_bytes / record_bytes
+    print(f"📏 Per agent: dict {dict_bytes // len(blobs)} B, record {record_bytes // len(blobs)} B "
+          f"({ratio:.1f}x smaller, pool: {pool.get_stats()})")
+    assert ratio >= 3.0
+
+
+def test_revisions_share_unchanged_parts():
+    """100 rewizji agenta kosztuje ułamek 100 pełnych kopii - niezmienione części są wspólne"""
+    from tools.agent_store import InMemoryAgentStore
+
+    document = json.loads(_generated_agents(1)[0])
+    agent_id = document["id"]
+
+    def build(revisions):
+        store = InMemoryAgentStore(max_revisions=revisions)
+        agent = json.loads(json.dumps(document))
+        asyncio.run(store.put(agent, event="create"))
+        for i in range(1, revisions):
+            agent["metrics"]["test_runs"] = i
+            if i % 10 == 0:
+                agent["components"].append({"id": f"component-{i}", "component_id": "slack_integration",
+                                            "configuration": {"timeout": 30}, "position": i})
+            asyncio.run(store.put(agent, event="test"))
+        return store
+
+    one_bytes, _ = _measure(lambda: build(1))
+    history_bytes, store = _measure(lambda: build(100))
+
+    history = store._agents[agent_id]
+    first, last = history.get(1).record, history.latest.record
+    assert first.workflow is last.workflow
+    assert all(a is b for a, b in zip(first.components, last.components))
+    assert asyncio.run(store.get_revision(agent_id, 1)) == document
+    assert asyncio.run(store.get_revision(agent_id, 55))["metrics"]["test_runs"] == 54
+    assert [r["version"] for r in asyncio.run(store.list_revisions(agent_id))] == list(range(1, 101))
+
+    print(f"📏 1 revision: {one_bytes} B, 100 revisions: {history_bytes} B "
+          f"({history_bytes / (100 * one_bytes):.0%} of 100 full copies)")
+    assert history_bytes < 0.2 * 100 * one_bytes
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Agent Record Tests")
+    print("=" * 60)
+
+    results = {}
+    for test in (test_records_round_trip_and_share_configs, test_record_memory_benchmark,
+                 test_revisions_share_unchanged_parts):
+        try:
+            test()
+            results[test.__name__] = True
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results[test.__name__] = False
+
+    print("\n" + "=" * 60)
+    for name, passed in results.items():
+        print(f"{name}: {'✅ PASS' if passed else '❌ FAIL'}")
+
+    exit(0 if all(results.values()) else 1)
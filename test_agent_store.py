@@ -0,0 +1,818 @@
+#!/usr/bin/env python3
+"""
+Tests for agent storage backends and the manager operations that use them
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+
+def _stores(tmp_dir: str):
+    from tools.agent_store import InMemoryAgentStore, SQLiteAgentStore
+    from tools.event_log import EventSourcedAgentStore
+    return [InMemoryAgentStore(), SQLiteAgentStore(os.path.join(tmp_dir, "agents.db")),
+            EventSourcedAgentStore(os.path.join(tmp_dir, "events"))]
+
+
+async def _agent_lifecycle(store):
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+
+    manager = EnhancedAgentManager(store=store)
+    created = await manager.create_agent(
+        name="StoreAgent",
+        description="chat agent for customers that sends email",
+        domain="general",
+        complexity="medium"
+    )
+    agent_id = created["agent_id"]
+    assert {"analysis", "stored", "chat_interface", "total"} <= set(created["phase_timings_ms"])
+
+    # Znacznik wersji: niezmieniony agent to krótka odpowiedź, zmiana daje nowy znacznik
+    tag = created["version_tag"]
+    assert await manager.get_agent(agent_id, if_none_match=tag) == {
+        "success": True, "not_modified": True, "agent_id": agent_id, "version_tag": tag
+    }
+    tested = await manager.test_agent(agent_id, {"user_message": "hello"}, if_match=tag)
+    assert tested["success"] and tested["version_tag"] != tag
+    fetched = await manager.get_agent(agent_id, if_none_match=tag)
+    assert fetched["success"] and fetched["version_tag"] == tested["version_tag"]
+    assert fetched["agent"]["metrics"]["test_runs"] == 1
+    stale = await manager.add_component_to_agent(agent_id, "slack_integration", if_match=tag)
+    assert stale["conflict"] and stale["current_version_tag"] == tested["version_tag"]
+
+    components_before = len(fetched["agent"]["components"])
+    added = await manager.add_component_to_agent(agent_id, "slack_integration")
+    assert added["success"]
+    assert added["agent_updated"]["total_components"] == components_before + 1
+
+    # Liczniki utrzymywane przyrostowo zgadzają się z pełnym przeliczeniem
+    from tools.agent_counters import check_counters, compute_counters, intelligence_score
+    current = await store.get(agent_id)
+    assert check_counters(current) == {}
+    assert current["metrics"]["counters"]["component_count"] == components_before + 1
+    assert current["metrics"]["intelligence_score"] == intelligence_score(compute_counters(current))
+    
+    revisions = await manager.list_agent_revisions(agent_id)
+    assert [r["event"] for r in revisions["revisions"]] == ["create", "test", "add_component"]
+    first = await manager.get_agent(agent_id, version=1)
+    assert first["version"] == 1 and first["latest_version"] == 3
+    assert first["agent"]["metrics"]["test_runs"] == 0
+    assert len(first["agent"]["components"]) == components_before
+    assert not (await manager.get_agent(agent_id, version=99))["success"]
+    
+    listing = await manager.list_agents()
+    assert listing["total_count"] == 1
+    assert listing["agents"][0]["component_count"] == components_before + 1
+
+    assert (await manager.delete_agent(agent_id, if_match=tag))["conflict"]
+    deleted = await manager.delete_agent(agent_id, if_match=added["version_tag"])
+    assert deleted["success"]
+    assert not (await manager.get_agent(agent_id))["success"]
+    assert await store.count() == 0
+
+
+def test_agent_lifecycle_through_store():
+    """create/test/get/add_component/list/delete działają identycznie na obu backendach"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for store in _stores(tmp_dir):
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)  # interfejs chatu zapisuje plik HTML w katalogu bieżącym
+            try:
+                asyncio.run(_agent_lifecycle(store))
+            finally:
+                os.chdir(cwd)
+            print(f"✅ Agent lifecycle on {store.get_stats()['backend']} store")
+            if hasattr(store, "close"):
+                store.close()
+
+
+def test_sqlite_store_survives_restart():
+    """Agenci zapisani w SQLite są dostępni po ponownym otwarciu bazy"""
+    from tools.agent_store import SQLiteAgentStore
+
+    agent = {
+        "id": "agent-1",
+        "name": "Persistent",
+        "description": "x" * 500,
+        "domain": "sales",
+        "status": "draft",
+        "created_at": "2026-01-01T00:00:00",
+        "components": [{"component_id": "pollinations_llm", "configuration": {"system_prompt": "y" * 2000}}],
+        "metrics": {"intelligence_score": 80, "readiness_score": 70},
+        "ai_analysis": {"confidence_score": 90}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "agents.db")
+        store = SQLiteAgentStore(path)
+        asyncio.run(store.put(agent))
+        store.close()
+
+        reopened = SQLiteAgentStore(path)
+        assert asyncio.run(reopened.get("agent-1")) == agent
+        summaries = asyncio.run(reopened.list_summaries(domain="sales", status="draft"))["agents"]
+        assert [s["id"] for s in summaries] == ["agent-1"]
+        assert summaries[0]["description"].endswith("...")
+        assert reopened.get_stats()["compressed_bytes"] < 2500
+        reopened.close()
+
+    print("✅ SQLite store persists compressed documents and summary columns")
+
+
+def test_event_log_recovers_from_snapshot_and_tail():
+    """Po restarcie stan = snapshot + ogon logu; stare segmenty są usuwane, fsync grupowany"""
+    from tools.event_log import EventSourcedAgentStore
+
+    def agent(i, score=50):
+        return {"id": f"agent-{i:03d}", "name": f"Agent {i}", "description": "", "domain": "sales",
+                "status": "draft", "created_at": f"2026-01-01T00:00:{i % 60:02d}", "components": [],
+                "metrics": {"intelligence_score": score, "readiness_score": 0}, "ai_analysis": {}}
+
+    async def write_history(store):
+        # Równoległe zapisy czekają na wspólny fsync
+        await asyncio.gather(*(store.put(agent(i), event="create") for i in range(25)))
+        await store.put(agent(3, score=99), event="test")
+        await store.delete("agent-004")
+        await store.flush()
+        for i in range(25, 28):
+            await store.put(agent(i), event="create")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = os.path.join(tmp_dir, "events")
+        store = EventSourcedAgentStore(directory, snapshot_every=10)
+        asyncio.run(write_history(store))
+        stats = store.get_stats()
+        assert stats["appends"] == 30
+        assert stats["fsyncs"] < stats["appends"]
+        assert stats["snapshots_written"] >= 1
+        store.close()
+
+        # Obcięty ostatni rekord (awaria w trakcie zapisu) nie psuje odtwarzania
+        last_segment = sorted(name for name in os.listdir(directory) if name.startswith("log-"))[-1]
+        with open(os.path.join(directory, last_segment), "ab") as f:
+            f.write(b'{"seq": 31, "op": "put", "agent": {"id"')
+
+        reopened = EventSourcedAgentStore(directory, snapshot_every=10)
+        recovery = reopened.recovery
+        assert recovery["snapshot_seq"] > 0
+        assert recovery["replayed_records"] == 30 - recovery["snapshot_seq"]
+        assert asyncio.run(reopened.count()) == 27
+        assert asyncio.run(reopened.get("agent-004")) is None
+        assert asyncio.run(reopened.get("agent-003"))["metrics"]["intelligence_score"] == 99
+        assert asyncio.run(reopened.get_version("agent-003")) == 2  # numeracja rewizji przetrwała restart
+
+        # Optymistyczna współbieżność: drugi zapis z tą samą oczekiwaną wersją to konflikt
+        from tools.agent_store import VersionConflictError
+        assert asyncio.run(reopened.put(agent(26, score=70), expected_version=1)) == 2
+        try:
+            asyncio.run(reopened.put(agent(26, score=80), expected_version=1))
+            raise AssertionError("expected a version conflict")
+        except VersionConflictError as e:
+            assert e.current_version == 2
+        assert asyncio.run(reopened.get("agent-027")) == agent(27)
+        assert len([name for name in os.listdir(directory) if name.startswith("snapshot-")]) == 1
+        reopened.close()
+
+        # Awaria przy pierwszym zapisie po restarcie: urwany rekord na początku świeżego segmentu.
+        # Kolejny zapis nie może trafić do tej samej linii - inaczej następny restart by się nie udał.
+        empty_segment = EventSourcedAgentStore(directory, snapshot_every=1000)
+        empty_segment.close()
+        newest = sorted(name for name in os.listdir(directory) if name.startswith("log-"))[-1]
+        with open(os.path.join(directory, newest), "ab") as f:
+            f.write(b'{"seq": 99, "op": "put", "agent"')
+        torn = EventSourcedAgentStore(directory, snapshot_every=1000)
+        assert asyncio.run(torn.put(agent(40), event="create")) == 1
+        torn.close()
+        restarted = EventSourcedAgentStore(directory, snapshot_every=1000)
+        assert asyncio.run(restarted.get("agent-040")) == agent(40)
+        assert asyncio.run(restarted.count()) == 28
+        restarted.close()
+
+        # close() w trakcie okna fsync nie zostawia zapisów czekających w nieskończoność
+        async def close_during_window():
+            slow = EventSourcedAgentStore(os.path.join(tmp_dir, "slow"), fsync_interval=0.05)
+            write = asyncio.ensure_future(slow.put(agent(50), event="create"))
+            await asyncio.sleep(0.01)
+            slow.close()
+            return await asyncio.wait_for(write, timeout=1)
+
+        assert asyncio.run(close_during_window()) == 1
+
+        # Nieudany zapis do logu nie zmienia stanu w pamięci
+        async def failing_append(record):
+            raise OSError("disk full")
+
+        failing = EventSourcedAgentStore(os.path.join(tmp_dir, "failing"))
+        asyncio.run(failing.put(agent(60), event="create"))
+        failing._log.append = failing_append
+        for write in (lambda: failing.put(agent(60, score=99), event="test"), lambda: failing.delete("agent-060")):
+            try:
+                asyncio.run(write())
+                raise AssertionError("expected the append to fail")
+            except OSError:
+                pass
+        assert asyncio.run(failing.get("agent-060")) == agent(60)
+        assert asyncio.run(failing.get_version("agent-060")) == 1
+        assert asyncio.run(failing.list_summaries())["agents"][0]["intelligence_score"] == 50
+        failing.close()
+
+    print(f"✅ Event log recovered {recovery}")
+
+
+def test_sorted_views_match_across_backends():
+    """Filtrowane i posortowane listingi są zgodne z pełnym sortowaniem na obu backendach"""
+    import random
+    from tools.agent_index import SORT_OPTIONS
+
+    rng = random.Random(7)
+    agents = [{
+        "id": f"agent-{i:03d}",
+        "name": rng.choice(["alpha", "Beta", "gamma", "Delta"]) + str(i % 7),
+        "description": "",
+        "domain": rng.choice(["sales", "support", "general"]),
+        "status": rng.choice(["draft", "tested"]),
+        "created_at": f"2026-01-{1 + i % 28:02d}T00:00:{i % 60:02d}",
+        "components": [],
+        "metrics": {"intelligence_score": rng.randint(0, 100), "readiness_score": rng.randint(0, 100)},
+        "ai_analysis": {"confidence_score": rng.randint(0, 100)} if i % 3 else {}
+    } for i in range(120)]
+    # NOCASE w SQLite składa tylko ASCII: "Émile" < "éa", choć "émile" > "éa"
+    agents[5]["name"], agents[6]["name"], agents[7]["name"] = "Émile", "éa", "Zulu"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for store in _stores(tmp_dir):
+            for agent in agents:
+                asyncio.run(store.put(agent))
+            # Aktualizacja i usunięcie muszą przenieść agenta między indeksami
+            moved = dict(agents[0], status="tested", metrics={"intelligence_score": 100, "readiness_score": 5})
+            asyncio.run(store.put(moved))
+            asyncio.run(store.delete(agents[1]["id"]))
+            current = {a["id"]: a for a in [moved] + agents[2:]}
+
+            from tools.agent_store import agent_summary
+            for sort_by, (key_fn, reverse) in SORT_OPTIONS.items():
+                for domain, status in ((None, None), ("sales", None), (None, "tested"), ("support", "draft")):
+                    expected = sorted(
+                        (agent_summary(a) for a in current.values()
+                         if (domain is None or a["domain"] == domain) and (status is None or a["status"] == status)),
+                        key=key_fn, reverse=reverse
+                    )
+                    listing = asyncio.run(store.list_summaries(domain, status, sort_by))
+                    assert [s["id"] for s in listing["agents"]] == [s["id"] for s in expected], (sort_by, domain, status)
+                    assert listing["total"] == len(expected)
+                    assert listing["ai_enhanced"] == sum(s["ai_enhanced"] for s in expected)
+                    assert listing["intelligence_sum"] == sum(s["intelligence_score"] for s in expected)
+
+                    page = asyncio.run(store.list_summaries(domain, status, sort_by, offset=3, limit=5))
+                    assert [s["id"] for s in page["agents"]] == [s["id"] for s in expected[3:8]]
+            print(f"✅ Sorted views consistent on {store.get_stats()['backend']} store")
+            if hasattr(store, "close"):
+                store.close()
+
+
+def test_search_and_similar_agents():
+    """Indeks wyszukiwania nadąża za zapisami i usunięciami na wszystkich backendach"""
+    import random
+    import time
+    from tools.agent_search import AgentSearchIndex
+
+    def agent(i, name, description, domain, components):
+        return {"id": f"agent-{i:03d}", "name": name, "description": description, "domain": domain,
+                "status": "draft", "created_at": f"2026-01-01T00:00:{i:02d}", "metrics": {}, "ai_analysis": {},
+                "components": [{"component_id": c} for c in components]}
+
+    agents = [
+        agent(0, "Invoice Bot", "extracts totals from supplier invoices", "finance", ["pdf_parser", "pollinations_llm"]),
+        agent(1, "Invoice Helper", "extracts totals from supplier invoices and emails them", "finance",
+              ["pdf_parser", "pollinations_llm", "email_sender"]),
+        agent(2, "Support Desk", "answers customer questions about orders", "customer_service",
+              ["intent_classifier", "pollinations_llm"]),
+        agent(3, "Lead Scorer", "qualifies leads for the sales team", "sales", ["lead_qualifier", "crm_connector"]),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for store in _stores(tmp_dir):
+            for a in agents:
+                asyncio.run(store.put(a))
+            hits = asyncio.run(store.search("supplier invoice"))
+            assert [h["id"] for h in hits][:1] == ["agent-000"] and {h["id"] for h in hits} == {"agent-000", "agent-001"}
+            assert hits[0]["score"] >= hits[1]["score"] and hits[0]["name"] == "Invoice Bot"
+            # Ostatni token jako prefiks, identyfikatory komponentów, filtr domeny
+            assert [h["id"] for h in asyncio.run(store.search("custom"))] == ["agent-002"]
+            assert [h["id"] for h in asyncio.run(store.search("crm"))] == ["agent-003"]
+            assert asyncio.run(store.search("llm", domain="customer_service"))[0]["id"] == "agent-002"
+
+            similar = asyncio.run(store.find_similar("agent-000", min_similarity=0.5))
+            assert [s["id"] for s in similar] == ["agent-001"] and 0.5 <= similar[0]["similarity"] < 1
+            assert asyncio.run(store.find_similar("missing")) is None
+
+            # Zmiana opisu i usunięcie aktualizują indeks
+            asyncio.run(store.put(dict(agents[3], description="books sales meetings from invoices")))
+            asyncio.run(store.delete("agent-000"))
+            assert {h["id"] for h in asyncio.run(store.search("invoices"))} == {"agent-001", "agent-003"}
+            assert asyncio.run(store.search("qualifies")) == []
+            assert asyncio.run(store.find_similar("agent-001", min_similarity=0.5)) == []
+            print(f"✅ Search index consistent on {store.get_stats()['backend']} store")
+            if hasattr(store, "close"):
+                store.close()
+
+    # Zapytania na 10 000 agentów pozostają w pojedynczych milisekundach
+    rng = random.Random(3)
+    vocabulary = [f"word{i}" for i in range(3000)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    components = [f"component_{i}" for i in range(60)]
+    index = AgentSearchIndex()
+    for i in range(10000):
+        index.upsert({"id": f"agent-{i}", "name": " ".join(rng.choices(vocabulary, weights, k=2)),
+                      "description": " ".join(rng.choices(vocabulary, weights, k=12)),
+                      "domain": rng.choice(["sales", "support", "general"]),
+                      "components": [{"component_id": c} for c in rng.sample(components, 5)]})
+    started = time.perf_counter()
+    for query in ("word17 word900", "word3 word250", "word1200 word4"):
+        assert index.search(query)
+    assert index.find_similar("agent-5") is not None
+    elapsed_ms = (time.perf_counter() - started) * 1000 / 4
+    assert elapsed_ms < 20, elapsed_ms
+    print(f"✅ Search over 10000 agents: {elapsed_ms:.2f} ms per query")
+
+
+def test_draft_retention_and_spill():
+    """Nieaktywne szkice wypadają z pamięci po TTL i ponad budżet; ze spill wracają przy odczycie"""
+    import json
+    import time
+    from tools.agent_store import InMemoryAgentStore, SQLiteAgentStore
+    from tools.agent_retention import RetentionPolicy, estimate_agent_bytes
+    from tools.event_log import EventSourcedAgentStore
+
+    def draft(i, status="draft", test_runs=0):
+        return {"id": f"agent-{i:03d}", "name": f"Draft {i}", "description": "draft " * 50, "domain": "general",
+                "status": status, "created_at": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}", "components": [],
+                "metrics": {"test_runs": test_runs}, "ai_analysis": {}}
+
+    size = estimate_agent_bytes(draft(0))
+    budget = size * 10 + size // 2
+
+    async def fill(store):
+        await store.put(draft(0, test_runs=1))  # przetestowany - nigdy nie jest usuwany
+        for i in range(1, 50):
+            await store.put(draft(i))
+            if i > 5:
+                assert await store.get("agent-001") is not None  # ostatni dostęp chroni szkic przed LRU
+
+    # Bez spill: szkice są usuwane, rozmiar nie przekracza budżetu
+    store = InMemoryAgentStore(retention=RetentionPolicy(max_resident_bytes=budget))
+    asyncio.run(fill(store))
+    retention = store.get_stats()["retention"]
+    assert retention["resident_bytes"] <= budget and retention["evictions"] == 40
+    assert asyncio.run(store.count()) == 10
+    assert asyncio.run(store.contains("agent-000")) and asyncio.run(store.contains("agent-001"))
+    assert not asyncio.run(store.contains("agent-002"))
+    assert asyncio.run(store.list_summaries())["total"] == 10
+
+    # TTL liczony od ostatniego dostępu
+    store = InMemoryAgentStore(retention=RetentionPolicy(draft_ttl=0.2))
+    asyncio.run(store.put(draft(1)))
+    time.sleep(0.25)
+    asyncio.run(store.put(draft(2)))
+    assert not asyncio.run(store.contains("agent-001")) and asyncio.run(store.contains("agent-002"))
+    assert store.get_stats()["retention"]["expired"] == 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Ze spill: dokumenty opuszczają RAM, ale agent nadal istnieje z tą samą wersją
+        spill = SQLiteAgentStore(os.path.join(tmp_dir, "spill.db"))
+        store = InMemoryAgentStore(retention=RetentionPolicy(max_resident_bytes=budget), spill=spill)
+        asyncio.run(fill(store))
+        retention = store.get_stats()["retention"]
+        assert retention["resident_bytes"] <= budget and retention["spilled_agents"] == 40
+        assert asyncio.run(store.count()) == 50 and asyncio.run(store.list_summaries())["total"] == 50
+        assert asyncio.run(store.search("Draft 10"))[0]["id"] == "agent-010"
+        assert asyncio.run(store.get_version("agent-010")) == 1
+        assert asyncio.run(store.get("agent-010")) == draft(10)
+        assert store.get_stats()["retention"]["restored"] == 1
+        assert asyncio.run(store.put(draft(10), expected_version=1)) == 2
+        assert asyncio.run(store.delete("agent-020")) and not asyncio.run(store.contains("agent-020"))
+        assert asyncio.run(spill.count()) == store.get_stats()["retention"]["spilled_agents"]
+
+        # Przywrócone szkice są od razu rozliczane z budżetem
+        for i in (*range(11, 20), *range(21, 35)):
+            assert asyncio.run(store.get(f"agent-{i:03d}")) == draft(i)
+        assert store.get_stats()["retention"]["resident_bytes"] <= budget
+        spill.close()
+
+        # Log zdarzeń: retencja tylko zwalnia RAM - agenci przetrwają w spill i po restarcie
+        events = os.path.join(tmp_dir, "events")
+        store = EventSourcedAgentStore(events, snapshot_every=20, retention=RetentionPolicy(max_resident_bytes=budget))
+        asyncio.run(fill(store))
+        asyncio.run(store.flush())
+        retention = store.get_stats()["retention"]
+        assert retention["resident_bytes"] <= budget and retention["spilled_agents"] == 40
+        assert asyncio.run(store.get("agent-002")) == draft(2)
+        assert asyncio.run(store.put(draft(3), expected_version=1)) == 2
+        store.close()
+        records = [json.loads(line) for name in sorted(os.listdir(events)) if name.startswith("log-")
+                   for line in open(os.path.join(events, name), "rb")]
+        assert all(record["op"] == "put" for record in records)
+        reopened = EventSourcedAgentStore(events)
+        assert asyncio.run(reopened.count()) == 50 and asyncio.run(reopened.get("agent-002")) == draft(2)
+        assert asyncio.run(reopened.get_version("agent-003")) == 2
+        reopened.close()
+
+    # Serwer, który tylko czyta: TTL stosowany okresowo w tle
+    async def read_only():
+        store = InMemoryAgentStore(retention=RetentionPolicy(draft_ttl=0.05))
+        store.put_sync(draft(1))
+        store.put_sync(draft(2, test_runs=1))
+        for _ in range(10):
+            await store.list_summaries()
+            await asyncio.sleep(0.02)
+        return store
+
+    store = asyncio.run(read_only())
+    assert asyncio.run(store.count()) == 1 and store.get_stats()["retention"]["expired"] == 1
+    print(f"✅ Draft retention: budget {budget} B, 40 of 49 drafts evicted or spilled")
+
+
+def test_tenant_shards_isolate_agents_and_serialize_changes():
+    """Każdy tenant ma własny shard; zmiany agenta w shardzie są wykonywane po kolei"""
+    import contextlib
+    import io
+    from tools.agent_store import create_agent_store
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+    from tools.sharded_store import tenant_scope
+
+    async def scenario(manager):
+        with tenant_scope("acme"):
+            created = await manager.create_agent(name="Acme Bot", description="support bot for acme customers",
+                                                 generate_chat_interface=False)
+            acme_id = created["agent_id"]
+
+            async def slow_change():
+                # Sekcja zmiany trzyma blokadę shardu; add_component wewnątrz bierze ją ponownie
+                async with manager.store.lock(acme_id):
+                    await asyncio.sleep(0.01)
+                    return await manager.add_component_to_agent(acme_id, "slack_integration")
+
+            # Usunięcie czeka na trwającą zmianę, więc usunięty agent nie może wrócić
+            added, deleted = await asyncio.gather(slow_change(), manager.delete_agent(acme_id))
+            assert added["success"] and deleted["success"]
+            assert not await manager.store.contains(acme_id)
+            kept = await manager.create_agent(name="Acme Sales", description="sales lead qualifier",
+                                              generate_chat_interface=False)
+            assert (await manager.list_agents())["total_count"] == 1
+        with tenant_scope("globex"):
+            assert (await manager.list_agents())["total_count"] == 0
+            assert not (await manager.get_agent(kept["agent_id"]))["success"]
+            assert (await manager.search_agents("sales"))["agents"] == []
+        return kept["agent_id"]
+
+    async def visible(manager, tenant, agent_id):
+        with tenant_scope(tenant):
+            return (await manager.get_agent(agent_id))["success"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = create_agent_store(path=os.path.join(tmp_dir, "agents.db"))
+        manager = EnhancedAgentManager(store=store)
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent_id = asyncio.run(scenario(manager))
+        assert os.path.exists(os.path.join(tmp_dir, "agents.acme.db"))
+        assert not os.path.exists(os.path.join(tmp_dir, "agents.db"))  # shard domyślny nie był używany
+        stats = store.get_stats()
+        assert stats["backend"] == "sharded" and set(stats["shards"]) == {"acme", "globex"}
+        store.close()
+
+        # Po restarcie agent jest widoczny dla swojego tenanta bez wcześniejszego otwierania shardu
+        restarted = EnhancedAgentManager(store=create_agent_store(path=os.path.join(tmp_dir, "agents.db")))
+        assert asyncio.run(visible(restarted, "acme", agent_id))
+        assert not asyncio.run(visible(restarted, "globex", agent_id))
+        restarted.store.close()
+
+        # Limit otwartych shardów: bezczynne shardy trwałe są zamykane i otwierane ponownie
+        from tools.sharded_store import ShardedAgentStore, TenantError, shard_file_path
+        from tools.agent_store import SQLiteAgentStore, InMemoryAgentStore
+        base = os.path.join(tmp_dir, "bounded.db")
+        bounded = ShardedAgentStore(lambda tenant: SQLiteAgentStore(shard_file_path(base, tenant)), max_open_shards=2)
+        bounded_manager = EnhancedAgentManager(store=bounded)
+
+        async def touch_tenants():
+            for tenant in ("t1", "t2", "t3", "t1"):
+                with tenant_scope(tenant):
+                    await bounded.count()
+            with tenant_scope("t1"):
+                created = await bounded_manager.create_agent(name="Bounded", description="support bot",
+                                                             generate_chat_interface=False)
+            for tenant in ("t2", "t3"):
+                with tenant_scope(tenant):
+                    await bounded.count()
+            return created["agent_id"]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            bounded_id = asyncio.run(touch_tenants())
+        assert len(bounded.get_stats()["shards"]) == 2 and bounded.shards_closed == 4
+        assert asyncio.run(visible(bounded_manager, "t1", bounded_id))
+        bounded.close()
+
+        memory = ShardedAgentStore(lambda tenant: InMemoryAgentStore(), max_open_shards=1,
+                                   allowed_tenants=["acme"])
+        with tenant_scope("acme"):
+            assert asyncio.run(memory.count()) == 0
+        for tenant in ("other", "default"):
+            with tenant_scope(tenant):
+                try:
+                    asyncio.run(memory.count())
+                    raise AssertionError("expected a tenant error")
+                except TenantError:
+                    pass
+
+    memory_store = create_agent_store()
+    manager = EnhancedAgentManager(store=memory_store)
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(scenario(manager))
+    lock = memory_store.get_stats()["shards"]["acme"]["lock"]
+    assert lock["contended"] >= 1 and "lock" not in memory_store.get_stats()["shards"]["globex"]
+    print(f"✅ Tenant shards isolated; acme lock acquired {lock['acquisitions']} times, contended {lock['contended']}")
+
+
+def test_diff_agents_and_revisions():
+    """Diff dopasowuje komponenty, węzły i połączenia, a łatka zawiera tylko zmiany"""
+    import copy
+    import json
+    from tools.agent_diff import diff_agents
+    from tools.agent_store import InMemoryAgentStore
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+
+    async def revisions_and_twins(manager):
+        spec = {"description": "support bot that sends email", "generate_chat_interface": False,
+                "use_blueprint_cache": False}
+        first = await manager.create_agent(name="Diff A", **spec)
+        second = await manager.create_agent(name="Diff B", **spec)
+        await manager.add_component_to_agent(first["agent_id"], "slack_integration")
+        # Ten sam komponent dodany osobno do dwóch agentów ma inne added_at
+        third = await manager.create_agent(name="Diff C", **spec)
+        await manager.add_component_to_agent(third["agent_id"], "slack_integration")
+        return (await manager.diff_agents(first["agent_id"]),
+                await manager.diff_agents(second["agent_id"], first["agent_id"], version_b=1),
+                await manager.diff_agents(third["agent_id"], first["agent_id"]),
+                await manager.diff_agents("missing"))
+
+    revisions, twins, added_twins, missing = asyncio.run(
+        revisions_and_twins(EnhancedAgentManager(store=InMemoryAgentStore())))
+    assert revisions["a"]["version_tag"] == "v1" and revisions["b"]["version_tag"] == "v2"
+    assert [c["component_id"] for c in revisions["diff"]["components"]["added"]] == ["slack_integration"]
+    assert set(revisions["diff"]) == {"metrics", "components", "stats", "identical"}
+    # Dwa agenci z tej samej specyfikacji różnią się tylko nazwą, mimo innych id węzłów i połączeń
+    assert set(twins["diff"]) == {"fields", "stats", "identical"} and twins["diff"]["fields"] == {
+        "name": {"from": "Diff B", "to": "Diff A"}}
+    assert set(added_twins["diff"]) == {"fields", "stats", "identical"}, added_twins["diff"]
+    assert not missing["success"]
+
+    nodes = [{"id": f"n{i}", "type": t, "position": i, "configuration": {"model": "m", "temperature": 0.5}}
+             for i, t in enumerate(["input_processor"] + ["pollinations_llm"] * 200 + ["output_processor"])]
+    old = {"id": "a", "name": "Big", "configuration": {"inputs": ["x"], "limits": {"rate": 10}},
+           "components": [{"id": f"c{i}", "component_id": f"component_{i}", "position": i,
+                           "configuration": {"timeout": 30, "prompt": "p" * 200}} for i in range(300)],
+           "workflow": {"id": "w", "nodes": nodes,
+                        "connections": [{"id": f"e{i}", "from_node": f"n{i}", "to_node": f"n{i + 1}",
+                                         "type": "sequential"} for i in range(len(nodes) - 1)],
+                        "error_handling": [{"id": "h", "node_id": "n1", "type": "llm_error_handler",
+                                            "configuration": {"retry_attempts": 3}}]}}
+    new = copy.deepcopy(old)
+    new["configuration"]["limits"]["rate"] = 20
+    new["components"][10]["configuration"]["timeout"] = 60
+    del new["components"][20]
+    new["components"].append({"id": "c-new", "component_id": "slack_integration", "position": 300})
+    new["workflow"]["nodes"][5]["configuration"]["temperature"] = 0.9
+    new["workflow"]["connections"].pop()
+    new["workflow"]["error_handling"][0]["configuration"]["retry_attempts"] = 5
+
+    patch = diff_agents(old, new)
+    assert patch["configuration"] == {"changed": {"limits.rate": {"from": 10, "to": 20}}}
+    assert patch["components"]["changed"] == [{"component_id": "component_10", "position": 10, "changes": {
+        "changed": {"configuration.timeout": {"from": 30, "to": 60}}}}]
+    assert patch["components"]["removed"] == [{"component_id": "component_20", "position": 20}]
+    assert patch["components"]["added"] == [{"component_id": "slack_integration", "position": 300}]
+    assert patch["workflow"]["nodes"]["changed"][0]["changes"] == {
+        "changed": {"configuration.temperature": {"from": 0.5, "to": 0.9}}}
+    assert patch["workflow"]["connections"] == {"removed": [
+        {"from": "pollinations_llm#200", "to": "output_processor#1", "type": "sequential"}]}
+    assert patch["workflow"]["error_handling"]["changed"][0]["node"] == "pollinations_llm#1"
+    assert diff_agents(old, copy.deepcopy(old))["identical"]
+    size = len(json.dumps(patch, separators=(",", ":")))
+    assert size < 1500 < len(json.dumps(old)) // 50, size
+    print(f"✅ Agent diff: {size} B patch for a {len(json.dumps(old))} B agent")
+
+
+async def _paginate(manager, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = await manager.list_agents(page_size=7, cursor=cursor, **kwargs)
+        assert page["success"], page
+        ids.extend(a["id"] for a in page["agents"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, page
+
+
+def test_cursor_pagination_and_projection():
+    """Kursor przechodzi przez wszystkie strony, a include ogranicza zwracane pola"""
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+
+    agents = [{
+        "id": f"agent-{i:03d}",
+        "name": f"Agent {i}",
+        "description": "",
+        "domain": "sales" if i % 2 else "support",
+        "status": "draft",
+        "created_at": f"2026-02-01T00:{i // 60:02d}:{i % 60:02d}",
+        "components": [{"component_id": "pollinations_llm", "configuration": {"system_prompt": "p" * 1000}}],
+        "workflow": {"nodes": [{"id": "n1", "type": "input"}], "connections": []},
+        "metrics": {"intelligence_score": i % 10, "readiness_score": 50},
+        "ai_analysis": {"confidence_score": 80}
+    } for i in range(40)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for store in _stores(tmp_dir):
+            manager = EnhancedAgentManager(store=store)
+            for agent in agents:
+                asyncio.run(store.put(agent))
+
+            for sort_by in ("created", "intelligence", "name"):
+                full = asyncio.run(manager.list_agents("sales", "all", sort_by))
+                ids, last_page = asyncio.run(_paginate(manager, filter_domain="sales", sort_by=sort_by))
+                assert ids == [a["id"] for a in full["agents"]]
+                assert last_page["total_count"] == 20 and last_page["filters_applied"]["domain"] == "sales"
+
+            listing = asyncio.run(manager.list_agents(sort_by="created", page_size=3, include=["name"]))
+            assert listing["agents"][0] == {"id": "agent-039", "name": "Agent 39"}
+            assert not asyncio.run(manager.list_agents(cursor="not-a-cursor"))["success"]
+
+            projected = asyncio.run(manager.get_agent("agent-005", include=["metrics", "workflow.nodes"]))
+            assert projected["agent"] == {
+                "id": "agent-005",
+                "metrics": agents[5]["metrics"],
+                "workflow": {"nodes": agents[5]["workflow"]["nodes"]}
+            }
+            ids_only = asyncio.run(manager.get_agent("agent-005", include=["components.component_id"]))
+            assert ids_only["agent"]["components"] == [{"component_id": "pollinations_llm"}]
+            assert "system_prompt" in asyncio.run(store.get("agent-005"))["components"][0]["configuration"]
+            print(f"✅ Cursor pagination and projection on {store.get_stats()['backend']} store")
+            if hasattr(store, "close"):
+                store.close()
+
+
+def test_app_context_shares_one_store_and_catalog():
+    """Deployer z kontekstu aplikacji widzi agenta utworzonego przez manager"""
+    from tools.app_context import create_app_context
+    from tools.agent_store import InMemoryAgentStore
+
+    app_context = create_app_context(store=InMemoryAgentStore())
+    assert app_context.component_manager.component_catalog is app_context.agent_manager.component_catalog
+    assert app_context.agent_manager.deployer is app_context.deployer
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            created = asyncio.run(app_context.agent_manager.create_agent(
+                name="VisibleAgent", description="support bot answering customer questions",
+                domain="customer_service", complexity="simple"
+            ))
+            interface = asyncio.run(app_context.deployer.generate_chat_interface(created["agent_id"]))
+        finally:
+            os.chdir(cwd)
+
+    assert "VisibleAgent" in interface["html_content"]
+    print("✅ App context shares store, catalog and deployer")
+
+
+def test_create_agent_response_modes():
+    """summary i ids_only to kilkaset bajtów bez base64; ciężkie części są dostępne jako zasoby"""
+    import json
+    from tools.app_context import create_app_context
+    from tools.agent_store import InMemoryAgentStore
+
+    async def create_in_modes(context):
+        manager = context.agent_manager
+        spec = {"name": "Slim Agent", "description": "support bot answering questions from product documents",
+                "domain": "customer_service", "use_blueprint_cache": False}
+        full = await manager.create_agent(**spec)
+        summary = await manager.create_agent(**spec, response_mode="summary")
+        ids_only = await manager.create_agent(**spec, response_mode="ids_only")
+        invalid = await manager.create_agent(**spec, response_mode="tiny")
+        html = await context.deployer.get_chat_interface_html(summary["agent_id"])
+        return full, summary, ids_only, invalid, html
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            context = create_app_context(store=InMemoryAgentStore())
+            full, summary, ids_only, invalid, html = asyncio.run(create_in_modes(context))
+        finally:
+            os.chdir(cwd)
+
+    full_bytes = len(json.dumps(full, indent=2, ensure_ascii=False))
+    summary_json = json.dumps(summary, ensure_ascii=False, separators=(",", ":"))
+    assert full["chat_interface"]["download_base64"]
+    assert "download_base64" not in summary_json and "components" not in summary
+    assert summary["resources"]["chat_interface"] == f"agent://{summary['agent_id']}/chat-interface"
+    assert summary["scores"]["intelligence"] > 0 and summary["chat_interface"]["generated"]
+    assert len(summary_json) < 1000 < full_bytes
+    assert ids_only == {"success": True, "agent_id": ids_only["agent_id"], "version_tag": "v1"}
+    assert not invalid["success"] and "summary" in invalid["available_response_modes"]
+    assert html.startswith("<!DOCTYPE html>") and "Slim Agent" in html
+    print(f"✅ create_agent response: full {full_bytes} B, summary {len(summary_json)} B")
+
+
+def test_bulk_create_agents():
+    """create_agents tworzy 1000 agentów, raportuje postęp i współdzieli analizę opisów"""
+    import contextlib
+    import io
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+    from tools.agent_store import InMemoryAgentStore
+
+    manager = EnhancedAgentManager(store=InMemoryAgentStore())
+    descriptions = ["support bot for customers", "sales lead qualifier that sends email", "data analyst dashboards"]
+    specs = [{"name": f"Bulk {i}", "description": descriptions[i % 3], "domain": "general"} for i in range(999)]
+    specs.append({"name": "Broken"})
+    progress = []
+
+    async def on_result(entry, done, total):
+        progress.append((done, total, entry["index"]))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = asyncio.run(manager.create_agents(specs, concurrency=16, on_result=on_result))
+
+    assert summary["created"] == 999 and summary["failed"] == 1
+    assert summary["errors"][0]["index"] == 999
+    assert summary["unique_analyses"] == 3
+    assert [done for done, _, _ in progress] == list(range(1, 1001))
+    assert sorted(index for _, _, index in progress) == list(range(1000))
+    assert asyncio.run(manager.store.count()) == 999
+    assert not asyncio.run(manager.create_agents([{}] * 1001))["success"]
+    print(f"✅ Bulk creation: {summary['agents_per_second']} agents/s")
+
+
+def test_time_ordered_ids():
+    """Identyfikatory są krótkie, rosną z czasem utworzenia i mieszczą się w 16 bajtach"""
+    import contextlib
+    import io
+    import uuid
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+    from tools.agent_store import InMemoryAgentStore
+    from tools.agent_records import pack_id, unpack_id
+    from utils.ids import new_id, decode_id, id_timestamp
+
+    ids = [new_id() for _ in range(10000)]
+    assert all(len(agent_id) == 26 for agent_id in ids)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert isinstance(pack_id(ids[0]), bytes) and len(pack_id(ids[0])) == 16
+    assert unpack_id(pack_id(ids[0])) == ids[0]
+    assert abs(id_timestamp(ids[0]) - __import__("time").time()) < 60
+
+    # Dawne identyfikatory UUID4 nadal działają, a inne napisy nie są pakowane
+    legacy = str(uuid.uuid4())
+    assert unpack_id(pack_id(legacy)) == legacy and decode_id(legacy) == uuid.UUID(legacy).bytes
+    assert id_timestamp(legacy) is None
+    assert pack_id(ids[0].lower()) == ids[0].lower() and pack_id("x" * 26) == "x" * 26
+
+    manager = EnhancedAgentManager(store=InMemoryAgentStore())
+    with contextlib.redirect_stdout(io.StringIO()):
+        created = [asyncio.run(manager.create_agent(name=f"Ordered {i}", description="support bot",
+                                                    generate_chat_interface=False))["agent_id"]
+                   for i in range(5)]
+    agent = asyncio.run(manager.get_agent(created[0]))["agent"]
+    part_ids = [component["id"] for component in agent["components"]] + [node["id"] for node in agent["workflow"]["nodes"]]
+    assert created == sorted(created) and all(len(part_id) == 26 for part_id in part_ids)
+    listed = asyncio.run(manager.list_agents(sort_by="created"))["agents"]
+    assert [summary["id"] for summary in listed] == sorted(created, reverse=True)
+    print(f"✅ Time-ordered ids: {ids[0]} ... {ids[-1]}")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Agent Store Tests")
+    print("=" * 60)
+
+    results = {}
+    for test in (test_agent_lifecycle_through_store, test_sqlite_store_survives_restart,
+                 test_event_log_recovers_from_snapshot_and_tail, test_sorted_views_match_across_backends,
+                 test_search_and_similar_agents, test_draft_retention_and_spill,
+                 test_tenant_shards_isolate_agents_and_serialize_changes, test_diff_agents_and_revisions,
+                 test_cursor_pagination_and_projection, test_app_context_shares_one_store_and_catalog,
+                 test_create_agent_response_modes, test_bulk_create_agents, test_time_ordered_ids):
+        try:
+            test()
+            results[test.__name__] = True
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results[test.__name__] = False
+
+    print("\n" + "=" * 60)
+    for name, passed in results.items():
+        print(f"{name}: {'✅ PASS' if passed else '❌ FAIL'}")
+
+    exit(0 if all(results.values()) else 1)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for creating agents from prebuilt workflow template blueprints
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+
+def test_create_agent_from_every_template():
+    """Każdy szablon daje spójnego agenta ze świeżymi id i nadpisaniami"""
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+    from tools.agent_store import InMemoryAgentStore
+
+    manager = EnhancedAgentManager(store=InMemoryAgentStore())
+    workflow_manager = manager.workflow_manager
+
+    async def create_all():
+        agents = []
+        for template_id in workflow_manager.template_ids:
+            created = await manager.create_agent_from_template(template_id)
+            assert created["success"], created
+            agents.append(await manager.store.get(created["agent_id"]))
+        return agents
+
+    agents = asyncio.run(create_all())
+    assert len(agents) == len(workflow_manager.templates) >= 19
+    from tools.agent_counters import check_counters
+
+    for agent in agents:
+        node_ids = {node["id"] for node in agent["workflow"]["nodes"]}
+        assert len(node_ids) == len(agent["workflow"]["nodes"])
+        for connection in agent["workflow"]["connections"]:
+            assert connection["from_node"] in node_ids and connection["to_node"] in node_ids
+        assert agent["created_at"] and agent["workflow"]["created_at"]
+        assert check_counters(agent) == {}
+
+    # Kroki szablonu wyznaczają połączenia, "llm" to skrót pollinations_llm
+    basic = next(a for a in agents if a["template_id"] == "customer_support_basic")
+    types = {node["id"]: node["type"] for node in basic["workflow"]["nodes"]}
+    assert [(types[c["from_node"]], types[c["to_node"]]) for c in basic["workflow"]["connections"]] == [
+        ("input_processor", "intent_classifier"),
+        ("intent_classifier", "pollinations_llm"),
+        ("pollinations_llm", "response_personalizer"),
+        ("response_personalizer", "output_processor"),
+    ]
+
+    # Drugi agent z tego samego szablonu: ten sam szkielet, inne id
+    blueprint = workflow_manager.get_blueprint("lead_qualifier")
+    assert workflow_manager.get_blueprint("lead_qualifier") is blueprint
+    created = asyncio.run(manager.create_agent_from_template("lead_qualifier", {
+        "name": "Leads EU",
+        "component_config": {"pollinations_llm": {"temperature": 0.1}}
+    }))
+    agent = asyncio.run(manager.store.get(created["agent_id"]))
+    first = next(a for a in agents if a["template_id"] == "lead_qualifier")
+    assert agent["name"] == "Leads EU"
+    assert {c["id"] for c in agent["components"]}.isdisjoint(c["id"] for c in first["components"])
+    llm = next(c for c in agent["components"] if c["component_id"] == "pollinations_llm")
+    assert llm["configuration"]["temperature"] == 0.1
+    # Nadpisania nie zmieniają szkieletu
+    template = workflow_manager.get_template("lead_qualifier")
+    assert blueprint.document["components"][0]["configuration"] == template["components"][0]["config"]
+
+    assert not asyncio.run(manager.create_agent_from_template("missing"))["success"]
+    assert not asyncio.run(manager.create_agent_from_template("lead_qualifier", {"bogus": 1}))["success"]
+    for overrides in ({"component_config": ["pollinations_llm"]}, {"component_config": {"pollinations_llm": 0.1}},
+                      ["name"]):
+        assert not asyncio.run(manager.create_agent_from_template("lead_qualifier", overrides))["success"]
+
+    # Id podmieniane są tylko w encjach agenta - "id" w konfiguracji to dane użytkownika
+    from tools.blueprints import AgentBlueprint
+    document = {"id": "agent", "created_at": "2026-01-01",
+                "components": [{"id": "c1", "component_id": "crm", "added_at": "2026-01-01",
+                                "configuration": {"id": "crm-account-7", "node_id": "external",
+                                                  "created_at": "2025-12-24"}}],
+                "workflow": {"id": "w", "created_at": "2026-01-01",
+                             "nodes": [{"id": "c1", "type": "crm", "configuration": {"id": "crm-account-7"}}],
+                             "connections": [{"id": "e1", "from_node": "c1", "to_node": "c1"}],
+                             "error_handling": [{"id": "h1", "node_id": "c1", "configuration": {"node_id": "x"}}]}}
+    clone = AgentBlueprint(document, source="test").instantiate()
+    assert clone["components"][0]["configuration"] == document["components"][0]["configuration"]
+    assert clone["workflow"]["nodes"][0]["configuration"] == {"id": "crm-account-7"}
+    assert clone["workflow"]["error_handling"][0]["configuration"] == {"node_id": "x"}
+    node_id = clone["workflow"]["nodes"][0]["id"]
+    assert node_id == clone["components"][0]["id"] != "c1"
+    assert clone["workflow"]["connections"][0]["from_node"] == node_id == clone["workflow"]["error_handling"][0]["node_id"]
+    assert clone["created_at"] != "2026-01-01" and clone["workflow"]["created_at"] != "2026-01-01"
+    print(f"✅ {len(agents)} templates instantiated")
+
+
+def test_template_instantiation_is_fast():
+    """Klonowanie gotowego szkieletu trwa mikrosekundy"""
+    from tools.workflow_manager import WorkflowManager
+
+    blueprint = WorkflowManager().get_blueprint("customer_support_advanced")
+    rounds = 2000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        blueprint.instantiate(name="Fast")
+    per_agent_us = (time.perf_counter() - started) / rounds * 1e6
+    print(f"⚡ Template instantiation: {per_agent_us:.1f} µs per agent")
+    assert per_agent_us < 500
+
+
+def test_repeated_specs_hit_blueprint_cache():
+    """Powtórzona specyfikacja jest klonowana ze szkieletu, zmiana modelu unieważnia wpis"""
+    import contextlib
+    import io
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+    from tools.agent_store import InMemoryAgentStore
+    from utils.smart_context import SmartContext
+
+    manager = EnhancedAgentManager(store=InMemoryAgentStore(), smart_context=SmartContext(),
+                                   blueprint_cache_size=8)
+    spec = dict(description="support bot answering customer questions by email", domain="general",
+                complexity="medium", generate_chat_interface=False)
+
+    async def scenario():
+        first = await manager.create_agent(name="First", **spec)
+        second = await manager.create_agent(name="Second", **spec)
+        forced = await manager.create_agent(name="Forced", use_blueprint_cache=False, **spec)
+        await manager.smart_context.learn_from_successful_agent(await manager.store.get(first["agent_id"]))
+        after_learning = await manager.create_agent(name="AfterLearning", **spec)
+        return first, second, forced, after_learning
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        first, second, forced, after_learning = asyncio.run(scenario())
+
+    assert "from_blueprint_cache" not in first and second["from_blueprint_cache"]
+    assert "from_blueprint_cache" not in forced and "from_blueprint_cache" not in after_learning
+    assert second["agent"]["name"] == "Second" and second["agent_id"] != first["agent_id"]
+    assert second["ai_enhancements"] == first["ai_enhancements"]
+
+    stored_first = asyncio.run(manager.store.get(first["agent_id"]))
+    stored_second = asyncio.run(manager.store.get(second["agent_id"]))
+    assert [c["component_id"] for c in stored_second["components"]] == \
+        [c["component_id"] for c in stored_first["components"]]
+    assert {c["id"] for c in stored_second["components"]}.isdisjoint(c["id"] for c in stored_first["components"])
+    node_ids = {n["id"] for n in stored_second["workflow"]["nodes"]}
+    assert all(c["from_node"] in node_ids and c["to_node"] in node_ids
+               for c in stored_second["workflow"]["connections"])
+    assert stored_second["name"] == "Second"
+
+    stats = manager.get_blueprint_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert EnhancedAgentManager(store=InMemoryAgentStore(), blueprint_cache_size=0).get_blueprint_cache_stats() == {"enabled": False}
+    print(f"✅ Blueprint cache: {stats}")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Agent Template Tests")
+    print("=" * 60)
+
+    results = {}
+    for test in (test_create_agent_from_every_template, test_template_instantiation_is_fast,
+                 test_repeated_specs_hit_blueprint_cache):
+        try:
+            test()
+            results[test.__name__] = True
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results[test.__name__] = False
+
+    print("\n" + "=" * 60)
+    for name, passed in results.items():
+        print(f"{name}: {'✅ PASS' if passed else '❌ FAIL'}")
+
+    exit(0 if all(results.values()) else 1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for structured logging - nothing on stdout, timing fields in log records
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+
+def _create_agent(manager):
+    return asyncio.run(manager.create_agent(
+        name="Log Agent",
+        description="chat agent for customers that sends email",
+        domain="customer_service"
+    ))
+
+
+def test_create_agent_keeps_stdout_clean():
+    """Domyślnie (WARNING) tworzenie agenta nie pisze nic na stdout ani do logu"""
+    from utils.logging_config import configure_logging, shutdown_logging
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # interfejs chatu zapisuje plik HTML w katalogu bieżącym
+        log_file = os.path.join(tmp_dir, "agent.log")
+        try:
+            configure_logging(level="WARNING", log_file=log_file)
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                result = _create_agent(EnhancedAgentManager())
+            shutdown_logging()
+        finally:
+            os.chdir(cwd)
+
+        assert result["success"]
+        assert stdout.getvalue() == ""
+        with open(log_file, encoding="utf-8") as f:
+            assert f.read() == ""
+    print("✅ create_agent is silent on stdout and at the default level")
+
+
+def test_info_records_carry_phase_timings():
+    """Na poziomie INFO rekord "Agent created" ma pola strukturalne z czasami faz"""
+    from utils.logging_config import configure_logging, shutdown_logging
+    from tools.enhanced_agent_manager import EnhancedAgentManager
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        log_file = os.path.join(tmp_dir, "agent.log")
+        try:
+            configure_logging(level="INFO", log_file=log_file)
+            result = _create_agent(EnhancedAgentManager())
+            shutdown_logging()  # opróżnia kolejkę
+        finally:
+            os.chdir(cwd)
+
+        with open(log_file, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+
+    created = [e for e in entries if e["message"] == "Agent created"]
+    assert len(created) == 1
+    entry = created[0]
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "ai_agent_generator.agent_manager"
+    assert entry["agent_id"] == result["agent_id"]
+    assert entry["phase_timings_ms"] == result["phase_timings_ms"]
+    assert "total" in entry["phase_timings_ms"]
+    assert not any(e["level"] == "DEBUG" for e in entries)
+    print(f"✅ Structured record: {entry['phase_timings_ms']['total']} ms total")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Logging Tests")
+    print("=" * 60)
+
+    results = {}
+    for test in (test_create_agent_keeps_stdout_clean, test_info_records_carry_phase_timings):
+        try:
+            test()
+            results[test.__name__] = True
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results[test.__name__] = False
+
+    print("\n" + "=" * 60)
+    for name, passed in results.items():
+        print(f"{name}: {'✅ PASS' if passed else '❌ FAIL'}")
+
+    exit(0 if all(results.values()) else 1)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the create_agent phase dependency graph
+"""
+
+import asyncio
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+
+def test_independent_phases_run_concurrently():
+    """Niezależne fazy nakładają się w czasie, zależne czekają na swoje wejścia"""
+    from tools.phase_pipeline import PhasePipeline
+
+    order = []
+
+    def phase(name, delay, value=None):
+        async def run(results):
+            order.append(f"start:{name}")
+            await asyncio.sleep(delay)
+            order.append(f"end:{name}")
+            return value if value is not None else name
+        return run
+
+    async def combine(results):
+        return results["a"] + results["b"] + results["c"]
+
+    pipeline = (PhasePipeline()
+                .add("root", phase("root", 0.01))
+                .add("a", phase("a", 0.1, 1), after=["root"])
+                .add("b", phase("b", 0.1, 2), after=["root"])
+                .add("c", phase("c", 0.1, 3), after=["root"])
+                .add("sum", combine, after=["a", "b", "c"]))
+    results, timings = asyncio.run(pipeline.run())
+
+    assert results["sum"] == 6
+    assert order[0] == "start:root" and order[1] == "end:root"
+    assert set(order[2:5]) == {"start:a", "start:b", "start:c"}
+    # Ścieżka krytyczna ~110 ms zamiast ~310 ms sekwencyjnie
+    assert timings["total"] < 250
+    assert all(timings[name] >= 90 for name in ("a", "b", "c"))
+    print(f"✅ Concurrent phases: {timings}")
+
+
+def test_failed_phase_cancels_pipeline():
+    """Błąd fazy przerywa graf i jest propagowany"""
+    from tools.phase_pipeline import PhasePipeline
+
+    async def fail(results):
+        raise RuntimeError("boom")
+
+    async def slow(results):
+        await asyncio.sleep(5)
+
+    pipeline = PhasePipeline().add("fail", fail).add("slow", slow)
+    try:
+        asyncio.run(asyncio.wait_for(pipeline.run(), timeout=2))
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert str(e) == "boom"
+
+    try:
+        PhasePipeline().add("a", fail, after=["missing"])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Failed phase cancels the pipeline")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Phase Pipeline Tests")
+    print("=" * 60)
+
+    results = {}
+    for test in (test_independent_phases_run_concurrently, test_failed_phase_cancels_pipeline):
+        try:
+            test()
+            results[test.__name__] = True
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results[test.__name__] = False
+
+    print("\n" + "=" * 60)
+    for name, passed in results.items():
+        print(f"{name}: {'✅ PASS' if passed else '❌ FAIL'}")
+
+    exit(0 if all(results.values()) else 1)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Stress test for concurrent SmartContext learning and snapshot reads
+"""
+
+import asyncio
+import random
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+DOMAINS = ["customer_service", "sales", "marketing", "finance", "communication"]
+COMPONENTS = ["pollinations_llm", "input_processor", "output_processor",
+              "intent_classifier", "gmail_integration", "smart_error_handler"]
+
+
+def _make_agent(i: int):
+    rng = random.Random(i)
+    return {
+        "id": f"agent-{i}",
+        "domain": DOMAINS[i % len(DOMAINS)],
+        "description": f"stress agent {i}",
+        "components": [{"component_id": c} for c in rng.sample(COMPONENTS, rng.randint(1, len(COMPONENTS)))]
+    }
+
+
+async def _concurrent_learning(total_learns: int = 500):
+    from utils.smart_context import SmartContext
+
+    context = SmartContext()
+    agents = [_make_agent(i) for i in range(total_learns)]
+    snapshot_errors = []
+    done = asyncio.Event()
+
+    async def learner(agent):
+        await asyncio.sleep(random.random() / 1000)
+        await context.learn_from_successful_agent(agent)
+
+    async def reader():
+        # Każdy snapshot musi być wewnętrznie spójny, niezależnie od trwającego uczenia
+        while not done.is_set():
+            for state in context.snapshot().values():
+                for pattern_key, pattern in state["patterns"].items():
+                    per_agent = int(pattern_key.rsplit("_", 2)[-2])
+                    if sum(pattern["components"].values()) != pattern["count"] * per_agent:
+                        snapshot_errors.append(pattern_key)
+            await context.get_domain_insights(random.choice(DOMAINS))
+            await asyncio.sleep(0)
+
+    readers = [asyncio.create_task(reader()) for _ in range(10)]
+    await asyncio.gather(*(learner(agent) for agent in agents))
+    done.set()
+    await asyncio.gather(*readers)
+
+    return context, agents, snapshot_errors
+
+
+def test_concurrent_learning_is_exact():
+    """Setki równoległych learnów dają dokładnie te same liczniki co wykonanie sekwencyjne"""
+    context, agents, snapshot_errors = asyncio.run(_concurrent_learning())
+
+    assert snapshot_errors == []
+
+    expected_usage = {}
+    expected_patterns = {}
+    for agent in agents:
+        key = f"{agent['domain']}_{len(agent['components'])}_components"
+        expected_patterns[key] = expected_patterns.get(key, 0) + 1
+        for comp in agent["components"]:
+            expected_usage[comp["component_id"]] = expected_usage.get(comp["component_id"], 0) + 1
+
+    patterns = context.learned_patterns
+    assert {k: p["count"] for k, p in patterns.items()} == expected_patterns
+
+    performance = context.component_performance
+    assert {k: p["usage_count"] for k, p in performance.items()} == expected_usage
+    assert all(0.0 <= p["success_rate"] <= 1.0 for p in performance.values())
+
+    print(f"✅ {len(agents)} concurrent learns, {len(patterns)} patterns, consistent snapshots")
+
+
+def test_domain_insights_are_isolated():
+    """Insights domeny pochodzą wyłącznie z jej sharda"""
+    context, agents, _ = asyncio.run(_concurrent_learning(100))
+    insights = asyncio.run(context.get_domain_insights("sales"))
+
+    assert insights["success_patterns"]
+    assert all(p["pattern"].startswith("sales_") for p in insights["success_patterns"])
+    print(f"✅ Domain insights isolated: {len(insights['success_patterns'])} sales patterns")
+
+
+def test_model_export_import_roundtrip():
+    """Eksport i import modelu odtwarzają identyczny stan, uszkodzony plik jest odrzucany"""
+    import tempfile
+    from utils.smart_context import SmartContext
+    from utils.model_io import ModelFormatError
+
+    context, _, _ = asyncio.run(_concurrent_learning(200))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.bin")
+        exported = asyncio.run(context.export_model(path))
+
+        restored = SmartContext()
+        asyncio.run(restored.import_model(path))
+        assert restored.snapshot() == context.snapshot()
+
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+
+        try:
+            asyncio.run(SmartContext().import_model(path))
+            raise AssertionError("Corrupted model was imported")
+        except ModelFormatError:
+            pass
+
+        # Bez weryfikacji sum obcięty lub zepsuty plik też daje ModelFormatError
+        intact = os.path.join(tmp, "intact.bin")
+        asyncio.run(context.export_model(intact))
+        with open(intact, "rb") as f:
+            payload = f.read()
+        table_start = 24  # nagłówek: magic(8) | u16 | u16 | 3 x u32
+        broken_typecode = bytearray(payload)
+        broken_typecode[table_start + 8] = ord("z")
+        for broken in (payload[:0], payload[:20], payload[:table_start + 40],
+                       payload[:len(payload) // 2], payload[:-1], bytes(broken_typecode)):
+            with open(path, "wb") as f:
+                f.write(broken)
+            try:
+                asyncio.run(SmartContext().import_model(path, verify=False))
+                raise AssertionError(f"Broken model ({len(broken)} bytes) was imported")
+            except ModelFormatError:
+                pass
+
+    print(f"✅ Model roundtrip: {exported['size_bytes']} bytes, checksum {exported['checksum']}")
+
+
+def test_suggestion_cache_follows_model_generation():
+    """Sugestie są zapamiętywane, a uczenie (nowa generacja modelu) je unieważnia"""
+    from utils.smart_context import SmartContext
+
+    async def scenario():
+        context = SmartContext()
+        first = await context.get_smart_component_suggestions("chat i email", "sales")
+        again = await context.get_smart_component_suggestions("email oraz chat", "sales", ["chat_interface"])
+        assert context.suggestion_cache.hits == 1
+        assert [s["component_id"] for s in again] == [s["component_id"] for s in first if s["component_id"] != "chat_interface"]
+
+        generation = context.model_generation
+        await context.learn_from_successful_agent(_make_agent(1))
+        assert context.model_generation == generation + 1
+
+        after = await context.get_smart_component_suggestions("chat i email", "sales")
+        assert after == first
+        assert context.suggestion_cache.misses == 2
+
+    asyncio.run(scenario())
+    print("✅ Suggestion cache hits within a generation and misses after learning")
+
+
+def test_learning_worker_coalesces_batches_and_drops():
+    """Worker łączy powtórzenia, aplikuje partiami i odrzuca nadmiar przy pełnej kolejce"""
+    from utils.learning_worker import LearningWorker
+    from utils.smart_context import SmartContext
+
+    async def coalesce_and_batch():
+        context = SmartContext()
+        worker = LearningWorker(context, batch_size=4)
+
+        # Bez await-ów oddających sterowanie worker nie zdąży niczego pobrać
+        assert await worker.submit(_make_agent(0))
+        assert await worker.submit(_make_agent(0))
+        for i in range(1, 10):
+            assert await worker.submit(_make_agent(i))
+        assert worker.get_metrics()["coalesced"] == 1
+        assert worker.get_metrics()["queue_depth"] == 10
+
+        await worker.drain()
+        metrics = worker.get_metrics()
+        assert metrics["running"] and metrics["queue_depth"] == 0
+        assert metrics["submitted"] == 11 and metrics["dropped"] == 0 and metrics["failures"] == 0
+        assert metrics["applied_events"] == 10 and metrics["applied_occurrences"] == 11
+        assert metrics["batches"] == 3
+
+        # Połączone zdarzenie trafia do modelu z krotnością 2
+        expected = SmartContext()
+        for i in [0, 0] + list(range(1, 10)):
+            await expected.learn_from_successful_agent(_make_agent(i))
+        assert sum(p["count"] for p in context.learned_patterns.values()) == 11
+        assert {c: p["usage_count"] for c, p in context.component_performance.items()} == \
+            {c: p["usage_count"] for c, p in expected.component_performance.items()}
+
+        await worker.stop()
+        assert not worker.get_metrics()["running"]
+
+    async def drop_when_full():
+        worker = LearningWorker(SmartContext(), max_queue_size=1, full_policy="drop")
+        assert await worker.submit(_make_agent(0))
+        assert not await worker.submit(_make_agent(1))
+        # Powtórzenie oczekującego agenta jest łączone, nie odrzucane
+        assert await worker.submit(_make_agent(0))
+        metrics = worker.get_metrics()
+        assert metrics["dropped"] == 1 and metrics["coalesced"] == 1
+
+        await worker.stop()
+        metrics = worker.get_metrics()
+        assert metrics["applied_events"] == 1 and metrics["applied_occurrences"] == 2
+
+    async def block_when_full():
+        context = SmartContext()
+        worker = LearningWorker(context, max_queue_size=1, full_policy="block")
+        accepted = await asyncio.gather(*(worker.submit(_make_agent(i)) for i in range(5)))
+        assert all(accepted)
+
+        await worker.stop()
+        metrics = worker.get_metrics()
+        assert metrics["dropped"] == 0 and metrics["applied_events"] == 5
+        assert sum(p["count"] for p in context.learned_patterns.values()) == 5
+
+    asyncio.run(coalesce_and_batch())
+    asyncio.run(drop_when_full())
+    asyncio.run(block_when_full())
+
+    try:
+        LearningWorker(SmartContext(), full_policy="spill")
+        raise AssertionError("Unknown queue full policy was accepted")
+    except ValueError:
+        pass
+
+    print("✅ Learning worker coalesces, batches, drops and drains")
+
+
+def _shared_memory_worker(segment: str, lock_dir: str, learns: int):
+    """Osobny proces serwera uczący SmartContext w trybie współdzielonym"""
+    from utils.shared_context import SharedAggregateTables
+    from utils.smart_context import SmartContext
+
+    context = SmartContext(shared_tables=SharedAggregateTables(name=segment, capacity=64, lock_dir=lock_dir))
+
+    async def learn_all():
+        for i in range(learns):
+            await context.learn_from_successful_agent(_make_agent(i))
+
+    asyncio.run(learn_all())
+    context.shared_tables.close()
+
+
+def test_shared_memory_tables_across_workers():
+    """Kilka procesów uczy się równolegle, a każdy widzi te same zagregowane liczniki"""
+    import multiprocessing
+    import tempfile
+    import uuid
+    from utils.shared_context import SharedAggregateTables
+
+    workers, learns = 4, 150
+    segment = f"sctx_test_{uuid.uuid4().hex[:8]}"
+    with tempfile.TemporaryDirectory() as lock_dir:
+        tables = SharedAggregateTables(name=segment, capacity=64, lock_dir=lock_dir)
+        try:
+            spawn = multiprocessing.get_context("spawn")
+            processes = [spawn.Process(target=_shared_memory_worker, args=(segment, lock_dir, learns))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                assert process.exitcode == 0
+
+            expected_usage = {}
+            expected_pair = 0
+            for i in range(learns):
+                comp_ids = {c["component_id"] for c in _make_agent(i)["components"]}
+                for comp_id in comp_ids:
+                    expected_usage[comp_id] = expected_usage.get(comp_id, 0) + workers
+                if {"pollinations_llm", "input_processor"} <= comp_ids:
+                    expected_pair += workers
+
+            performance = tables.component_performance()
+            assert {k: p["usage_count"] for k, p in performance.items()} == expected_usage
+            assert tables.cooccurrence("pollinations_llm", "input_processor") == expected_pair
+            assert tables.generation == workers * learns
+        finally:
+            tables.close()
+            tables.unlink()
+
+    print(f"✅ {workers} workers x {learns} learns aggregated in shared memory")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting SmartContext Concurrency Tests")
+    print("=" * 60)
+
+    results = {}
+    for test in (test_concurrent_learning_is_exact, test_domain_insights_are_isolated,
+                 test_model_export_import_roundtrip, test_suggestion_cache_follows_model_generation,
+                 test_learning_worker_coalesces_batches_and_drops,
+                 test_shared_memory_tables_across_workers):
+        try:
+            test()
+            results[test.__name__] = True
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            results[test.__name__] = False
+
+    print("\n" + "=" * 60)
+    for name, passed in results.items():
+        print(f"{name}: {'✅ PASS' if passed else '❌ FAIL'}")
+
+    exit(0 if all(results.values()) else 1)